@@ -1,3 +1,4 @@
 from .lastools_algorithm import LastoolsAlgorithm
+from .lastools_algorithm_stub import LastoolsAlgorithmStub
 
-__all__ = [LastoolsAlgorithm]
+__all__ = [LastoolsAlgorithm, LastoolsAlgorithmStub]
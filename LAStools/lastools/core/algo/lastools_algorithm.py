@@ -21,17 +21,25 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
+import os
+
 from PyQt5.QtGui import QIcon
-from qgis.core import (QgsProcessingAlgorithm,
+from qgis.core import (QgsProcessing,
+                       QgsProcessingAlgorithm,
+                       QgsCoordinateReferenceSystem,
                        QgsProcessingParameterBoolean,
+                       QgsProcessingParameterExtent,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterString,
                        QgsProcessingParameterEnum,
                        QgsProcessingParameterFile,
                        QgsProcessingParameterFileDestination,
-                       QgsProcessingParameterFolderDestination)
+                       QgsProcessingParameterFolderDestination,
+                       QgsProcessingParameterRasterDestination,
+                       QgsProcessingParameterVectorDestination,
+                       QgsProcessingParameterPointCloudDestination)
 from qgis.PyQt.QtCore import QCoreApplication
-from ..utils import LastoolsUtils
+from ..utils import LastoolsUtils, LastoolsScheduler, LastoolsCatalog, LastoolsPipeline, LastoolsManifest
 
 
 class LastoolsAlgorithm(QgsProcessingAlgorithm):
@@ -45,6 +53,13 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
     INPUT_LASLAZ = "INPUT_LASLAZ"
     INPUT_DIRECTORY = "INPUT_DIRECTORY"
     INPUT_WILDCARDS = "INPUT_WILDCARDS"
+    INPUT_EXTENT = "INPUT_EXTENT"
+    TILE_SIZE = "TILE_SIZE"
+    BUFFER = "BUFFER"
+    ADAPTIVE = "ADAPTIVE"
+    MOSAIC = "MOSAIC"
+    COG = "COG"
+    PLAN = "PLAN"
     MERGED = "MERGED"
     OUTPUT_GENERIC = "OUTPUT_GENERIC"
     OUTPUT_LASLAZ = "OUTPUT_LASLAZ"
@@ -58,6 +73,8 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
     OUTPUT_VECTOR = "OUTPUT_VECTOR"
     OUTPUT_VECTOR_FORMAT = "OUTPUT_VECTOR_FORMAT"
     OUTPUT_VECTOR_FORMATS = ["shp", "wkt", "kml", "txt"]
+    # the destination parameters QGIS declares a raster, vector or point cloud layer output for, by kind of layer
+    OUTPUT_LAYERS = {OUTPUT_RASTER: "raster", OUTPUT_VECTOR: "vector", OUTPUT_LASLAZ: "point cloud"}
     ADDITIONAL_OPTIONS = "ADDITIONAL_OPTIONS"
     TEMPORARY_DIRECTORY = "TEMPORARY_DIRECTORY"
     HORIZONTAL_FEET = "HORIZONTAL_FEET"
@@ -112,6 +129,23 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
                       "veg high (5)", "buildings (6)", "noise (7)", "keypoint (8)", "water (9)", "rail (10)",
                       "road surface (11)", "overlap (12)"]
 
+    # icons by path, all algorithms share the few icon files
+    icons = {}
+    # set from the 'plan only' parameter before processAlgorithm runs, see prepareAlgorithm
+    plan = False
+    # the managed scratch directory of the run, if no temporary directory is given
+    scratch_directory = None
+    # the output files of the run by destination parameter, see prepareAlgorithm
+    output_files = {}
+    # the files written in place of output files, e.g. a COG or a VRT, by destination parameter
+    written_files = {}
+
+    @staticmethod
+    def icon_from_path(path):
+        if path not in LastoolsAlgorithm.icons:
+            LastoolsAlgorithm.icons[path] = QIcon(path)
+        return LastoolsAlgorithm.icons[path]
+
     @staticmethod
     def tr(string):
         """
@@ -150,7 +184,8 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
 
     def add_parameters_cores_gui(self):
         self.addParameter(QgsProcessingParameterNumber(LastoolsAlgorithm.CORES, "number of cores",
-                                                       QgsProcessingParameterNumber.Integer, 4, False, 1, 32))
+                                                       QgsProcessingParameterNumber.Integer, 4, False, 1,
+                                                       max(32, os.cpu_count() or 1)))
 
     def add_parameters_cores_commands(self, parameters, context, commands):
         cores = self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context)
@@ -168,8 +203,7 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
     def add_parameters_generic_input_commands(self, parameters, context, commands, switch):
         input_generic = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_GENERIC, context)
         if input_generic != "":
-            commands.append(switch)
-            commands.append('"' + input_generic + '"')
+            commands.add_input(switch, input_generic)
 
     def add_parameters_generic_input_folder_gui(self, wildcard):
         self.addParameter(QgsProcessingParameterFile(
@@ -182,11 +216,10 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
         input_generic_directory = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_GENERIC_DIRECTORY, context)
         wildcards = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_GENERIC_WILDCARDS, context).split()
         for wildcard in wildcards:
-            commands.append("-i")
             if input_generic_directory is not None:
-                commands.append('"' + input_generic_directory + "\\" + wildcard + '"')
+                commands.add_input("-i", os.path.join(input_generic_directory, wildcard))
             else:
-                commands.append('"' + wildcard + '"')
+                commands.add_input("-i", wildcard)
 
     def add_parameters_point_input_gui(self):
         self.addParameter(QgsProcessingParameterFile(
@@ -196,8 +229,7 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
     def add_parameters_point_input_commands(self, parameters, context, commands):
         input_las_laz = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_LASLAZ, context)
         if input_las_laz is not None:
-            commands.append("-i")
-            commands.append('"' + input_las_laz + '"')
+            commands.add_input("-i", input_las_laz)
 
     def add_parameters_point_input_folder_gui(self):
         self.addParameter(QgsProcessingParameterFile(
@@ -206,16 +238,167 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
         self.addParameter(QgsProcessingParameterString(
             LastoolsAlgorithm.INPUT_WILDCARDS, "input wildcard(s)", "*.laz"
         ))
+        self.addParameter(QgsProcessingParameterExtent(
+            LastoolsAlgorithm.INPUT_EXTENT, "only input files overlapping this area of interest", None, True
+        ))
 
     def add_parameters_point_input_folder_commands(self, parameters, context, commands):
+        if parameters.get(LastoolsAlgorithm.INPUT_EXTENT):
+            # the files overlapping the area of interest are passed as a list file, there may be thousands of them
+            # named as the tool sees them, under Wine as Windows paths
+            commands.add_input("-lof", LastoolsUtils.list_of_files([
+                commands.tool_path(input_file)
+                for input_file in self.get_parameters_point_input_folder_files(parameters, context)
+            ]))
+            return
         input_directory = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_DIRECTORY, context)
         wildcards = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_WILDCARDS, context).split()
         for wildcard in wildcards:
-            commands.append("-i")
             if input_directory is not None:
-                commands.append('"' + input_directory + "\\" + wildcard + '"')
+                commands.add_input("-i", os.path.join(input_directory, wildcard))
             else:
-                commands.append('"' + wildcard + '"')
+                commands.add_input("-i", wildcard)
+
+    def get_parameters_point_input_folder_files(self, parameters, context):
+        input_directory = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_DIRECTORY, context)
+        wildcards = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_WILDCARDS, context).split()
+        input_files = LastoolsScheduler.expand_input_files(input_directory, wildcards)
+        if not parameters.get(LastoolsAlgorithm.INPUT_EXTENT):
+            return input_files
+        # the extent is reprojected into the CRS of the point clouds, as far as their headers tell it
+        catalog = LastoolsCatalog.default()
+        epsg = next((header["epsg"] for header in catalog.headers(input_files) if header["epsg"]), None)
+        crs = QgsCoordinateReferenceSystem(f"EPSG:{epsg}") if epsg is not None else QgsCoordinateReferenceSystem()
+        extent = self.parameterAsExtent(parameters, LastoolsAlgorithm.INPUT_EXTENT, context, crs)
+        if extent.isNull():
+            return input_files
+        return catalog.overlapping(
+            input_files, (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum())
+        )
+
+    def add_parameters_plan_gui(self):
+        self.addParameter(QgsProcessingParameterBoolean(
+            LastoolsAlgorithm.PLAN, "plan only: show the commands and estimates but run nothing", False
+        ))
+
+    def add_parameters_adaptive_tiling_gui(self):
+        self.addParameter(QgsProcessingParameterBoolean(
+            LastoolsAlgorithm.ADAPTIVE, "adaptive quadtree tiling (tile size is the smallest tile)", False
+        ))
+
+    def add_parameters_mosaic_gui(self, description="VRT mosaic of the tile rasters instead of merging them"):
+        self.addParameter(QgsProcessingParameterBoolean(LastoolsAlgorithm.MOSAIC, description, False))
+
+    def prepareAlgorithm(self, parameters, context, feedback):
+        self.plan = self.parameterAsBool(parameters, LastoolsAlgorithm.PLAN, context)
+        self.output_files = {}
+        self.written_files = {}
+        for parameter in LastoolsAlgorithm.OUTPUT_LAYERS:
+            if self.parameterDefinition(parameter) is None:
+                continue
+            # resolved once, a temporary output gets a new file name on every call. QGIS notes the file to be loaded
+            # on completion if the user asked to open it
+            path = self.parameterAsOutputLayer(parameters, parameter, context)
+            if path:
+                self.output_files[parameter] = path
+        return True
+
+    def get_parameters_output_file(self, parameters, context, parameter):
+        """returns the file of the raster, vector or point cloud destination parameter, '' if none is set"""
+        if parameter in self.output_files:
+            return self.output_files[parameter]
+        return self.parameterAsString(parameters, parameter, context)
+
+    def set_output_file(self, parameter, path):
+        """notes that the product of the destination parameter was written to another file, e.g. a COG or a VRT"""
+        if parameter in self.output_files:
+            self.written_files[parameter] = path
+
+    def postProcessAlgorithm(self, context, feedback):
+        """opens the products the user asked to open in background tasks instead of QGIS, see LastoolsLoader
+
+        QGIS would open them in the UI thread once the algorithm is done, which freezes it on multi-GB products. the
+        files written in place of the output files are opened, and not the output files never written.
+        """
+        from ..utils.loader import LastoolsLoader
+        if self.plan:
+            # a plan writes nothing to the scratch directory it names
+            LastoolsUtils.remove_scratch_directory(self.scratch_directory)
+        layers = context.layersToLoadOnCompletion()
+        for parameter, path in self.output_files.items():
+            if path not in layers:
+                continue
+            details = layers.pop(path)
+            written = self.written_files.get(parameter, path)
+            if os.path.exists(written):
+                LastoolsLoader.load(written, LastoolsAlgorithm.OUTPUT_LAYERS[parameter],
+                                    details.project or context.project())
+        context.setLayersToLoadOnCompletion(layers)
+        return {}
+
+    def run_lastools(self, commands, feedback):
+        """runs the command, in plan mode it is only shown"""
+        if self.plan:
+            feedback.pushConsoleInfo("plan: " + commands.commandline())
+            return 0
+        return LastoolsUtils.run_lastools(commands, feedback)
+
+    def run_lastools_per_input_file(self, parameters, context, feedback, commands,
+                                    directory=INPUT_DIRECTORY, wildcards=INPUT_WILDCARDS):
+        """runs the command once per file of the input directory on a pool of 'number of cores' processes
+
+        the command must not contain the input folder and cores options. when the inputs are merged on-the-fly
+        they are passed to a single LAStools process with '-cores' instead.
+        """
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MERGED, context):
+            if directory == LastoolsAlgorithm.INPUT_DIRECTORY:
+                self.add_parameters_point_input_folder_commands(parameters, context, commands)
+            else:
+                self.add_parameters_generic_input_folder_commands(parameters, context, commands)
+            self.add_parameters_cores_commands(parameters, context, commands)
+            return {"merged": self.run_lastools(commands, feedback)}
+        if directory == LastoolsAlgorithm.INPUT_DIRECTORY:
+            input_files = self.get_parameters_point_input_folder_files(parameters, context)
+        else:
+            input_directory = self.parameterAsString(parameters, directory, context)
+            input_wildcards = self.parameterAsString(parameters, wildcards, context).split()
+            input_files = LastoolsScheduler.expand_input_files(input_directory, input_wildcards)
+        cores = self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context)
+        if self.plan:
+            feedback.pushConsoleInfo(f"plan: {len(input_files)} runs, one per input file, on up to {cores} processes")
+            if input_files:
+                feedback.pushConsoleInfo("plan: " + commands.with_input(input_files[0]).commandline())
+            return {}
+        return LastoolsScheduler.run_per_file(commands, input_files, cores, feedback)
+
+    def add_statistics_results(self, feedback, results):
+        """adds the wall time, CPU time, peak memory and output bytes of the LAStools processes to the results
+
+        'statistics' lists every process, 'statistics_by_tool' sums them per tool. they are also appended to the
+        run log, if one is set.
+        """
+        records = LastoolsUtils.pop_statistics(feedback)
+        summary = LastoolsUtils.summarize_statistics(records)
+        for tool, totals in summary.items():
+            cpu = "n/a" if totals["user"] is None else f"{totals['user']:.1f}s user {totals['sys']:.1f}s sys"
+            memory = "n/a" if totals["max_rss"] is None else f"{totals['max_rss'] / 1048576:.0f} MB"
+            written = "n/a" if totals["output_bytes"] is None else f"{totals['output_bytes'] / 1048576:.1f} MB"
+            feedback.pushConsoleInfo(
+                f"{tool}: {totals['runs']} run(s), {totals['wall']:.1f}s wall, {cpu}, peak memory {memory}, "
+                f"written {written}"
+            )
+        try:
+            LastoolsUtils.append_run_log(self.name(), records)
+        except OSError as error:
+            feedback.reportError(f"could not append to the run log: {error}")
+        results = dict(results)
+        for parameter, path in self.output_files.items():
+            written = self.written_files.get(parameter, path)
+            if os.path.exists(written):
+                results[parameter] = written
+        results["statistics"] = records
+        results["statistics_by_tool"] = summary
+        return results
 
     def add_parameters_point_input_merged_gui(self):
         self.addParameter(
@@ -286,19 +469,17 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
     def add_parameters_generic_output_commands(self, parameters, context, commands, switch):
         output = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_GENERIC, context)
         if output != "":
-            commands.append(switch)
-            commands.append('"' + output + '"')
+            commands.add_output(switch, output)
 
     def add_parameters_point_output_gui(self):
-        self.addParameter(
-            QgsProcessingParameterFileDestination(LastoolsAlgorithm.OUTPUT_LASLAZ, "Output LAS/LAZ file", "laz", "",
-                                                  True, False))
+        self.addParameter(QgsProcessingParameterPointCloudDestination(
+            LastoolsAlgorithm.OUTPUT_LASLAZ, "Output LAS/LAZ file", None, True, False
+        ))
 
     def add_parameters_point_output_commands(self, parameters, context, commands):
-        output = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_LASLAZ, context)
+        output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_LASLAZ)
         if output != "":
-            commands.append("-o")
-            commands.append('"' + output + '"')
+            commands.add_output("-o", output)
 
     def add_parameters_point_output_format_gui(self):
         self.addParameter(QgsProcessingParameterEnum(LastoolsAlgorithm.OUTPUT_POINT_FORMAT, "output format",
@@ -309,16 +490,14 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
         commands.append("-o" + LastoolsAlgorithm.OUTPUT_POINT_FORMATS[format_output_point])
 
     def add_parameters_raster_output_gui(self):
-        self.addParameter(
-            QgsProcessingParameterFileDestination(
-                LastoolsAlgorithm.OUTPUT_RASTER, "Output raster file", "tif", "", True, False)
-        )
+        self.addParameter(QgsProcessingParameterRasterDestination(
+            LastoolsAlgorithm.OUTPUT_RASTER, "Output raster file", None, True, False
+        ))
 
     def add_parameters_raster_output_commands(self, parameters, context, commands):
-        output = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_RASTER, context)
+        output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
         if output != "":
-            commands.append("-o")
-            commands.append('"' + output + '"')
+            commands.add_output("-o", output)
 
     def add_parameters_raster_output_format_gui(self):
         self.addParameter(QgsProcessingParameterEnum(
@@ -329,16 +508,63 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
         format_output_raster = self.parameterAsInt(parameters, LastoolsAlgorithm.OUTPUT_RASTER_FORMAT, context)
         commands.append("-o" + LastoolsAlgorithm.OUTPUT_RASTER_FORMATS[format_output_raster])
 
+    def add_parameters_cog_gui(self):
+        self.addParameter(QgsProcessingParameterBoolean(
+            LastoolsAlgorithm.COG, "convert the rasters to Cloud-Optimized GeoTIFFs with overviews", False
+        ))
+
+    def get_raster_products_state(self, parameters, context, commands):
+        """returns the state of the rasters in the folders the command writes to, or None if they stay as they are
+
+        the command writes to its '-odir', the folders of its '-o' or, with neither, next to its inputs.
+        """
+        if not self.parameterAsBool(parameters, LastoolsAlgorithm.COG, context):
+            return None
+        directories = set()
+        if commands.option("-odir") is not None:
+            directories.add(commands.option("-odir"))
+        directories.update(os.path.dirname(output) for output in commands.outputs if output != commands.option("-odir"))
+        if not directories and self.parameterDefinition(LastoolsAlgorithm.INPUT_DIRECTORY) is not None:
+            directories.add(self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_DIRECTORY, context))
+        elif not directories:
+            input_file = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_LASLAZ, context)
+            directories.add(os.path.dirname(input_file))
+        files = [
+            os.path.join(directory, file) for directory in directories if os.path.isdir(directory)
+            for file in os.listdir(directory)
+        ]
+        return LastoolsManifest.file_states(files)
+
+    def convert_raster_products_to_cog(self, parameters, context, feedback, commands, state):
+        """converts the rasters the command created or modified since the state was taken to COGs"""
+        if state is None:
+            return []
+        if self.plan:
+            feedback.pushConsoleInfo("plan: the rasters written are converted to Cloud-Optimized GeoTIFFs")
+            return []
+        after = self.get_raster_products_state(parameters, context, commands)
+        products = [file for file in after if state.get(file) != after[file]]
+        cores = os.cpu_count() or 1
+        if self.parameterDefinition(LastoolsAlgorithm.CORES) is not None:
+            cores = self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context)
+        # GDAL is only loaded once rasters are converted
+        from ..utils.cog import LastoolsCog
+        cogs = LastoolsCog.convert_all(products, cores, feedback)
+        for parameter, path in self.output_files.items():
+            if os.path.splitext(path)[0] + ".tif" in cogs:
+                self.set_output_file(parameter, os.path.splitext(path)[0] + ".tif")
+        return cogs
+
     def add_parameters_vector_output_gui(self):
-        self.addParameter(
-            QgsProcessingParameterFileDestination(LastoolsAlgorithm.OUTPUT_VECTOR, "Output vector file", "shp", "",
-                                                  True, False))
+        self.addParameter(QgsProcessingParameterVectorDestination(
+            LastoolsAlgorithm.OUTPUT_VECTOR, "Output vector file", QgsProcessing.TypeVectorAnyGeometry, None, True,
+            False
+        ))
 
     def add_parameters_vector_output_commands(self, parameters, context, commands):
-        output = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_VECTOR, context)
+        output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_VECTOR)
         if output != "":
-            commands.append("-o")
-            commands.append('"' + output + '"')
+            commands.add_output("-o", output)
 
     def add_parameters_vector_output_format_gui(self):
         self.addParameter(QgsProcessingParameterEnum(LastoolsAlgorithm.OUTPUT_VECTOR_FORMAT, "output format",
@@ -356,8 +582,7 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
     def add_parameters_output_directory_commands(self, parameters, context, commands):
         output_dir = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_DIRECTORY, context)
         if output_dir != "":
-            commands.append("-odir")
-            commands.append('"' + output_dir + '"')
+            commands.add_output("-odir", output_dir)
 
     def add_parameters_output_appendix_gui(self):
         self.addParameter(QgsProcessingParameterString(
@@ -368,24 +593,57 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
         output_appendix = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_APPENDIX, context)
         if output_appendix != "":
             commands.append("-odix")
-            commands.append('"' + output_appendix + '"')
+            commands.append(output_appendix)
 
     def add_parameters_temporary_directory_gui(self):
         self.addParameter(QgsProcessingParameterFolderDestination(
-            LastoolsAlgorithm.TEMPORARY_DIRECTORY, "temporary directory (must be empty!!!)", None, False
+            LastoolsAlgorithm.TEMPORARY_DIRECTORY, "temporary directory (empty for a fresh scratch directory per run)",
+            None, True, False
         ))
 
     def add_parameters_temporary_directory_as_output_directory_commands(self, parameters, context, commands):
-        output_dir = self.parameterAsString(parameters, LastoolsAlgorithm.TEMPORARY_DIRECTORY, context)
+        output_dir = self.get_parameters_temporary_directory_value(parameters, context)
         if output_dir != "":
-            commands.append("-odir")
-            commands.append('"' + output_dir + '"')
+            commands.add_output("-odir", output_dir)
+
+    def get_parameters_tile_size_value(self, parameters, context, feedback):
+        """returns the tile size, for 0 one that holds the configured points per tile, and reports the buffer's share"""
+        tile_size = self.parameterAsDouble(parameters, LastoolsAlgorithm.TILE_SIZE, context)
+        buffer = self.parameterAsDouble(parameters, LastoolsAlgorithm.BUFFER, context)
+        if tile_size == 0.0:
+            if self.parameterDefinition(LastoolsAlgorithm.INPUT_DIRECTORY) is not None:
+                input_files = self.get_parameters_point_input_folder_files(parameters, context)
+            else:
+                input_files = [self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_LASLAZ, context)]
+            headers = LastoolsCatalog.default().headers([file for file in input_files if os.path.isfile(file)])
+            points_per_tile = LastoolsPipeline.points_per_tile()
+            tile_size = LastoolsPipeline.auto_tile_size(
+                headers, buffer, points_per_tile, self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context)
+            )
+            if tile_size is None:
+                feedback.reportError("no point density in the headers of the input files, using a tile size of 1000")
+                tile_size = 1000.0
+            feedback.pushConsoleInfo(f"auto tile size {tile_size:g} for about {points_per_tile:,.0f} points per tile")
+        overhead = ((tile_size + 2 * buffer) ** 2 - tile_size ** 2) / tile_size ** 2
+        feedback.pushConsoleInfo(
+            f"tiles of {tile_size:g} with a buffer of {buffer:g} hold ~{100 * overhead:.1f}% extra points of their "
+            f"neighbours"
+        )
+        return tile_size
+
+    def get_parameters_temporary_directory_value(self, parameters, context):
+        temporary_directory = self.parameterAsString(parameters, LastoolsAlgorithm.TEMPORARY_DIRECTORY, context)
+        if temporary_directory == "":
+            # without a temporary directory the run gets its own scratch directory, the pipeline removes it again
+            if self.scratch_directory not in LastoolsUtils.scratch_directories:
+                self.scratch_directory = LastoolsUtils.create_scratch_directory()
+            temporary_directory = self.scratch_directory
+        return temporary_directory
 
     def add_parameters_temporary_directory_as_input_files_commands(self, parameters, context, commands, files):
-        temp_output = self.parameterAsString(parameters, LastoolsAlgorithm.TEMPORARY_DIRECTORY, context)
+        temp_output = self.get_parameters_temporary_directory_value(parameters, context)
         if temp_output != "":
-            commands.append("-i")
-            commands.append(temp_output + '\\' + files)
+            commands.add_input("-i", os.path.join(temp_output, files))
 
     def add_parameters_additional_gui(self):
         self.addParameter(QgsProcessingParameterString(
@@ -393,9 +651,8 @@ class LastoolsAlgorithm(QgsProcessingAlgorithm):
         )
 
     def add_parameters_additional_commands(self, parameters, context, commands):
-        additional_options = self.parameterAsString(parameters, LastoolsAlgorithm.ADDITIONAL_OPTIONS, context).split()
-        for option in additional_options:
-            commands.append(option)
+        additional_options = self.parameterAsString(parameters, LastoolsAlgorithm.ADDITIONAL_OPTIONS, context)
+        commands.add_arguments(additional_options)
 
     def add_parameters_filter1_return_class_flags_gui(self):
         self.addParameter(QgsProcessingParameterEnum(
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    lastools_algorithm_stub.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import importlib
+
+from qgis.core import QgsProcessingAlgorithm
+
+from ..utils import paths
+from .lastools_algorithm import LastoolsAlgorithm
+from .registry import registry
+
+# the package the modules of the registry are relative to
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+
+class LastoolsAlgorithmStub(QgsProcessingAlgorithm):
+    """stands in for a LAStools algorithm in the toolbox until it is opened or run
+
+    name, group and icon come from the registry, so QGIS starts without importing the module of the algorithm or
+    loading its help text. both happen when QGIS first creates an instance of the algorithm, asks for its help or
+    inspects its parameters and outputs, as the modeler and processing.algorithmHelp do.
+    """
+
+    def __init__(self, group, group_id, module, class_name, name, display_name, licence):
+        super().__init__()
+        self.group_name = group
+        self.group_id = group_id
+        self.module = module
+        self.class_name = class_name
+        self.algorithm_name = name
+        self.display_name = display_name
+        self.licence = licence
+        self.algorithm = None
+
+    @staticmethod
+    def from_registry():
+        """returns one stub per algorithm of the registry, in the order of the registry"""
+        return [
+            LastoolsAlgorithmStub(group, group_id, *entry)
+            for group_id, (group, entries) in registry.items() for entry in entries
+        ]
+
+    def delegate(self):
+        """returns an instance of the actual algorithm, importing its module on first use"""
+        if self.algorithm is None:
+            module = importlib.import_module("." + self.module, PACKAGE)
+            self.algorithm = getattr(module, self.class_name)()
+            self.algorithm.initAlgorithm(None)
+        return self.algorithm
+
+    def initAlgorithm(self, config=None):
+        # the parameters are defined by the actual algorithm, they are looked up there when they are asked for
+        pass
+
+    def parameterDefinitions(self):
+        return self.delegate().parameterDefinitions()
+
+    def parameterDefinition(self, name):
+        return self.delegate().parameterDefinition(name)
+
+    def destinationParameterDefinitions(self):
+        return self.delegate().destinationParameterDefinitions()
+
+    def countVisibleParameters(self):
+        return self.delegate().countVisibleParameters()
+
+    def outputDefinitions(self):
+        return self.delegate().outputDefinitions()
+
+    def outputDefinition(self, name):
+        return self.delegate().outputDefinition(name)
+
+    def hasHtmlOutputs(self):
+        return self.delegate().hasHtmlOutputs()
+
+    def processAlgorithm(self, parameters, context, feedback):
+        return self.create().processAlgorithm(parameters, context, feedback)
+
+    def createInstance(self):
+        return self.delegate().createInstance()
+
+    def name(self):
+        return self.algorithm_name
+
+    def displayName(self):
+        return self.display_name
+
+    def group(self):
+        return self.group_name
+
+    def groupId(self):
+        return self.group_id
+
+    def helpUrl(self):
+        return self.delegate().helpUrl()
+
+    def shortHelpString(self):
+        return self.delegate().shortHelpString()
+
+    def shortDescription(self):
+        return self.delegate().shortDescription()
+
+    def icon(self):
+        img_path = 'licenced.png' if self.licence else 'open_source.png'
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
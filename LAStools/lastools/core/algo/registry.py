@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    registry.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+# everything the toolbox needs to list the algorithms without importing them: per group id the group name and the
+# algorithms as (module below lastools.core, class, name, display name, licensed). it has to be kept in line with
+# the 'descript_*' dictionaries of utils/help.py.
+registry = {
+    "preprocessing": ("Preprocessing", [
+        ("processing.lasindex", "LasIndex", "LasIndex", "lasindex", False),
+        ("processing.lasindex", "LasIndexPro", "LasIndexPro", "lasindex (folder)", False),
+        ("processing.lasmerge", "LasMerge", "LasMerge", "lasmerge", False),
+        ("processing.lasmerge", "LasMergePro", "LasMergePro", "lasmerge (folder)", False),
+        ("processing.lasoverage", "LasOverage", "LasOverage", "lasoverage", True),
+        ("processing.lasoverage", "LasOveragePro", "LasOveragePro", "lasoverage (folder)", True),
+        ("processing.lasboundary", "LasBoundary", "LasBoundary", "lasboundary", True),
+        ("processing.lasboundary", "LasBoundaryPro", "LasBoundaryPro", "lasboundary (folder)", True),
+        ("processing.lasclip", "LasClip", "LasClip", "lasclip", True),
+        ("processing.lastile", "LasTile", "LasIntensity", "lasintensity", True),
+        ("processing.lastile", "LasTilePro", "LasIntensity", "lasintensity", True),
+        ("processing.lassplit", "LasSplit", "LasSplit", "lassplit", True),
+        ("processing.lasnoise", "LasNoise", "LasNoise", "lasnoise", True),
+        ("processing.lasnoise", "LasNoisePro", "LasNoisePro", "lasnoise (folder)", True),
+        ("processing.lasdiff", "LasDiff", "LasDiff", "lasdiff", True),
+        ("processing.las3dpoly", "Las3dPolyRadialDistance", "Las3dPolyRadialDistance",
+         "las3dpoly (Radial Distance)", True),
+        ("processing.las3dpoly", "Las3dPolyHorizontalVerticalDistance", "Las3dPolyHorizontalVerticalDistance",
+         "las3dpoly (Horizontal and Vertical Distance)", True),
+        ("processing.lasintensity", "LasIntensity", "LasIntensity", "lasintensity", True),
+        ("processing.lasintensity", "LasIntensityAttenuationFactor", "LasIntensityAttenuationFactor",
+         "lasintensity (Attenuation Factor)", True),
+    ]),
+    "data_convert": ("Data Convert (Import / Export)", [
+        ("data_convert.las2txt", "Las2txt", "Las2txt", "las2txt", False),
+        ("data_convert.las2txt", "Las2txtPro", "Las2txtPro", "las2txt (folder)", False),
+        ("data_convert.txt2las", "Txt2Las", "Txt2Las", "txt2las", False),
+        ("data_convert.txt2las", "Txt2LasPro", "Txt2LasPro", "txt2las (folder)", False),
+        ("data_convert.las2las", "Las2LasFilter", "Las2LasFilter", "las2las - filter", False),
+        ("data_convert.las2las", "Las2LasProFilter", "Las2LasProFilter", "las2las - filter (folder)", False),
+        ("data_convert.las2las", "Las2LasProject", "Las2LasProject", "las2las - project", False),
+        ("data_convert.las2las", "Las2LasProProject", "Las2LasProProject", "las2las - project (folder)", False),
+        ("data_convert.las2las", "Las2LasTransform", "Las2LasTransform", "las2las - transform", False),
+        ("data_convert.las2las", "Las2LasProTransform", "Las2LasProTransform", "las2las - transform (folder)", False),
+        ("data_convert.las2shp", "Las2Shp", "Las2Shp", "las2shp", True),
+        ("data_convert.shp2las", "Shp2Las", "Shp2Las", "shp2las", True),
+    ]),
+    "classification_filtering": ("Classification & Filtering", [
+        ("classification_filtering.lasground", "LasGround", "LasGround", "lasground", True),
+        ("classification_filtering.lasground", "LasGroundPro", "LasGroundPro", "lasground (folder)", True),
+        ("classification_filtering.lasground_new", "LasGroundNew", "LasGroundNew", "lasground_new", True),
+        ("classification_filtering.lasground_new", "LasGroundProNew", "LasGroundProNew",
+         "lasground_new (folder)", True),
+        ("classification_filtering.lasclassify", "LasClassify", "LasClassify", "lasclassify", True),
+        ("classification_filtering.lasclassify", "LasClassifyPro", "LasClassifyPro", "lasclassify (folder)", True),
+        ("classification_filtering.lasthin", "LasThin", "LasThin", "lasthin", True),
+        ("classification_filtering.lasthin", "LasThinPro", "LasThinPro", "lasthin (folder)", True),
+    ]),
+    "data_compression": ("Data Compression", [
+        ("data_compression.laszip", "LasZip", "LasZip", "laszip", False),
+        ("data_compression.laszip", "LasZipPro", "LasZipPro", "laszip (folder)", False),
+    ]),
+    "dsm_dtm_generation_production": ("DSM/DTM Generation & Production", [
+        ("dsm_dtm_generation_prodctions.las2dem", "Las2Dem", "Las2Dem", "las2dem", True),
+        ("dsm_dtm_generation_prodctions.las2dem", "Las2DemPro", "Las2DemPro", "las2dem (folder)", True),
+        ("dsm_dtm_generation_prodctions.las2iso", "Las2Iso", "Las2Iso", "las2iso", True),
+        ("dsm_dtm_generation_prodctions.lasgrid", "LasGrid", "LasGrid", "lasgrid", True),
+        ("dsm_dtm_generation_prodctions.lasgrid", "LasGridPro", "LasGridPro", "lasgrid (folder)", True),
+        ("dsm_dtm_generation_prodctions.lasheight", "LasHeight", "LasHeight", "lasheight", True),
+        ("dsm_dtm_generation_prodctions.lasheight", "LasHeightClassify", "LasHeightClassify",
+         "lasheight - classify", True),
+        ("dsm_dtm_generation_prodctions.lasheight", "LasHeightPro", "LasHeightPro", "lasheight (folder)", True),
+        ("dsm_dtm_generation_prodctions.lasheight", "LasHeightProClassify", "LasHeightProClassify",
+         "lasheight - classify (folder)", True),
+        ("dsm_dtm_generation_prodctions.lascanopy", "LasCanopy", "LasCanopy", "lascanopy", True),
+        ("dsm_dtm_generation_prodctions.lascanopy", "LasCanopyPro", "LasCanopyPro", "lascanopy (folder)", True),
+        ("dsm_dtm_generation_prodctions.blast2dem", "Blast2Dem", "Blast2Dem", "blast2dem", True),
+        ("dsm_dtm_generation_prodctions.blast2dem", "Blast2DemPro", "Blast2DemPro", "blast2dem (folder)", True),
+        ("dsm_dtm_generation_prodctions.blast2iso", "Blast2Iso", "Blast2Iso", "blast2iso", True),
+        ("dsm_dtm_generation_prodctions.blast2iso", "Blast2IsoPro", "Blast2IsoPro", "blast2iso (folder)", True),
+    ]),
+    "publishing": ("Publishing", [
+        ("publishing.laspublish", "LasPublish", "LasPublish", "laspublish", True),
+        ("publishing.laspublish", "LasPublishPro", "LasPublishPro", "laspublish (folder)", True),
+    ]),
+    "quality_control_information": ("Quality Control & Information", [
+        ("quality_control_information.lasinfo", "LasInfo", "LasInfo", "lasinfo", False),
+        ("quality_control_information.lasinfo", "LasInfoPro", "LasInfoPro", "lasinfo (folder)", False),
+        ("quality_control_information.lasoverlap", "LasOverlap", "LasOverlap", "lasoverlap", True),
+        ("quality_control_information.lasoverlap", "LasOverlapPro", "LasOverlapPro", "lasoverlap (folder)", True),
+        ("quality_control_information.lascontrol", "LasControl", "LasControl", "lascontrol", True),
+        ("quality_control_information.lasvalidate", "LasValidate", "LasValidate", "lasvalidate", False),
+        ("quality_control_information.lasvalidate", "LasValidatePro", "LasValidatePro", "lasvalidate (folder)", False),
+    ]),
+    "visualization_colorization": ("Visualization & Colorization", [
+        ("visualization_colorization.lasview", "LasView", "LasView", "lasview", True),
+        ("visualization_colorization.lasview", "LasViewPro", "LasViewPro", "lasview (folder)", True),
+        ("visualization_colorization.lascolor", "LasColor", "LasColor", "lascolor", True),
+    ]),
+    "pipelines": ("Pipelines", [
+        ("pipelines.flightlines2chm", "FlightLinesToCHMFirstReturn", "FlightLinesToCHMFirstReturn",
+         "Flightlines to CHM - first return", True),
+        ("pipelines.flightlines2chm", "FlightLinesToCHMHighestReturn", "FlightLinesToCHMHighestReturn",
+         "Flightlines to CHM - highest return", True),
+        ("pipelines.flightlines2chm", "FlightLinesToCHMSpikeFree", "FlightLinesToCHMSpikeFree",
+         "Flightlines to CHM - spike free", True),
+        ("pipelines.flightlines2dtmdsm", "FlightLinesToDTMandDSMFirstReturn", "FlightLinesToDTMandDSMFirstReturn",
+         "FlightLines to DTM & DSM - first return", True),
+        ("pipelines.flightlines2dtmdsm", "FlightLinesToDTMandDSMSpikeFree", "FlightLinesToDTMandDSMSpikeFree",
+         "FlightLines to DTM & DSM - spike free", True),
+        ("pipelines.flightlines2mergedchm", "FlightLinesToMergedCHMFirstReturn", "FlightLinesToMergedCHMFirstReturn",
+         "FlightLines to merged CHM - first return", True),
+        ("pipelines.flightlines2mergedchm", "FlightLinesToMergedCHMHighestReturn",
+         "FlightLinesToMergedCHMHighestReturn", "FlightLines to merged CHM - highest return", True),
+        ("pipelines.flightlines2mergedchm", "FlightLinesToMergedCHMPitFree", "FlightLinesToMergedCHMPitFree",
+         "FlightLines to merged CHM - pit free", True),
+        ("pipelines.flightlines2mergedchm", "FlightLinesToMergedCHMSpikeFree", "FlightLinesToMergedCHMSpikeFree",
+         "FlightLines to merged CHM - spike free", True),
+        ("pipelines.hugefile", "HugeFileClassify", "HugeFileClassify", "Huge file - classify", True),
+        ("pipelines.hugefile", "HugeFileGroundClassify", "HugeFileGroundClassify", "Huge file - ground classify", True),
+        ("pipelines.hugefile", "HugeFileNormalize", "HugeFileNormalize", "Huge file - normalize", True),
+    ]),
+}
@@ -21,11 +21,7 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
-
-from PyQt5.QtGui import QIcon
-
-from ..utils import LastoolsUtils, descript_classification_filtering as descript_info, paths
+from ..utils import LastoolsCommand, descript_classification_filtering as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -40,12 +36,10 @@ class LasClassify(LastoolsAlgorithm):
         self.add_parameters_horizontal_and_vertical_feet_gui()
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasclassify.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasclassify")]
+        commands = LastoolsCommand("lasclassify")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
@@ -54,9 +48,9 @@ class LasClassify(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasClassify()
@@ -85,7 +79,7 @@ class LasClassify(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasClassifyPro(LastoolsAlgorithm):
@@ -102,11 +96,11 @@ class LasClassifyPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasclassify")]
+        commands = LastoolsCommand("lasclassify")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
         self.add_parameters_ignore_class2_commands(parameters, context, commands)
         self.add_parameters_horizontal_and_vertical_feet_commands(parameters, context, commands)
@@ -114,11 +108,10 @@ class LasClassifyPro(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasClassifyPro()
@@ -147,4 +140,4 @@ class LasClassifyPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterBoolean, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_classification_filtering as descript_info, paths
+from ..utils import LastoolsCommand, descript_classification_filtering as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -57,9 +55,10 @@ class LasGround(LastoolsAlgorithm):
         ))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
@@ -77,9 +76,9 @@ class LasGround(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasGround()
@@ -108,7 +107,7 @@ class LasGround(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasGroundPro(LastoolsAlgorithm):
@@ -140,11 +139,11 @@ class LasGroundPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_horizontal_and_vertical_feet_commands(parameters, context, commands)
         if self.parameterAsBool(parameters, LasGroundPro.NO_BULGE, context):
             commands.append("-no_bulge")
@@ -156,16 +155,14 @@ class LasGroundPro(LastoolsAlgorithm):
         granularity = self.parameterAsInt(parameters, LasGroundPro.GRANULARITY, context)
         if granularity != 1:
             commands.append("-" + LasGroundPro.GRANULARITIES[granularity])
-        self.add_parameters_cores_commands(parameters, context, commands)
         self.add_parameters_output_directory_commands(parameters, context, commands)
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasGroundPro()
@@ -194,4 +191,4 @@ class LasGroundPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -20,12 +20,10 @@
 __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_classification_filtering as descript_info, paths
+from ..utils import LastoolsCommand, descript_classification_filtering as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -74,9 +72,10 @@ class LasGroundNew(LastoolsAlgorithm):
         ))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground_new")]
+        commands = LastoolsCommand("lasground_new")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
@@ -101,9 +100,9 @@ class LasGroundNew(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasGroundNew()
@@ -132,7 +131,7 @@ class LasGroundNew(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasGroundProNew(LastoolsAlgorithm):
@@ -184,11 +183,11 @@ class LasGroundProNew(LastoolsAlgorithm):
         self.add_parameters_point_output_format_gui()
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground_new")]
+        commands = LastoolsCommand("lasground_new")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
         self.add_parameters_horizontal_and_vertical_feet_commands(parameters, context, commands)
         method = self.parameterAsInt(parameters, LasGroundProNew.TERRAIN, context)
@@ -212,11 +211,10 @@ class LasGroundProNew(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasGroundProNew()
@@ -245,4 +243,4 @@ class LasGroundProNew(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterBoolean, QgsProcessingParameterNumber, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_classification_filtering as descript_info, paths
+from ..utils import LastoolsCommand, descript_classification_filtering as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -66,9 +64,10 @@ class LasThin(LastoolsAlgorithm):
         ))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
@@ -92,9 +91,9 @@ class LasThin(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasThin()
@@ -123,7 +122,7 @@ class LasThin(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasThinPro(LastoolsAlgorithm):
@@ -166,11 +165,11 @@ class LasThinPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_ignore_class1_commands(parameters, context, commands)
         self.add_parameters_ignore_class2_commands(parameters, context, commands)
         step = self.parameterAsDouble(parameters, LasThinPro.THIN_STEP, context)
@@ -193,11 +192,10 @@ class LasThinPro(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasThinPro()
@@ -226,4 +224,4 @@ class LasThinPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
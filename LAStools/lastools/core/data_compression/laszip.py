@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterBoolean
 
-from ..utils import LastoolsUtils, descript_data_compression as descript_info, paths
+from ..utils import LastoolsCommand, descript_data_compression as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -46,12 +44,10 @@ class LasZip(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterBoolean(LasZip.APPEND_LAX, "append *.lax into *.laz file", False))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "laszip.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "laszip")]
+        commands = LastoolsCommand("laszip")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         if self.parameterAsBool(parameters, LasZip.REPORT_SIZE, context):
@@ -63,9 +59,9 @@ class LasZip(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasZip()
@@ -94,7 +90,7 @@ class LasZip(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasZipPro(LastoolsAlgorithm):
@@ -116,14 +112,11 @@ class LasZipPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "laszip.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "laszip")]
+        commands = LastoolsCommand("laszip")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         if self.parameterAsBool(parameters, LasZipPro.REPORT_SIZE, context):
             commands.append("-size")
         if self.parameterAsBool(parameters, LasZipPro.CREATE_LAX, context):
@@ -134,11 +127,10 @@ class LasZipPro(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasZipPro()
@@ -167,4 +159,4 @@ class LasZipPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
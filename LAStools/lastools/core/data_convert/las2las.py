@@ -21,13 +21,9 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
-
-from PyQt5.QtGui import QIcon
-
 from qgis.core import QgsProcessingParameterEnum, QgsProcessingParameterString, QgsProcessingParameterNumber
 
-from ..utils import LastoolsUtils, descript_data_convert as descript_info, paths
+from ..utils import LastoolsCommand, descript_data_convert as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -43,12 +39,10 @@ class Las2LasFilter(LastoolsAlgorithm):
         self.add_parameters_filter2_coords_intensity_gui()
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las")]
+        commands = LastoolsCommand("las2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_filter1_return_class_flags_commands(parameters, context, commands)
@@ -58,9 +52,9 @@ class Las2LasFilter(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2LasFilter()
@@ -89,7 +83,7 @@ class Las2LasFilter(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las2LasProject(LastoolsAlgorithm):
@@ -156,12 +150,10 @@ class Las2LasProject(LastoolsAlgorithm):
         ))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las")]
+        commands = LastoolsCommand("las2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         source_projection = self.parameterAsInt(parameters, Las2LasProject.SOURCE_PROJECTION, context)
@@ -201,9 +193,9 @@ class Las2LasProject(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2LasProject()
@@ -232,7 +224,7 @@ class Las2LasProject(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las2LasTransform(LastoolsAlgorithm):
@@ -256,12 +248,10 @@ class Las2LasTransform(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterString(Las2LasTransform.OPERATIONARG, "argument for operation"))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las")]
+        commands = LastoolsCommand("las2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_transform1_coordinate_commands(parameters, context, commands)
@@ -276,9 +266,9 @@ class Las2LasTransform(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2LasTransform()
@@ -307,7 +297,7 @@ class Las2LasTransform(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las2LasProFilter(LastoolsAlgorithm):
@@ -320,12 +310,10 @@ class Las2LasProFilter(LastoolsAlgorithm):
         self.add_parameters_filter1_coords_intensity_gui()
         self.add_parameters_filter2_coords_intensity_gui()
         self.add_parameters_point_output_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las")]
+        commands = LastoolsCommand("las2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_filter1_return_class_flags_commands(parameters, context, commands)
@@ -334,9 +322,9 @@ class Las2LasProFilter(LastoolsAlgorithm):
         self.add_parameters_filter2_coords_intensity_commands(parameters, context, commands)
         self.add_parameters_point_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2LasProFilter()
@@ -365,7 +353,7 @@ class Las2LasProFilter(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las2LasProProject(LastoolsAlgorithm):
@@ -448,14 +436,11 @@ class Las2LasProProject(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las")]
+        commands = LastoolsCommand("las2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         source_projection = self.parameterAsInt(parameters, Las2LasProProject.SOURCE_PROJECTION, context)
         if source_projection != 0:
             if source_projection == 1:
@@ -504,11 +489,10 @@ class Las2LasProProject(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2LasProProject()
@@ -537,7 +521,7 @@ class Las2LasProProject(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las2LasProTransform(LastoolsAlgorithm):
@@ -565,14 +549,11 @@ class Las2LasProTransform(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2las")]
+        commands = LastoolsCommand("las2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_transform1_coordinate_commands(parameters, context, commands)
         self.add_parameters_transform2_coordinate_commands(parameters, context, commands)
         self.add_parameters_transform1_other_commands(parameters, context, commands)
@@ -586,11 +567,10 @@ class Las2LasProTransform(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2LasProTransform()
@@ -619,4 +599,4 @@ class Las2LasProTransform(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterBoolean, QgsProcessingParameterNumber
 
-from ..utils import LastoolsUtils, descript_data_convert as descript_info, paths
+from ..utils import LastoolsCommand, descript_data_convert as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -47,9 +45,10 @@ class Las2Shp(LastoolsAlgorithm):
         ))
         self.add_parameters_generic_output_gui("Output SHP file", "shp", True)
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2shp")]
+        commands = LastoolsCommand("las2shp")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         if self.parameterAsBool(parameters, Las2Shp.POINT_Z, context):
@@ -60,9 +59,9 @@ class Las2Shp(LastoolsAlgorithm):
             commands.append(str(record_size))
         self.add_parameters_generic_output_commands(parameters, context, commands, "-o")
         self.add_parameters_additional_commands(parameters, context, commands)
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2Shp()
@@ -91,4 +90,4 @@ class Las2Shp(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterString
 
-from ..utils import LastoolsUtils, descript_data_convert as descript_info, paths
+from ..utils import LastoolsCommand, descript_data_convert as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -40,12 +38,10 @@ class Las2txt(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterString(Las2txt.PARSE, "parse string", "xyz"))
         self.add_parameters_generic_output_gui("Output ASCII file", "txt", False)
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2txt.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2txt")]
+        commands = LastoolsCommand("las2txt")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         parse = self.parameterAsString(parameters, Las2txt.PARSE, context)
@@ -55,9 +51,9 @@ class Las2txt(LastoolsAlgorithm):
         self.add_parameters_generic_output_commands(parameters, context, commands, "-o")
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2txt()
@@ -86,7 +82,7 @@ class Las2txt(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las2txtPro(LastoolsAlgorithm):
@@ -101,14 +97,11 @@ class Las2txtPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2txt.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2txt")]
+        commands = LastoolsCommand("las2txt")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         parse = self.parameterAsString(parameters, Las2txtPro.PARSE, context)
         if parse != "xyz":
             commands.append("-parse")
@@ -117,11 +110,10 @@ class Las2txtPro(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         commands.append("-otxt")
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2txtPro()
@@ -150,4 +142,4 @@ class Las2txtPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
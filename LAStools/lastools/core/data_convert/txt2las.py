@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterString, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_data_convert as descript_info, paths
+from ..utils import LastoolsCommand, descript_data_convert as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -96,12 +94,10 @@ class Txt2Las(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterEnum(Txt2Las.SP, "state plane code", Txt2Las.STATE_PLANES, False, 0))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "txt2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "txt2las")]
+        commands = LastoolsCommand("txt2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_generic_input_commands(parameters, context, commands, "-i")
         parse_string = self.parameterAsString(parameters, Txt2Las.PARSE, context)
@@ -144,9 +140,9 @@ class Txt2Las(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Txt2Las()
@@ -175,7 +171,7 @@ class Txt2Las(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Txt2LasPro(LastoolsAlgorithm):
@@ -253,15 +249,12 @@ class Txt2LasPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "txt2las.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "txt2las")]
+        commands = LastoolsCommand("txt2las")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         # TODO: check the output and use f string
-        self.add_parameters_generic_input_folder_commands(parameters, context, commands)
         parse_string = self.parameterAsString(parameters, Txt2LasPro.PARSE, context)
         if parse_string != "xyz":
             commands.append("-parse")
@@ -303,11 +296,13 @@ class Txt2LasPro(LastoolsAlgorithm):
         self.add_parameters_output_appendix_commands(parameters, context, commands)
         self.add_parameters_point_output_format_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(
+            parameters, context, feedback, commands,
+            LastoolsAlgorithm.INPUT_GENERIC_DIRECTORY, LastoolsAlgorithm.INPUT_GENERIC_WILDCARDS
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Txt2LasPro()
@@ -336,4 +331,4 @@ class Txt2LasPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
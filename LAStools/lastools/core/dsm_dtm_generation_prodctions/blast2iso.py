@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber
 
-from ..utils import LastoolsUtils, descript_dsm_dtm_generation_production as descript_info, paths
+from ..utils import LastoolsCommand, descript_dsm_dtm_generation_production as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -66,9 +64,10 @@ class Blast2Iso(LastoolsAlgorithm):
         ))
         self.add_parameters_vector_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "blast2iso")]
+        commands = LastoolsCommand("blast2iso")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         smooth = self.parameterAsInt(parameters, Blast2Iso.SMOOTH, context)
@@ -92,9 +91,9 @@ class Blast2Iso(LastoolsAlgorithm):
         self.add_parameters_vector_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": None}
+        return self.add_statistics_results(feedback, {"commands": None})
 
     def createInstance(self):
         return Blast2Iso()
@@ -123,7 +122,7 @@ class Blast2Iso(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Blast2IsoPro(LastoolsAlgorithm):
@@ -163,11 +162,11 @@ class Blast2IsoPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "blast2iso")]
+        commands = LastoolsCommand("blast2iso")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_point_input_merged_commands(parameters, context, commands)
         smooth = self.parameterAsInt(parameters, Blast2IsoPro.SMOOTH, context)
         if smooth != 0:
@@ -192,11 +191,10 @@ class Blast2IsoPro(LastoolsAlgorithm):
         self.add_parameters_vector_output_format_commands(parameters, context, commands)
         self.add_parameters_vector_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Blast2IsoPro()
@@ -225,4 +223,4 @@ class Blast2IsoPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber
 
-from ..utils import LastoolsUtils, descript_dsm_dtm_generation_production as descript_info, paths
+from ..utils import LastoolsCommand, descript_dsm_dtm_generation_production as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -62,9 +60,10 @@ class Las2Iso(LastoolsAlgorithm):
         ))
         self.add_parameters_vector_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2iso")]
+        commands = LastoolsCommand("las2iso")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         smooth = self.parameterAsInt(parameters, Las2Iso.SMOOTH, context)
@@ -88,9 +87,9 @@ class Las2Iso(LastoolsAlgorithm):
         self.add_parameters_vector_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return Las2Iso()
@@ -119,4 +118,4 @@ class Las2Iso(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,8 +21,7 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
-from lastools.core.utils.utils import LastoolsUtils
+from ..utils import LastoolsCommand
 from lastools.core.algo.lastools_algorithm import LastoolsAlgorithm
 
 
@@ -34,18 +33,19 @@ class las2tin(LastoolsAlgorithm):
         self.add_parameters_filter1_return_class_flags_gui()
         self.add_parameters_vector_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2tin")]
+        commands = LastoolsCommand("las2tin")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_filter1_return_class_flags_commands(parameters, context, commands)
         self.add_parameters_vector_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def name(self):
         return 'las2tin'
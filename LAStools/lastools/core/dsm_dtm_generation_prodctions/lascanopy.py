@@ -21,15 +21,13 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import (
     QgsProcessingParameterBoolean, QgsProcessingParameterEnum, QgsProcessingParameterNumber,
     QgsProcessingParameterString
 )
 
-from ..utils import LastoolsUtils, descript_dsm_dtm_generation_production as descript_info, paths
+from ..utils import LastoolsCommand, descript_dsm_dtm_generation_production as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -82,10 +80,12 @@ class LasCanopy(LastoolsAlgorithm):
         ))
         self.addParameter(QgsProcessingParameterBoolean(LasCanopy.FILES_ARE_PLOTS, "input file is single plot", False))
         self.add_parameters_raster_output_gui()
+        self.add_parameters_cog_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lascanopy")]
+        commands = LastoolsCommand("lascanopy")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         plot_size = self.parameterAsDouble(parameters, LasCanopy.PLOT_SIZE, context)
@@ -140,9 +140,11 @@ class LasCanopy(LastoolsAlgorithm):
         self.add_parameters_raster_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        state = self.get_raster_products_state(parameters, context, commands)
+        self.run_lastools(commands, feedback)
+        self.convert_raster_products_to_cog(parameters, context, feedback, commands, state)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasCanopy()
@@ -171,7 +173,7 @@ class LasCanopy(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasCanopyPro(LastoolsAlgorithm):
@@ -230,15 +232,16 @@ class LasCanopyPro(LastoolsAlgorithm):
         self.add_parameters_output_directory_gui()
         self.add_parameters_output_appendix_gui()
         self.add_parameters_raster_output_format_gui()
+        self.add_parameters_cog_gui()
         self.add_parameters_raster_output_gui()
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lascanopy")]
+        commands = LastoolsCommand("lascanopy")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_point_input_merged_commands(parameters, context, commands)
         plot_size = self.parameterAsDouble(parameters, LasCanopyPro.PLOT_SIZE, context)
         if plot_size != 20.0:
@@ -294,11 +297,12 @@ class LasCanopyPro(LastoolsAlgorithm):
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
         self.add_parameters_raster_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        state = self.get_raster_products_state(parameters, context, commands)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
+        self.convert_raster_products_to_cog(parameters, context, feedback, commands, state)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def createInstance(self):
         return LasCanopyPro()
@@ -327,4 +331,4 @@ class LasCanopyPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
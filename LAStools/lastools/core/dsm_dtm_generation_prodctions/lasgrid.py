@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterEnum, QgsProcessingParameterBoolean
 
-from ..utils import LastoolsUtils, descript_dsm_dtm_generation_production as descript_info, paths
+from ..utils import LastoolsCommand, descript_dsm_dtm_generation_production as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -49,10 +47,12 @@ class LasGrid(LastoolsAlgorithm):
             LasGrid.USE_TILE_BB, "use tile bounding box (after tiling with buffer)", False
         ))
         self.add_parameters_raster_output_gui()
+        self.add_parameters_cog_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasgrid")]
+        commands = LastoolsCommand("lasgrid")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_filter1_return_class_flags_commands(parameters, context, commands)
@@ -68,9 +68,11 @@ class LasGrid(LastoolsAlgorithm):
         self.add_parameters_raster_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        state = self.get_raster_products_state(parameters, context, commands)
+        self.run_lastools(commands, feedback)
+        self.convert_raster_products_to_cog(parameters, context, feedback, commands, state)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def createInstance(self):
         return LasGrid()
@@ -99,7 +101,7 @@ class LasGrid(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasGridPro(LastoolsAlgorithm):
@@ -125,15 +127,16 @@ class LasGridPro(LastoolsAlgorithm):
         self.add_parameters_output_directory_gui()
         self.add_parameters_output_appendix_gui()
         self.add_parameters_raster_output_format_gui()
+        self.add_parameters_cog_gui()
         self.add_parameters_raster_output_gui()
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasgrid")]
+        commands = LastoolsCommand("lasgrid")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_point_input_merged_commands(parameters, context, commands)
         self.add_parameters_filter1_return_class_flags_commands(parameters, context, commands)
         self.add_parameters_step_commands(parameters, context, commands)
@@ -150,11 +153,12 @@ class LasGridPro(LastoolsAlgorithm):
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
         self.add_parameters_raster_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        state = self.get_raster_products_state(parameters, context, commands)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
+        self.convert_raster_products_to_cog(parameters, context, feedback, commands, state)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasGridPro()
@@ -183,4 +187,4 @@ class LasGridPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterEnum, QgsProcessingParameterString
 
-from ..utils import LastoolsUtils, descript_pipelines as descript_info, paths
+from ..utils import LastoolsCommand, LastoolsPipeline, descript_pipelines as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -41,13 +39,14 @@ class FlightLinesToCHMFirstReturn(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToCHMFirstReturn.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToCHMFirstReturn.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToCHMFirstReturn.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToCHMFirstReturn.TERRAIN, "terrain type", FlightLinesToCHMFirstReturn.TERRAINS, False, 2))
         self.add_parameters_step_gui()
@@ -60,15 +59,16 @@ class FlightLinesToCHMFirstReturn(LastoolsAlgorithm):
         self.add_parameters_raster_output_format_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToCHMFirstReturn.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToCHMFirstReturn.BUFFER, context)
@@ -79,17 +79,24 @@ class FlightLinesToCHMFirstReturn(LastoolsAlgorithm):
         base_name = self.parameterAsString(parameters, FlightLinesToCHMFirstReturn.BASE_NAME, context)
         if base_name == "":
             base_name = "tile"
-        commands.append("-o")
-        commands.append(base_name)
+        commands.add_output("-o", base_name)
         commands.append("-olaz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), base_name,
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToCHMFirstReturn.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToCHMFirstReturn.TERRAINS[method])
@@ -103,31 +110,23 @@ class FlightLinesToCHMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, base_name + "*_g.laz"
-        )
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we rasterize the normalized tiles into CHMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, base_name + "*_gh.laz"
-        )
         self.add_parameters_step_commands(parameters, context, commands)
         commands.append("-use_tile_bb")
         self.add_parameters_output_directory_commands(parameters, context, commands)
@@ -136,11 +135,12 @@ class FlightLinesToCHMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm_fr")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_chm_fr")
 
-        return {"commands": commands}
+        pipeline.run()
+
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToCHMFirstReturn()
@@ -169,7 +169,7 @@ class FlightLinesToCHMFirstReturn(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
@@ -184,13 +184,14 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToCHMHighestReturn.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToCHMHighestReturn.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToCHMHighestReturn.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToCHMHighestReturn.TERRAIN, "terrain type", FlightLinesToCHMHighestReturn.TERRAINS, False, 2
         ))
@@ -208,15 +209,16 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
         self.add_parameters_raster_output_format_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToCHMHighestReturn.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToCHMHighestReturn.BUFFER, context)
@@ -227,17 +229,24 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
         base_name = self.parameterAsString(parameters, FlightLinesToCHMHighestReturn.BASE_NAME, context)
         if base_name == "":
             base_name = "tile"
-        commands.append("-o")
-        commands.append(base_name)
+        commands.add_output("-o", base_name)
         commands.append("-olaz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), base_name,
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToCHMHighestReturn.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToCHMHighestReturn.TERRAINS[method])
@@ -251,29 +260,23 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_g.laz")
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we thin and splat the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_gh.laz")
         beam_width = self.parameterAsDouble(parameters, FlightLinesToCHMHighestReturn.BEAM_WIDTH, context)
         if beam_width != 0.0:
             commands.append("-subcircle")
@@ -286,15 +289,12 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("t")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_ght")
 
         # then we rasterize the normalized tiles into CHMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_ght.laz")
         self.add_parameters_step_commands(parameters, context, commands)
         commands.append("-use_tile_bb")
         self.add_parameters_output_directory_commands(parameters, context, commands)
@@ -303,11 +303,12 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm_hr")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm_hr")
 
-        return {"commands": commands}
+        pipeline.run()
+
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToCHMHighestReturn()
@@ -336,7 +337,7 @@ class FlightLinesToCHMHighestReturn(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
@@ -352,13 +353,14 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToCHMSpikeFree.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToCHMSpikeFree.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToCHMSpikeFree.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToCHMSpikeFree.TERRAIN, "terrain type", FlightLinesToCHMSpikeFree.TERRAINS, False, 2
         ))
@@ -379,6 +381,7 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
         self.add_parameters_raster_output_format_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -388,11 +391,11 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
 
         # first we tile the data
 
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToCHMSpikeFree.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToCHMSpikeFree.BUFFER, context)
@@ -403,18 +406,24 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
         base_name = self.parameterAsString(parameters, FlightLinesToCHMSpikeFree.BASE_NAME, context)
         if base_name == "":
             base_name = "tile"
-        commands.append("-o")
-        commands.append(base_name)
+        commands.add_output("-o", base_name)
         commands.append("-olaz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), base_name,
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, base_name + "*.laz"
-        )
         method = self.parameterAsInt(parameters, FlightLinesToCHMSpikeFree.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToCHMSpikeFree.TERRAINS[method])
@@ -428,31 +437,24 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
 
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, base_name + "*_g.laz"
-        )
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we thin and splat the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_gh.laz")
         beam_width = self.parameterAsDouble(parameters, FlightLinesToCHMSpikeFree.BEAM_WIDTH, context)
         if beam_width != 0.0:
             commands.append("-subcircle")
@@ -464,16 +466,13 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("t")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_ght")
 
         # then we rasterize the normalized tiles into CHMs
 
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_ght.laz")
         self.add_parameters_step_commands(parameters, context, commands)
         freeze_value = self.parameterAsDouble(parameters, FlightLinesToCHMSpikeFree.FREEZE_VALUE, context)
         commands.append("-spike_free")
@@ -488,11 +487,12 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm_sf")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm_sf")
+
+        pipeline.run()
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToCHMSpikeFree()
@@ -521,4 +521,4 @@ class FlightLinesToCHMSpikeFree(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
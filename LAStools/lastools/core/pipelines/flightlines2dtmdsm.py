@@ -21,12 +21,12 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
+
 import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterEnum, QgsProcessingParameterString
 
-from ..utils import LastoolsUtils, descript_pipelines as descript_info, paths
+from ..utils import LastoolsCommand, LastoolsPipeline, descript_pipelines as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -41,13 +41,14 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToDTMandDSMFirstReturn.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToDTMandDSMFirstReturn.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToDTMandDSMFirstReturn.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToDTMandDSMFirstReturn.TERRAIN, "terrain type",
             FlightLinesToDTMandDSMFirstReturn.TERRAINS, False, 2
@@ -60,8 +61,10 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
             "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"
         ))
         self.add_parameters_raster_output_format_gui()
+        self.add_parameters_mosaic_gui("VRT mosaics of the DTM and DSM tiles (<base name>_dtm.vrt and _dsm.vrt)")
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -71,11 +74,11 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
 
         # first we tile the data
 
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToDTMandDSMFirstReturn.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToDTMandDSMFirstReturn.BUFFER, context)
@@ -86,17 +89,24 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
         base_name = self.parameterAsString(parameters, FlightLinesToDTMandDSMFirstReturn.BASE_NAME, context)
         if base_name == "":
             base_name = "tile"
-        commands.append("-o")
-        commands.append(base_name)
+        commands.add_output("-o", base_name)
         commands.append("-olaz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), base_name,
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToDTMandDSMFirstReturn.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToDTMandDSMFirstReturn.TERRAINS[method])
@@ -110,15 +120,12 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we rasterize the classified tiles into DTMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_g.laz")
         commands.append("-keep_class")
         commands.append("2")
         commands.append("-thin_with_grid")
@@ -131,15 +138,12 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dtm")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_dtm")
 
         # then we rasterize the classified tiles into first return DSMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_g.laz")
         commands.append("-first_only")
         commands.append("-thin_with_grid")
         commands.append(str(step / 2))
@@ -151,11 +155,22 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dsm")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_dsm")
+
+        pipeline.run(merged=self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context))
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
+
+        # then we reference the DTM and DSM tiles from a VRT each, next to them
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context):
+            output_directory = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_DIRECTORY, context)
+            if output_directory == "":
+                output_directory = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_DIRECTORY, context)
+            pipeline.run_mosaic(os.path.join(output_directory, base_name + "_dtm.vrt"), ["_dtm"])
+            pipeline.run_mosaic(os.path.join(output_directory, base_name + "_dsm.vrt"), ["_dsm"])
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToDTMandDSMFirstReturn()
@@ -184,7 +199,7 @@ class FlightLinesToDTMandDSMFirstReturn(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
@@ -199,13 +214,14 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToDTMandDSMSpikeFree.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToDTMandDSMSpikeFree.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToDTMandDSMSpikeFree.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToDTMandDSMSpikeFree.TERRAIN, "terrain type",
             FlightLinesToDTMandDSMSpikeFree.TERRAINS, False, 2
@@ -222,8 +238,10 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
             "tile base name (using 'sydney' creates sydney_274000_4714000...)", "tile"
         ))
         self.add_parameters_raster_output_format_gui()
+        self.add_parameters_mosaic_gui("VRT mosaics of the DTM and DSM tiles (<base name>_dtm.vrt and _dsm.vrt)")
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -231,11 +249,11 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
         step = self.get_parameters_step_value(parameters, context)
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToDTMandDSMSpikeFree.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToDTMandDSMSpikeFree.BUFFER, context)
@@ -246,17 +264,24 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
         base_name = self.parameterAsString(parameters, FlightLinesToDTMandDSMSpikeFree.BASE_NAME, context)
         if base_name == "":
             base_name = "tile"
-        commands.append("-o")
-        commands.append(base_name)
+        commands.add_output("-o", base_name)
         commands.append("-olaz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), base_name,
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToDTMandDSMSpikeFree.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToDTMandDSMSpikeFree.TERRAINS[method])
@@ -270,15 +295,12 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we rasterize the classified tiles into DTMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands,
-                                                                        base_name + "*_g.laz")
         commands.append("-keep_class")
         commands.append("2")
         commands.append("-thin_with_grid")
@@ -291,16 +313,12 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dtm")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_dtm")
 
         # then we rasterize the classified tiles into spike-free DSMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, base_name + "*_g.laz"
-        )
         self.add_parameters_step_commands(parameters, context, commands)
         freeze_value = self.parameterAsDouble(parameters, FlightLinesToDTMandDSMSpikeFree.FREEZE_VALUE, context)
         commands.append("-spike_free")
@@ -315,11 +333,22 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dsm")
         self.add_parameters_raster_output_format_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_dsm")
+
+        pipeline.run(merged=self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context))
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
+
+        # then we reference the DTM and DSM tiles from a VRT each, next to them
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context):
+            output_directory = self.parameterAsString(parameters, LastoolsAlgorithm.OUTPUT_DIRECTORY, context)
+            if output_directory == "":
+                output_directory = self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_DIRECTORY, context)
+            pipeline.run_mosaic(os.path.join(output_directory, base_name + "_dtm.vrt"), ["_dtm"])
+            pipeline.run_mosaic(os.path.join(output_directory, base_name + "_dsm.vrt"), ["_dsm"])
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToDTMandDSMSpikeFree()
@@ -348,4 +377,4 @@ class FlightLinesToDTMandDSMSpikeFree(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
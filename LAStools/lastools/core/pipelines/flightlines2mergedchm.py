@@ -21,12 +21,12 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
+
 import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_pipelines as descript_info, paths
+from ..utils import LastoolsCommand, LastoolsPipeline, descript_pipelines as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -40,13 +40,14 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToMergedCHMFirstReturn.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToMergedCHMFirstReturn.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToMergedCHMFirstReturn.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToMergedCHMFirstReturn.TERRAIN, "terrain type",
             FlightLinesToMergedCHMFirstReturn.TERRAINS, False, 2
@@ -54,8 +55,10 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
         self.add_parameters_step_gui()
         self.add_parameters_temporary_directory_gui()
         self.add_parameters_raster_output_gui()
+        self.add_parameters_mosaic_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -63,11 +66,11 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
         step = self.get_parameters_step_value(parameters, context)
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToMergedCHMFirstReturn.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToMergedCHMFirstReturn.BUFFER, context)
@@ -75,15 +78,23 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
             commands.append("-buffer")
             commands.append(str(buffer))
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("tile.laz")
+        commands.add_output("-o", "tile.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "tile",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToMergedCHMFirstReturn.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToMergedCHMFirstReturn.TERRAINS[method])
@@ -97,31 +108,23 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_g.laz"
-        )
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_gh.laz"
-        )
         commands.append("-keep_class")
         commands.append("2")
         commands.append("-thin_with_grid")
@@ -133,16 +136,12 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dtm")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_dtm")
 
         # then we rasterize the normalized tiles into first-return CHMs (with kill)
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_gh.laz"
-        )
         commands.append("-keep_first")
         self.add_parameters_step_commands(parameters, context, commands)
         commands.append("-kill")
@@ -154,12 +153,22 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm_fr")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_chm_fr")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
+
+        # either as a VRT referencing the rasters of the tiles, which needs no pass over all cells
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context):
+            output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+            if pipeline.run_mosaic(output, pipeline.leaves()) == 0:
+                self.set_output_file(LastoolsAlgorithm.OUTPUT_RASTER, os.path.splitext(output)[0] + ".vrt")
+            return self.add_statistics_results(feedback, {"commands": commands})
 
         # then we combine the zero-level DTMs and the first-return CHMs into a single output CHM
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasgrid")]
+        commands = LastoolsCommand("lasgrid")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(
             parameters, context, commands, "tile_*.bil"
@@ -169,9 +178,12 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
         commands.append("-highest")
         self.add_parameters_raster_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "tile_*.bil",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToMergedCHMFirstReturn()
@@ -200,7 +212,7 @@ class FlightLinesToMergedCHMFirstReturn(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
@@ -214,13 +226,14 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
     def initAlgorithm(self, config):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToMergedCHMHighestReturn.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToMergedCHMHighestReturn.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToMergedCHMHighestReturn.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToMergedCHMHighestReturn.TERRAIN, "terrain type",
             FlightLinesToMergedCHMHighestReturn.TERRAINS, False, 2
@@ -232,8 +245,10 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         self.add_parameters_step_gui()
         self.add_parameters_temporary_directory_gui()
         self.add_parameters_raster_output_gui()
+        self.add_parameters_mosaic_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -241,11 +256,11 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         step = self.get_parameters_step_value(parameters, context)
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToMergedCHMHighestReturn.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToMergedCHMHighestReturn.BUFFER, context)
@@ -253,15 +268,23 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
             commands.append("-buffer")
             commands.append(str(buffer))
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("tile.laz")
+        commands.add_output("-o", "tile.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "tile",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToMergedCHMHighestReturn.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToMergedCHMHighestReturn.TERRAINS[method])
@@ -275,31 +298,23 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_g.laz"
-        )
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we thin and splat the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_gh.laz"
-        )
         beam_width = self.parameterAsDouble(parameters, FlightLinesToMergedCHMHighestReturn.BEAM_WIDTH, context)
         if beam_width != 0.0:
             commands.append("-subcircle")
@@ -311,16 +326,12 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("t")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_ght")
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_gh.laz"
-        )
         commands.append("-keep_class")
         commands.append("2")
         commands.append("-thin_with_grid")
@@ -332,16 +343,12 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dtm")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_dtm")
 
         # then we rasterize the normalized tiles into highest-return CHMs (with kill)
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         self.add_parameters_step_commands(parameters, context, commands)
         commands.append("-kill")
         commands.append(str(step * 3))
@@ -352,12 +359,22 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm_hr")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm_hr")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
+
+        # either as a VRT referencing the rasters of the tiles, which needs no pass over all cells
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context):
+            output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+            if pipeline.run_mosaic(output, pipeline.leaves()) == 0:
+                self.set_output_file(LastoolsAlgorithm.OUTPUT_RASTER, os.path.splitext(output)[0] + ".vrt")
+            return self.add_statistics_results(feedback, {"commands": commands})
 
         # then we combine the zero-level DTMs and the highest-return CHMs into a single output CHM
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasgrid")]
+        commands = LastoolsCommand("lasgrid")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(
             parameters, context, commands, "tile_*.bil"
@@ -367,9 +384,12 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
         commands.append("-highest")
         self.add_parameters_raster_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "tile_*.bil",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToMergedCHMHighestReturn()
@@ -398,7 +418,7 @@ class FlightLinesToMergedCHMHighestReturn(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
@@ -412,13 +432,14 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToMergedCHMPitFree.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToMergedCHMPitFree.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToMergedCHMPitFree.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToMergedCHMPitFree.TERRAIN, "terrain type", FlightLinesToMergedCHMPitFree.TERRAINS, False, 2
         ))
@@ -429,8 +450,10 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         self.add_parameters_step_gui()
         self.add_parameters_temporary_directory_gui()
         self.add_parameters_raster_output_gui()
+        self.add_parameters_mosaic_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -438,11 +461,11 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         step = self.get_parameters_step_value(parameters, context)
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToMergedCHMPitFree.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToMergedCHMPitFree.BUFFER, context)
@@ -450,15 +473,23 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
             commands.append("-buffer")
             commands.append(str(buffer))
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("tile.laz")
+        commands.add_output("-o", "tile.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "tile",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToMergedCHMPitFree.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToMergedCHMPitFree.TERRAINS[method])
@@ -472,31 +503,23 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_g.laz"
-        )
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we thin and splat the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_gh.laz"
-        )
         beam_width = self.parameterAsDouble(parameters, FlightLinesToMergedCHMPitFree.BEAM_WIDTH, context)
         if beam_width != 0.0:
             commands.append("-subcircle")
@@ -508,16 +531,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("t")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_ght")
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_gh.laz"
-        )
         commands.append("-keep_class")
         commands.append("2")
         commands.append("-thin_with_grid")
@@ -529,16 +548,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dtm")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_dtm")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 00
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         self.add_parameters_step_commands(parameters, context, commands)
         commands.append("-kill")
         commands.append(str(step * 3))
@@ -549,14 +564,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm00")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm00")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 02
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*_ght.laz")
         commands.append("-drop_z_below")
         commands.append("2.0")
         self.add_parameters_step_commands(parameters, context, commands)
@@ -569,16 +582,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm02")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm02")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 05
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         commands.append("-drop_z_below")
         commands.append("5.0")
         self.add_parameters_step_commands(parameters, context, commands)
@@ -591,17 +600,13 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm05")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm05")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 10
 
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         commands.append("-drop_z_below")
         commands.append("10.0")
         self.add_parameters_step_commands(parameters, context, commands)
@@ -614,17 +619,13 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm10")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm10")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 15
 
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         commands.append("-drop_z_below")
         commands.append("15.0")
         self.add_parameters_step_commands(parameters, context, commands)
@@ -637,16 +638,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm15")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm15")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 20
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         commands.append("-drop_z_below")
         commands.append("20.0")
         self.add_parameters_step_commands(parameters, context, commands)
@@ -659,16 +656,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm20")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm20")
 
         # then we rasterize the normalized tiles into the partial CHMs at level 25
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "tile*_ght.laz"
-        )
         commands.append("-drop_z_below")
         commands.append("25.0")
         self.add_parameters_step_commands(parameters, context, commands)
@@ -681,12 +674,22 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm25")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm25")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
+
+        # either as a VRT referencing the rasters of the tiles, which needs no pass over all cells
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context):
+            output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+            if pipeline.run_mosaic(output, pipeline.leaves()) == 0:
+                self.set_output_file(LastoolsAlgorithm.OUTPUT_RASTER, os.path.splitext(output)[0] + ".vrt")
+            return self.add_statistics_results(feedback, {"commands": commands})
 
         # then we combine the partial CHMs into a single output CHM
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasgrid")]
+        commands = LastoolsCommand("lasgrid")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(
             parameters, context, commands, "tile_*.bil"
@@ -696,9 +699,12 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
         commands.append("-highest")
         self.add_parameters_raster_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "tile_*.bil",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToMergedCHMPitFree()
@@ -727,7 +733,7 @@ class FlightLinesToMergedCHMPitFree(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
@@ -742,13 +748,14 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_folder_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            FlightLinesToMergedCHMSpikeFree.TILE_SIZE, "tile size (side length of square tile)",
+            FlightLinesToMergedCHMSpikeFree.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
             FlightLinesToMergedCHMSpikeFree.BUFFER, "buffer around tiles (avoids edge artifacts)",
             QgsProcessingParameterNumber.Double, 25.0, False, 0.0
         ))
+        self.add_parameters_adaptive_tiling_gui()
         self.addParameter(QgsProcessingParameterEnum(
             FlightLinesToMergedCHMSpikeFree.TERRAIN, "terrain type",
             FlightLinesToMergedCHMSpikeFree.TERRAINS, False, 2
@@ -764,8 +771,10 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         self.add_parameters_step_gui()
         self.add_parameters_temporary_directory_gui()
         self.add_parameters_raster_output_gui()
+        self.add_parameters_mosaic_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
@@ -773,11 +782,11 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         step = self.get_parameters_step_value(parameters, context)
 
         # first we tile the data
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         commands.append("-files_are_flightlines")
-        tile_size = self.parameterAsDouble(parameters, FlightLinesToMergedCHMSpikeFree.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, FlightLinesToMergedCHMSpikeFree.BUFFER, context)
@@ -785,15 +794,23 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
             commands.append("-buffer")
             commands.append(str(buffer))
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("tile.laz")
+        commands.add_output("-o", "tile.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "tile",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(
+            commands, self.get_parameters_point_input_folder_files(parameters, context),
+            self.parameterAsBool(parameters, LastoolsAlgorithm.ADAPTIVE, context)
+        )
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*.laz")
         method = self.parameterAsInt(parameters, FlightLinesToMergedCHMSpikeFree.TERRAIN, context)
         if method != 2:
             commands.append("-" + FlightLinesToMergedCHMSpikeFree.TERRAINS[method])
@@ -807,27 +824,23 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*_g.laz")
         commands.append("-replace_z")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we thin and splat the tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasthin")]
+        commands = LastoolsCommand("lasthin")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*_gh.laz")
         beam_width = self.parameterAsDouble(parameters, FlightLinesToMergedCHMSpikeFree.BEAM_WIDTH, context)
         if beam_width != 0.0:
             commands.append("-subcircle")
@@ -839,14 +852,12 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("t")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_ght")
 
         # then we rasterize the height-normalized tiles into trivial zero-level DTMs
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*_gh.laz")
         commands.append("-keep_class")
         commands.append("2")
         commands.append("-thin_with_grid")
@@ -858,14 +869,12 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_dtm")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_dtm")
 
         # then we rasterize the normalized tiles into spike-free CHMs (with kill)
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las2dem")]
+        commands = LastoolsCommand("las2dem")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile*_ght.laz")
         self.add_parameters_step_commands(parameters, context, commands)
         freeze_value = self.parameterAsDouble(parameters, FlightLinesToMergedCHMSpikeFree.FREEZE_VALUE, context)
         commands.append("-spike_free")
@@ -882,12 +891,22 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_chm_sf")
         commands.append("-obil")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_ght", "_chm_sf")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
+
+        # either as a VRT referencing the rasters of the tiles, which needs no pass over all cells
+        if self.parameterAsBool(parameters, LastoolsAlgorithm.MOSAIC, context):
+            output = self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+            if pipeline.run_mosaic(output, pipeline.leaves()) == 0:
+                self.set_output_file(LastoolsAlgorithm.OUTPUT_RASTER, os.path.splitext(output)[0] + ".vrt")
+            return self.add_statistics_results(feedback, {"commands": commands})
 
         # then we combine the zero-level DTMs and the spike-free CHMs into a single output CHM
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasgrid")]
+        commands = LastoolsCommand("lasgrid")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(parameters, context, commands, "tile_*.bil")
         commands.append("-merged")
@@ -895,9 +914,12 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
         commands.append("-highest")
         self.add_parameters_raster_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "tile_*.bil",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_RASTER)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return FlightLinesToMergedCHMSpikeFree()
@@ -926,4 +948,4 @@ class FlightLinesToMergedCHMSpikeFree(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterBoolean, QgsProcessingParameterNumber, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_pipelines as descript_info, paths
+from ..utils import LastoolsCommand, LastoolsPipeline, descript_pipelines as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -43,7 +41,7 @@ class HugeFileClassify(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            HugeFileClassify.TILE_SIZE, "tile size (side length of square tile)",
+            HugeFileClassify.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
@@ -62,14 +60,15 @@ class HugeFileClassify(LastoolsAlgorithm):
         self.add_parameters_point_output_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
         # first we tile the data with option '-reversible'
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
-        tile_size = self.parameterAsDouble(parameters, HugeFileClassify.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, HugeFileClassify.BUFFER, context)
@@ -78,17 +77,20 @@ class HugeFileClassify(LastoolsAlgorithm):
             commands.append(str(buffer))
         commands.append("-reversible")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("hugeFileClassify.laz")
+        commands.add_output("-o", "hugeFileClassify.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "hugeFileClassify",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(commands, [self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_LASLAZ, context)])
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the reversible tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "hugeFileClassify*.laz"
-        )
         airborne = self.parameterAsBool(parameters, HugeFileClassify.AIRBORNE, context)
         if not airborne:
             commands.append("-not_airborne")
@@ -102,40 +104,35 @@ class HugeFileClassify(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we compute the height for each points in the reversible tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "hugeFileClassify*_g.laz"
-        )
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
 
         # then we classify buildings and trees in the reversible tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasclassify")]
+        commands = LastoolsCommand("lasclassify")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "hugeFileClassify*_gh.laz"
-        )
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-odix")
         commands.append("c")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_gh", "_ghc")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we reverse the tiling
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(
             parameters, context, commands, "hugeFileClassify*_ghc.laz"
@@ -143,9 +140,12 @@ class HugeFileClassify(LastoolsAlgorithm):
         commands.append("-reverse_tiling")
         self.add_parameters_point_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "hugeFileClassify*_ghc.laz",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_LASLAZ)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return HugeFileClassify()
@@ -174,7 +174,7 @@ class HugeFileClassify(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class HugeFileGroundClassify(LastoolsAlgorithm):
@@ -190,7 +190,7 @@ class HugeFileGroundClassify(LastoolsAlgorithm):
     def initAlgorithm(self, config=None):
         self.add_parameters_point_input_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            HugeFileGroundClassify.TILE_SIZE, "tile size (side length of square tile)",
+            HugeFileGroundClassify.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
@@ -212,14 +212,15 @@ class HugeFileGroundClassify(LastoolsAlgorithm):
         self.add_parameters_point_output_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
         # first we tile the data with option '-reversible'
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
-        tile_size = self.parameterAsDouble(parameters, HugeFileGroundClassify.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, HugeFileGroundClassify.BUFFER, context)
@@ -228,17 +229,20 @@ class HugeFileGroundClassify(LastoolsAlgorithm):
             commands.append(str(buffer))
         commands.append("-reversible")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("hugeFileGroundClassify.laz")
+        commands.add_output("-o", "hugeFileGroundClassify.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "hugeFileGroundClassify",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(commands, [self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_LASLAZ, context)])
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the reversible tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "hugeFileGroundClassify*.laz"
-        )
         airborne = self.parameterAsBool(parameters, HugeFileGroundClassify.AIRBORNE, context)
         if not airborne:
             commands.append("-not_airborne")
@@ -252,12 +256,15 @@ class HugeFileGroundClassify(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we reverse the tiling
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(
             parameters, context, commands, "hugeFileGroundClassify*_g.laz"
@@ -265,9 +272,12 @@ class HugeFileGroundClassify(LastoolsAlgorithm):
         commands.append("-reverse_tiling")
         self.add_parameters_point_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "hugeFileGroundClassify*_g.laz",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_LASLAZ)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return HugeFileGroundClassify()
@@ -296,7 +306,7 @@ class HugeFileGroundClassify(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class HugeFileNormalize(LastoolsAlgorithm):
@@ -312,7 +322,7 @@ class HugeFileNormalize(LastoolsAlgorithm):
     def initAlgorithm(self, config):
         self.add_parameters_point_input_gui()
         self.addParameter(QgsProcessingParameterNumber(
-            HugeFileNormalize.TILE_SIZE, "tile size (side length of square tile)",
+            HugeFileNormalize.TILE_SIZE, "tile size (side length of square tile, 0 for auto)",
             QgsProcessingParameterNumber.Double, 1000.0, False, 0.0
         ))
         self.addParameter(QgsProcessingParameterNumber(
@@ -331,14 +341,15 @@ class HugeFileNormalize(LastoolsAlgorithm):
         self.add_parameters_point_output_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
 
         # first we tile the data with option '-reversible'
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
-        tile_size = self.parameterAsDouble(parameters, HugeFileNormalize.TILE_SIZE, context)
+        tile_size = self.get_parameters_tile_size_value(parameters, context, feedback)
         commands.append("-tile_size")
         commands.append(str(tile_size))
         buffer = self.parameterAsDouble(parameters, HugeFileNormalize.BUFFER, context)
@@ -347,17 +358,20 @@ class HugeFileNormalize(LastoolsAlgorithm):
             commands.append(str(buffer))
         commands.append("-reversible")
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
-        commands.append("-o")
-        commands.append("hugeFileNormalize.laz")
+        commands.add_output("-o", "hugeFileNormalize.laz")
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        # every stage is checkpointed in the temporary directory, the per-tile stages run as soon as their input exists
+        pipeline = LastoolsPipeline(
+            self.get_parameters_temporary_directory_value(parameters, context), "hugeFileNormalize",
+            self.parameterAsInt(parameters, LastoolsAlgorithm.CORES, context), feedback, self.plan
+        )
+        pipeline.run_tiling(commands, [self.parameterAsString(parameters, LastoolsAlgorithm.INPUT_LASLAZ, context)])
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we ground classify the reversible tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasground")]
+        commands = LastoolsCommand("lasground")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "hugeFileNormalize*.laz"
-        )
         airborne = self.parameterAsBool(parameters, HugeFileNormalize.AIRBORNE, context)
         if not airborne:
             commands.append("-not_airborne")
@@ -371,27 +385,26 @@ class HugeFileNormalize(LastoolsAlgorithm):
         commands.append("-odix")
         commands.append("_g")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "", "_g")
 
         # then we height-normalize each points in the reversible tiles
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasheight")]
+        commands = LastoolsCommand("lasheight")
         self.add_parameters_verbose_commands(parameters, context, commands)
-        self.add_parameters_temporary_directory_as_input_files_commands(
-            parameters, context, commands, "hugeFileNormalize*_g.laz"
-        )
         self.add_parameters_temporary_directory_as_output_directory_commands(parameters, context, commands)
         commands.append("-replace_z")
         commands.append("-odix")
         commands.append("h")
         commands.append("-olaz")
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.add_stage(commands, "_g", "_gh")
+
+        pipeline.run(merged=True)
+        if feedback.isCanceled():
+            return self.add_statistics_results(feedback, {})
 
         # then we reverse the tiling
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lastile")]
+        commands = LastoolsCommand("lastile")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_temporary_directory_as_input_files_commands(
             parameters, context, commands, "hugeFileNormalize*_gh.laz"
@@ -399,9 +412,12 @@ class HugeFileNormalize(LastoolsAlgorithm):
         commands.append("-reverse_tiling")
         self.add_parameters_point_output_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        pipeline.run_merge(
+            commands, "hugeFileNormalize*_gh.laz",
+            self.get_parameters_output_file(parameters, context, LastoolsAlgorithm.OUTPUT_LASLAZ)
+        )
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return HugeFileNormalize()
@@ -430,4 +446,4 @@ class HugeFileNormalize(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
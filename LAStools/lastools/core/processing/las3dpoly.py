@@ -21,7 +21,6 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
 from qgis.core import (
     QgsProcessingParameterNumber, QgsProcessingParameterDefinition, QgsProcessingParameterBoolean,
@@ -29,9 +28,8 @@ from qgis.core import (
     QgsProcessingParameterEnum
 )
 
-from ..utils import LastoolsUtils, descript_processing as descript_info, paths
+from ..utils import LastoolsCommand, descript_processing as descript_info, paths
 from ..algo import LastoolsAlgorithm
-from PyQt5.QtGui import QIcon
 
 
 class Las3dPolyRadialDistance(LastoolsAlgorithm):
@@ -119,10 +117,11 @@ class Las3dPolyRadialDistance(LastoolsAlgorithm):
         ))
         self.helpUrl()
         self.icon()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
         # calling the specific .exe files from source of software
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las3dpoly64")]
+        commands = LastoolsCommand("las3dpoly64")
         # append -v and -gui
         self.add_parameters_verbose_commands(parameters, context, commands)
         # append -i
@@ -151,8 +150,8 @@ class Las3dPolyRadialDistance(LastoolsAlgorithm):
             commands.append(f"-o {parameters['OUTPUT_LAS_PATH']}")
         # append extra params
         commands.append(parameters['ADDITIONAL_PARAM'])
-        LastoolsUtils.run_lastools(commands, feedback)
-        return {"command": commands}
+        self.run_lastools(commands, feedback)
+        return self.add_statistics_results(feedback, {"command": commands})
 
     def createInstance(self):
         return Las3dPolyRadialDistance()
@@ -181,7 +180,7 @@ class Las3dPolyRadialDistance(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class Las3dPolyHorizontalVerticalDistance(LastoolsAlgorithm):
@@ -274,10 +273,11 @@ class Las3dPolyHorizontalVerticalDistance(LastoolsAlgorithm):
             False
         ))
         self.helpUrl()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
         # calling the specific .exe files from source of software
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "las3dpoly64")]
+        commands = LastoolsCommand("las3dpoly64")
         # append -v and -gui
         self.add_parameters_verbose_commands(parameters, context, commands)
         # append -i
@@ -310,8 +310,8 @@ class Las3dPolyHorizontalVerticalDistance(LastoolsAlgorithm):
             commands.append(f"-o {parameters['OUTPUT_LAS_PATH']}")
         # append extra params
         commands.append(parameters['ADDITIONAL_PARAM'])
-        LastoolsUtils.run_lastools(commands, feedback)
-        return {"command": commands}
+        self.run_lastools(commands, feedback)
+        return self.add_statistics_results(feedback, {"command": commands})
 
     def createInstance(self):
         return Las3dPolyHorizontalVerticalDistance()
@@ -340,4 +340,4 @@ class Las3dPolyHorizontalVerticalDistance(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
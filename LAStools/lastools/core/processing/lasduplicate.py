@@ -21,11 +21,10 @@ __author__ = 'Martin Isenburg'
 __date__ = 'September 2013'
 __copyright__ = '(C) 2013, rapidlasso GmbH'
 
-import os
 from qgis.core import QgsProcessingParameterBoolean
 from qgis.core import QgsProcessingParameterNumber
 
-from lastools.core.utils.utils import LastoolsUtils
+from ..utils import LastoolsCommand
 from lastools.core.algo.lastools_algorithm import LastoolsAlgorithm
 
 class lasduplicate(LastoolsAlgorithm):
@@ -50,9 +49,10 @@ class lasduplicate(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterBoolean(lasduplicate.RECORD_REMOVED, "record removed duplicates to LAS/LAZ file", False))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasduplicate")]
+        commands = LastoolsCommand("lasduplicate")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         if (self.parameterAsBool(parameters, lasduplicate.LOWEST_Z, context)):
@@ -71,9 +71,9 @@ class lasduplicate(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def name(self):
         return 'lasduplicate'
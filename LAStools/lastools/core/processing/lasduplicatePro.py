@@ -21,11 +21,10 @@ __author__ = 'Martin Isenburg'
 __date__ = 'October 2014'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 from qgis.core import QgsProcessingParameterBoolean
 from qgis.core import QgsProcessingParameterNumber
 
-from lastools.core.utils.utils import LastoolsUtils
+from ..utils import LastoolsCommand
 from lastools.core.algo.lastools_algorithm import LastoolsAlgorithm
 
 class lasduplicatePro(LastoolsAlgorithm):
@@ -53,9 +52,10 @@ class lasduplicatePro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasduplicate")]
+        commands = LastoolsCommand("lasduplicate")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         if (self.parameterAsBool(parameters, lasduplicatePro.LOWEST_Z, context)):
@@ -77,9 +77,9 @@ class lasduplicatePro(LastoolsAlgorithm):
         self.add_parameters_additional_commands(parameters, context, commands)
         self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def name(self):
         return 'lasduplicatePro'
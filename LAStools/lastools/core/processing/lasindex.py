@@ -21,11 +21,9 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterBoolean
 
-from ..utils import LastoolsUtils, descript_processing as descript_info, paths
+from ..utils import LastoolsCommand, descript_processing as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -44,12 +42,10 @@ class LasIndex(LastoolsAlgorithm):
             LasIndex.MOBILE_OR_TERRESTRIAL, "is mobile or terrestrial LiDAR (not airborne)", False
         ))
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasindex.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasindex")]
+        commands = LastoolsCommand("lasindex")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         if self.parameterAsBool(parameters, LasIndex.APPEND_LAX, context):
@@ -61,9 +57,9 @@ class LasIndex(LastoolsAlgorithm):
             commands.append("-100")
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def createInstance(self):
         return LasIndex()
@@ -92,7 +88,7 @@ class LasIndex(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasIndexPro(LastoolsAlgorithm):
@@ -111,14 +107,11 @@ class LasIndexPro(LastoolsAlgorithm):
         self.add_parameters_additional_gui()
         self.add_parameters_cores_gui()
         self.add_parameters_verbose_gui64()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if LastoolsUtils.has_wine():
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasindex.exe")]
-        else:
-            commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasindex")]
+        commands = LastoolsCommand("lasindex")
         self.add_parameters_verbose_commands64(parameters, context, commands)
-        self.add_parameters_point_input_folder_commands(parameters, context, commands)
         if self.parameterAsBool(parameters, LasIndexPro.APPEND_LAX, context):
             commands.append("-append")
         if self.parameterAsBool(parameters, LasIndexPro.MOBILE_OR_TERRESTRIAL, context):
@@ -127,11 +120,10 @@ class LasIndexPro(LastoolsAlgorithm):
             commands.append("-maximum")
             commands.append("-100")
         self.add_parameters_additional_commands(parameters, context, commands)
-        self.add_parameters_cores_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools_per_input_file(parameters, context, feedback, commands)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def createInstance(self):
         return LasIndexPro()
@@ -160,4 +152,4 @@ class LasIndexPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterFileDestination, QgsProcessingParameterString
 
-from ..utils import LastoolsUtils, descript_processing as descript_info, paths
+from ..utils import LastoolsCommand, descript_processing as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -67,10 +65,11 @@ class LasIntensity(LastoolsAlgorithm):
             LasIntensity.ADDITIONAL_PARAM, "additional command line parameter(s)", ' ', False, False
         ))
         self.helpUrl()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
         # calling the specific .exe files from source of software
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasintensity64")]
+        commands = LastoolsCommand("lasintensity64")
         # append -v and -gui
         self.add_parameters_verbose_commands(parameters, context, commands)
         # append -i
@@ -86,8 +85,8 @@ class LasIntensity(LastoolsAlgorithm):
             commands.append(f"-o {parameters['OUTPUT_LAS_PATH']}")
         # append extra params
         commands.append(parameters['ADDITIONAL_PARAM'])
-        LastoolsUtils.run_lastools(commands, feedback)
-        return {"command": commands}
+        self.run_lastools(commands, feedback)
+        return self.add_statistics_results(feedback, {"command": commands})
 
     def createInstance(self):
         return LasIntensity()
@@ -116,7 +115,7 @@ class LasIntensity(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasIntensityAttenuationFactor(LastoolsAlgorithm):
@@ -150,10 +149,11 @@ class LasIntensityAttenuationFactor(LastoolsAlgorithm):
             LasIntensityAttenuationFactor.ADDITIONAL_PARAM, "additional command line parameter(s)", ' ', False, False
         ))
         self.helpUrl()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
         # calling the specific .exe files from source of software
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasintensity64")]
+        commands = LastoolsCommand("lasintensity64")
         # append -v and -gui
         self.add_parameters_verbose_commands(parameters, context, commands)
         # append -i
@@ -167,8 +167,8 @@ class LasIntensityAttenuationFactor(LastoolsAlgorithm):
             commands.append(f"-o {parameters['OUTPUT_LAS_PATH']}")
         # append extra params
         commands.append(parameters['ADDITIONAL_PARAM'])
-        LastoolsUtils.run_lastools(commands, feedback)
-        return {"command": commands}
+        self.run_lastools(commands, feedback)
+        return self.add_statistics_results(feedback, {"command": commands})
 
     def createInstance(self):
         return LasIntensityAttenuationFactor()
@@ -197,4 +197,4 @@ class LasIntensityAttenuationFactor(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
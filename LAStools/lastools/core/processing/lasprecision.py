@@ -21,9 +21,8 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from lastools.core.utils.utils import LastoolsUtils
+from ..utils import LastoolsCommand
 from lastools.core.algo.lastools_algorithm import LastoolsAlgorithm
 
 
@@ -34,17 +33,18 @@ class lasprecision(LastoolsAlgorithm):
         self.add_parameters_point_input_gui()
         self.add_parameters_generic_output_gui("Output ASCII file", "txt", True)
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasprecision")]
+        commands = LastoolsCommand("lasprecision")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_generic_output_commands(parameters, context, commands, "-o")
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def name(self):
         return 'lasprecision'
@@ -21,10 +21,9 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 from qgis.core import QgsProcessingParameterBoolean
 
-from lastools.core.utils.utils import LastoolsUtils
+from ..utils import LastoolsCommand
 from lastools.core.algo.lastools_algorithm import LastoolsAlgorithm
 
 
@@ -41,9 +40,10 @@ class lassort(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterBoolean(lassort.BY_POINT_SOURCE_ID, "sort by point source ID", False))
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lassort")]
+        commands = LastoolsCommand("lassort")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         if (self.parameterAsBool(parameters, lassort.BY_GPS_TIME, context)):
@@ -55,9 +55,9 @@ class lassort(LastoolsAlgorithm):
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def name(self):
         return 'lassort'
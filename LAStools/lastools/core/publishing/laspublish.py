@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterEnum, QgsProcessingParameterBoolean, QgsProcessingParameterString
 
-from ..utils import LastoolsUtils, descript_publishing as descript_info, paths
+from ..utils import LastoolsCommand, descript_publishing as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -68,9 +66,10 @@ class LasPublish(LastoolsAlgorithm):
         self.addParameter(QgsProcessingParameterString(LasPublish.PORTAL_TITLE, "portal title", "My LiDAR Portal"))
         self.addParameter(QgsProcessingParameterString(LasPublish.PORTAL_DESCRIPTION, "portal description", ""))
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "laspublish")]
+        commands = LastoolsCommand("laspublish")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         mode = self.parameterAsInt(parameters, LasPublish.MODE, context)
@@ -95,22 +94,21 @@ class LasPublish(LastoolsAlgorithm):
             commands.append("-overwrite")
         portal_html_page = self.parameterAsString(parameters, LasPublish.PORTAL_HTML_PAGE, context)
         if portal_html_page != "":
-            commands.append("-o")
-            commands.append('"' + portal_html_page + '"')
+            commands.add_output("-o", portal_html_page)
         title = self.parameterAsString(parameters, LasPublish.PORTAL_TITLE, context)
         if title != "":
             commands.append("-title")
-            commands.append('"' + title + '"')
+            commands.append(title)
         description = self.parameterAsString(parameters, LasPublish.PORTAL_DESCRIPTION, context)
         if description != "":
             commands.append("-description")
-            commands.append('"' + description + '"')
+            commands.append(description)
         commands.append("-olaz")
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasPublish()
@@ -139,7 +137,7 @@ class LasPublish(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasPublishPro(LastoolsAlgorithm):
@@ -184,9 +182,10 @@ class LasPublishPro(LastoolsAlgorithm):
             QgsProcessingParameterString(LasPublishPro.PORTAL_TITLE, "portal title", "My LiDAR Portal"))
         self.addParameter(QgsProcessingParameterString(LasPublishPro.PORTAL_DESCRIPTION, "portal description", ""))
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "laspublish")]
+        commands = LastoolsCommand("laspublish")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         mode = self.parameterAsInt(parameters, LasPublishPro.MODE, context)
@@ -211,22 +210,21 @@ class LasPublishPro(LastoolsAlgorithm):
             commands.append("-overwrite")
         portal_html_page = self.parameterAsString(parameters, LasPublishPro.PORTAL_HTML_PAGE, context)
         if portal_html_page != "":
-            commands.append("-o")
-            commands.append('"' + portal_html_page + '"')
+            commands.add_output("-o", portal_html_page)
         title = self.parameterAsString(parameters, LasPublishPro.PORTAL_TITLE, context)
         if title != "":
             commands.append("-title")
-            commands.append('"' + title + '"')
+            commands.append(title)
         description = self.parameterAsString(parameters, LasPublishPro.PORTAL_DESCRIPTION, context)
         if description != "":
             commands.append("-description")
-            commands.append('"' + description + '"')
+            commands.append(description)
         commands.append("-olaz")
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasPublishPro()
@@ -255,4 +253,4 @@ class LasPublishPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterString, QgsProcessingParameterBoolean, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_quality_control_information as descript_info, paths
+from ..utils import LastoolsCommand, descript_quality_control_information as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -54,9 +52,10 @@ class LasControl(LastoolsAlgorithm):
             LasControl.ADJUST_Z, "adjust z elevation by translating away the average error", False
         ))
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lascontrol")]
+        commands = LastoolsCommand("lascontrol")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.addParametersGenericInputCommandsfile(parameters, context, commands, "-cp")
@@ -74,13 +73,14 @@ class LasControl(LastoolsAlgorithm):
                     commands.append(str(6))
         if self.parameterAsBool(parameters, LasControl.ADJUST_Z, context):
             commands.append("-adjust_z")
-            commands.append("-odix _adjusted")
+            commands.append("-odix")
+            commands.append("_adjusted")
             commands.append("-olaz")
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasControl()
@@ -109,4 +109,4 @@ class LasControl(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -2,14 +2,27 @@
 defining all the classes and objects
 """
 from .utils import LastoolsUtils
-from .help import (
-    descript_processing, descript_data_convert, descript_classification_filtering, descript_data_compression,
-    descript_dsm_dtm_generation_production, descript_publishing, descript_quality_control_information,
-    descript_visualization_colorization, descript_pipelines, paths
-)
+from .command import LastoolsCommand
+from .scheduler import LastoolsScheduler
+from .manifest import LastoolsManifest
+from .cache import LastoolsCache
+from .header import LastoolsHeader
+from .catalog import LastoolsCatalog
+from .wine import LastoolsWine
+from .pipeline import LastoolsPipeline
+from .paths import paths
 
 __all__ = [
-    LastoolsUtils, descript_processing, descript_data_convert, descript_classification_filtering,
-    descript_data_compression, descript_dsm_dtm_generation_production, descript_publishing,
-    descript_quality_control_information, descript_visualization_colorization, descript_pipelines, paths
+    LastoolsUtils, LastoolsCommand, LastoolsScheduler, LastoolsManifest, LastoolsCache, LastoolsHeader,
+    LastoolsCatalog, LastoolsWine, LastoolsPipeline, paths
 ]
+# mosaic, cog, loader, capabilities and jobs are imported by the modules using them, GDAL and the layer classes of
+# QGIS are then only loaded once a run needs them and not with the provider
+
+
+def __getattr__(name):
+    # the large 'descript_*' dictionaries of help.py are only loaded when the first algorithm module needs them
+    if name.startswith("descript_"):
+        from . import help
+        return getattr(help, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
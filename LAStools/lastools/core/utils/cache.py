@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    cache.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+
+from processing.core.ProcessingConfig import ProcessingConfig
+
+
+class LastoolsCache:
+    """content-addressed store of intermediate pipeline products that is shared by all pipelines
+
+    an entry holds the files written by one stage and is addressed by a hash of the identity of the stage inputs and
+    its exact command line, so a pipeline repeating a stage that another pipeline already ran on the same data (e.g.
+    the lastile + lasground + lasheight prefix of the CHM pipelines) copies the products instead of recomputing them.
+    the least recently used entries are evicted when the cache grows beyond its size limit. the size of the cache is
+    counted once and kept up to date as entries are stored, the entries are only looked at again to evict some.
+    """
+
+    # the size limit in GB when the setting is not a number
+    DEFAULT_SIZE = 10.0
+    # the share of the size limit an eviction makes room down to, so that a full cache is not looked at on every store
+    EVICT_TO = 0.8
+
+    def __init__(self, folder, size_limit):
+        self.folder = folder
+        self.size_limit = size_limit
+        self.lock = threading.Lock()
+        # the bytes in the cache, None until they are counted
+        self.size = None
+
+    @staticmethod
+    def from_settings():
+        """returns the cache configured in the settings or None when no cache folder is set"""
+        folder = ProcessingConfig.getSetting("LASTOOLS_CACHE_FOLDER")
+        if folder is None or folder == "":
+            return None
+        try:
+            size = float(ProcessingConfig.getSetting("LASTOOLS_CACHE_SIZE"))
+        except (TypeError, ValueError):
+            size = LastoolsCache.DEFAULT_SIZE
+        return LastoolsCache(folder, int(size * 1024 ** 3))
+
+    @staticmethod
+    def file_identity(files):
+        """returns the absolute path, size and mtime of every file"""
+        identity = []
+        for file in sorted(files):
+            stat = os.stat(file)
+            identity.append([os.path.abspath(file), stat.st_size, stat.st_mtime_ns])
+        return identity
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def fetch(self, key, directory):
+        """copies the files of the entry into the directory and returns them, or returns None on a cache miss"""
+        entry = os.path.join(self.folder, key)
+        if not os.path.isdir(entry):
+            return None
+        files = []
+        try:
+            for name in sorted(os.listdir(entry)):
+                # always copies, hard links would let LAStools overwrite a cached file when the stage is rerun
+                files.append(shutil.copy2(os.path.join(entry, name), os.path.join(directory, name)))
+            os.utime(entry)
+        except OSError:
+            return None
+        return files
+
+    def store(self, key, files):
+        """adds the files as the entry for the key, unless it is already cached"""
+        entry = os.path.join(self.folder, key)
+        if os.path.isdir(entry):
+            return
+        # the entry is assembled next to its final place and renamed so that no reader ever sees it half copied
+        part = os.path.join(self.folder, key + ".part-" + uuid.uuid4().hex)
+        try:
+            os.makedirs(part)
+            for file in files:
+                shutil.copy2(file, os.path.join(part, os.path.basename(file)))
+            os.rename(part, entry)
+        except OSError:
+            shutil.rmtree(part, ignore_errors=True)
+            return
+        with self.lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self.entries())
+            else:
+                self.size += sum(os.path.getsize(file) for file in files)
+            if self.size > self.size_limit:
+                self.evict()
+
+    def entries(self):
+        """returns the last use, size and folder of every entry"""
+        entries = []
+        for name in os.listdir(self.folder):
+            entry = os.path.join(self.folder, name)
+            if ".part-" in name or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(entry_file.stat().st_size for entry_file in os.scandir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                # evicted meanwhile by another process
+                continue
+        return entries
+
+    def evict(self):
+        """removes the least recently used entries until the cache fits into its size limit with room to spare, with
+        the lock held"""
+        entries = self.entries()
+        # counted again, other processes may store into the same folder
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if self.size <= self.size_limit * LastoolsCache.EVICT_TO:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            self.size -= size
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    capabilities.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import re
+import json
+import uuid
+import tempfile
+import threading
+import subprocess
+
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.tools.system import isWindows
+
+from .utils import LastoolsUtils
+from .wine import LastoolsWine
+
+
+class LastoolsCapabilities:
+    """what the LAStools binaries in the LAStools folder can do, probed once and kept on disk
+
+    per tool it records the executable, whether it runs natively or under Wine, its version and whether a 64 bit
+    build is available. a record is probed again only when the modification time of the binaries changes, e.g. after
+    an update of LAStools. the provider probes all tools in the background when it is loaded, a tool that is run
+    before has no capabilities until its probe, started in the background as well, is done.
+    """
+
+    NAME = "lastools_capabilities.json"
+    # seconds a tool may take to print its version
+    PROBE_TIMEOUT = 30
+    VERSION = re.compile(r"version\s+(\d+)")
+    # the tools the algorithms run, other binaries of the LAStools folder like the GUIs are not probed
+    TOOLS = (
+        "blast2dem", "blast2iso", "las2dem", "las2iso", "las2las", "las2shp", "las2tin", "las2txt", "las3dpoly64",
+        "lasboundary", "lascanopy", "lasclassify", "lasclip", "lascolor", "lascontrol", "lasdiff", "lasduplicate",
+        "lasgrid", "lasground", "lasground_new", "lasheight", "lasindex", "lasinfo", "lasintensity64", "lasmerge",
+        "lasnoise", "lasoverage", "lasoverlap", "lasprecision", "laspublish", "lassort", "lassplit", "lasthin",
+        "lastile", "lasvalidate", "lasview", "laszip", "shp2las", "txt2las",
+    )
+
+    # the records by executable, loaded from disk on first use
+    records = None
+    # the executables of the tools by LAStools folder, tool and Wine, each folder is only looked into once
+    executables = {}
+    # the executables being probed, the lock is not held while they run
+    pending = set()
+    lock = threading.RLock()
+
+    @staticmethod
+    def folder():
+        return os.path.join(ProcessingConfig.getSetting("LASTOOLS_FOLDER") or "", "bin")
+
+    @staticmethod
+    def path():
+        """returns the file kept in the pipeline cache folder, or in the system temporary folder if none is set"""
+        folder = ProcessingConfig.getSetting("LASTOOLS_CACHE_FOLDER")
+        if folder is None or folder == "":
+            folder = tempfile.gettempdir()
+        return os.path.join(folder, LastoolsCapabilities.NAME)
+
+    @staticmethod
+    def runnable(file):
+        if isWindows():
+            return os.path.isfile(file + ".exe") or os.path.isfile(file)
+        # Windows executables unpacked on other hosts often lack the executable bit, Wine runs them all the same
+        return os.path.isfile(file) and (file.lower().endswith(".exe") or os.access(file, os.X_OK))
+
+    @staticmethod
+    def executable(tool):
+        """returns the path of the tool in the LAStools folder: a native build, e.g. 'lasinfo64' or 'lasinfo', if there
+        is one, else the Windows executable if Wine is set"""
+        folder = LastoolsCapabilities.folder()
+        key = (folder, tool, LastoolsUtils.has_wine())
+        if key not in LastoolsCapabilities.executables:
+            executable = os.path.join(folder, tool)
+            if not isWindows():
+                native = [os.path.join(folder, name) for name in (tool + "64", tool)]
+                native = [file for file in native if LastoolsCapabilities.runnable(file)]
+                if native:
+                    executable = native[0]
+                elif LastoolsUtils.has_wine():
+                    executable = os.path.join(folder, tool + ".exe")
+            LastoolsCapabilities.executables[key] = executable
+        return LastoolsCapabilities.executables[key]
+
+    @staticmethod
+    def wine(executable):
+        """returns whether the executable runs under Wine"""
+        return not isWindows() and executable.lower().endswith(".exe") and LastoolsUtils.has_wine()
+
+    @staticmethod
+    def build64(executable):
+        """returns the 64 bit build next to the executable, e.g. 'lasground64.exe' for 'lasground.exe', or None"""
+        base, extension = os.path.splitext(executable)
+        if base.endswith("64"):
+            return None
+        build64 = base + "64" + extension
+        return build64 if LastoolsCapabilities.runnable(build64) else None
+
+    @staticmethod
+    def mtime(file):
+        for name in (file, file + ".exe"):
+            try:
+                return os.path.getmtime(name)
+            except OSError:
+                pass
+        return None
+
+    @staticmethod
+    def run(executable, argument):
+        """returns what the executable prints when run with the single argument, '' if it cannot be run"""
+        argv = [executable, argument]
+        environment = None
+        if LastoolsCapabilities.wine(executable):
+            LastoolsWine.start()
+            argv = [LastoolsWine.wine()] + argv
+            environment = LastoolsWine.environment()
+        try:
+            process = subprocess.run(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     env=environment, timeout=LastoolsCapabilities.PROBE_TIMEOUT)
+        except (OSError, subprocess.SubprocessError):
+            return ""
+        return process.stdout.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def probe(executable):
+        """runs the executable with '-version' and returns its record"""
+        build64 = LastoolsCapabilities.build64(executable)
+        version = LastoolsCapabilities.VERSION.search(LastoolsCapabilities.run(executable, "-version"))
+        return {
+            "executable": executable,
+            "mtime": [LastoolsCapabilities.mtime(executable), build64 and LastoolsCapabilities.mtime(build64)],
+            "native": not LastoolsCapabilities.wine(executable),
+            "version": version.group(1) if version else None,
+            "x64": build64 is not None or os.path.splitext(executable)[0].endswith("64"),
+            # the 32 bit executable hands over to its 64 bit build when run with '-cpu64'
+            "cpu64": build64 is not None,
+        }
+
+    @staticmethod
+    def load():
+        try:
+            with open(LastoolsCapabilities.path(), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def save():
+        path = LastoolsCapabilities.path()
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(LastoolsCapabilities.records, file, indent=1)
+            os.replace(temporary, path)
+        except OSError:
+            # without the file the tools are probed again in the next session
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @staticmethod
+    def current(executable):
+        """returns the record of the executable if there is one for its binaries as they are now, else None"""
+        build64 = LastoolsCapabilities.build64(executable)
+        mtime = [LastoolsCapabilities.mtime(executable), build64 and LastoolsCapabilities.mtime(build64)]
+        with LastoolsCapabilities.lock:
+            if LastoolsCapabilities.records is None:
+                LastoolsCapabilities.records = LastoolsCapabilities.load()
+            record = LastoolsCapabilities.records.get(executable)
+        return record if record is not None and record["mtime"] == mtime else None
+
+    @staticmethod
+    def get(tool, save=True):
+        """returns the record of the tool, probed if there is none for its binaries as they are now"""
+        executable = LastoolsCapabilities.executable(tool)
+        record = LastoolsCapabilities.current(executable)
+        if record is not None:
+            return record
+        # probed without the lock, the tools may take long to answer and other tools are looked up meanwhile
+        record = LastoolsCapabilities.probe(executable)
+        if record["mtime"][0] is None:
+            # a tool that is not installed is not recorded, it is probed once it is
+            return record
+        with LastoolsCapabilities.lock:
+            LastoolsCapabilities.records[executable] = record
+            if save:
+                LastoolsCapabilities.save()
+        return record
+
+    @staticmethod
+    def known(tool, probe=True):
+        """returns the record of the tool without waiting for a probe, None if there is none yet. with probe the tool
+        is probed in the background, so that the record is there for its next run"""
+        executable = LastoolsCapabilities.executable(tool)
+        record = LastoolsCapabilities.current(executable)
+        if record is None and probe and LastoolsCapabilities.mtime(executable) is not None:
+            with LastoolsCapabilities.lock:
+                if executable in LastoolsCapabilities.pending:
+                    return None
+                LastoolsCapabilities.pending.add(executable)
+
+            def get():
+                try:
+                    LastoolsCapabilities.get(tool)
+                finally:
+                    with LastoolsCapabilities.lock:
+                        LastoolsCapabilities.pending.discard(executable)
+
+            threading.Thread(target=get, name=f"LAStools capabilities of {tool}", daemon=True).start()
+        return record
+
+    @staticmethod
+    def probe_all():
+        """probes the installed tools that have no record for their binaries as they are now, and saves the records"""
+        for tool in LastoolsCapabilities.TOOLS:
+            if LastoolsCapabilities.mtime(LastoolsCapabilities.executable(tool)) is not None:
+                LastoolsCapabilities.get(tool, save=False)
+        with LastoolsCapabilities.lock:
+            if LastoolsCapabilities.records is not None:
+                LastoolsCapabilities.save()
+
+    @staticmethod
+    def start():
+        """probes the tools in the background, when the provider is loaded"""
+        threading.Thread(target=LastoolsCapabilities.probe_all, name="LAStools capabilities", daemon=True).start()
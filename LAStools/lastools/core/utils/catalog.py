@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    catalog.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from .header import LastoolsHeader
+from .scheduler import LastoolsScheduler
+
+
+class LastoolsCatalog:
+    """SQLite catalog of the headers of LAS/LAZ files, keyed by path, size and mtime
+
+    a header is only read again when its file changed, so planning over the many thousand files of a project needs a
+    single query instead of one 'lasinfo' per file.
+    """
+
+    NAME = "lastools_catalog.sqlite"
+    CHUNK = 500
+
+    def __init__(self, database):
+        self.database = database
+        self.lock = threading.Lock()
+        with closing(sqlite3.connect(self.database)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS headers "
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, header TEXT)"
+            )
+
+    @staticmethod
+    def default():
+        """returns the catalog kept in the pipeline cache folder, or in the system temporary folder if none is set"""
+        folder = ProcessingConfig.getSetting("LASTOOLS_CACHE_FOLDER")
+        if folder is None or folder == "":
+            folder = tempfile.gettempdir()
+        return LastoolsCatalog(os.path.join(folder, LastoolsCatalog.NAME))
+
+    def headers(self, files):
+        """returns the header of every file that is a LAS/LAZ file, reading only those not cataloged yet"""
+        states = {}
+        for file in files:
+            stat = os.stat(file)
+            states[os.path.abspath(file)] = (stat.st_size, stat.st_mtime_ns)
+        headers = {}
+        paths = list(states)
+        with self.lock, closing(sqlite3.connect(self.database)) as connection, connection:
+            # queried in chunks that stay below the limit of SQLite on the number of query parameters
+            for start in range(0, len(paths), LastoolsCatalog.CHUNK):
+                chunk = paths[start:start + LastoolsCatalog.CHUNK]
+                rows = connection.execute(
+                    "SELECT path, size, mtime, header FROM headers WHERE path IN (%s)" % ",".join("?" * len(chunk)),
+                    chunk
+                )
+                for path, size, mtime, header in rows:
+                    if states[path] == (size, mtime):
+                        headers[path] = json.loads(header)
+            updates = []
+            for path, (size, mtime) in states.items():
+                if path in headers:
+                    continue
+                try:
+                    headers[path] = LastoolsHeader.read(path)
+                except (OSError, ValueError):
+                    continue
+                updates.append((path, size, mtime, json.dumps(headers[path])))
+            connection.executemany("INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?)", updates)
+        return [headers[os.path.abspath(file)] for file in files if os.path.abspath(file) in headers]
+
+    def scan(self, input_directory, wildcards):
+        """returns the headers of the LAS/LAZ files matching the wildcards, largest first"""
+        return self.headers(LastoolsScheduler.expand_input_files(input_directory, wildcards))
+
+    def overlapping(self, files, extent):
+        """returns the files whose points may lie in the extent (min_x, min_y, max_x, max_y), keeping their order
+
+        files without a readable header are kept, they are left to LAStools to deal with.
+        """
+        headers = {header["path"]: header for header in self.headers(files)}
+        return [
+            file for file in files
+            if os.path.abspath(file) not in headers or LastoolsHeader.overlaps(headers[os.path.abspath(file)], extent)
+        ]
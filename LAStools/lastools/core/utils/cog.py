@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    cog.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from osgeo import gdal
+
+from .mosaic import LastoolsMosaic
+
+
+class LastoolsCog:
+    """converts the raster products of LAStools to Cloud-Optimized GeoTIFFs
+
+    a COG is tiled, compressed and carries its overviews, so QGIS displays it at once without building pyramids
+    into '.ovr' files, and it can be served over HTTP range requests. GDAL releases the GIL while it converts, so a
+    pool of threads converts the rasters of many tiles at once.
+    """
+
+    CREATION_OPTIONS = ["COMPRESS=DEFLATE", "PREDICTOR=YES", "BLOCKSIZE=512", "OVERVIEWS=AUTO", "BIGTIFF=IF_SAFER"]
+    # files next to a raster that describe it, which are of no use once it is a COG, '<name>.hdr' and so on
+    SIDECARS = (".hdr", ".prj", ".tfw", ".wld", ".pgw", ".jgw", ".aux.xml")
+    # those GDAL names after the whole file name, e.g. 'tile_dtm.bil.aux.xml'
+    FILE_SIDECARS = (".aux.xml",)
+
+    @staticmethod
+    def convert(file, threads="1"):
+        """converts the raster into '<name>.tif' and returns that file and an error message or None
+
+        a raster of another format is removed together with its sidecars once it is converted.
+        """
+        base = os.path.splitext(file)[0]
+        cog = base + ".tif"
+        temporary = base + ".cog.tif"
+        dataset = gdal.Translate(temporary, file, options=gdal.TranslateOptions(
+            format="COG", creationOptions=LastoolsCog.CREATION_OPTIONS + [f"NUM_THREADS={threads}"]
+        ))
+        if dataset is None:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return cog, gdal.GetLastErrorMsg()
+        dataset = None
+        if file != cog:
+            os.remove(file)
+        sidecars = [base + sidecar for sidecar in LastoolsCog.SIDECARS]
+        sidecars.extend(file + sidecar for sidecar in LastoolsCog.FILE_SIDECARS)
+        for sidecar in sidecars:
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        os.replace(temporary, cog)
+        return cog, None
+
+    @staticmethod
+    def convert_all(files, cores, feedback):
+        """converts the rasters on a pool of threads and returns the COGs, stops early when canceled"""
+        files = LastoolsMosaic.rasters(files)
+        if not files:
+            return []
+        # a single raster uses all cores for its compression, many rasters one core each
+        threads = "ALL_CPUS" if len(files) == 1 else "1"
+
+        def convert(file):
+            if feedback.isCanceled():
+                return None, None
+            return LastoolsCog.convert(file, threads)
+
+        cogs = []
+        with ThreadPoolExecutor(max_workers=max(1, cores)) as executor:
+            # reported from this thread as the conversions are done, not from the threads of the pool
+            for file, (cog, error) in zip(files, executor.map(convert, files)):
+                if error is not None:
+                    feedback.reportError(f"converting {file} to a COG failed: {error}")
+                elif cog is not None:
+                    feedback.pushConsoleInfo(f"{cog} is a Cloud-Optimized GeoTIFF")
+                    cogs.append(cog)
+        return cogs
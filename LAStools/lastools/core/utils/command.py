@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    command.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import shlex
+import subprocess
+
+from processing.tools.system import isWindows
+
+from .wine import LastoolsWine
+from .capabilities import LastoolsCapabilities
+
+
+class LastoolsCommand(list):
+    """command line of a LAStools tool: the path of the tool followed by its arguments, one unquoted argument each
+
+    the add_parameters_*_commands helpers append to it and note the files they name as inputs and outputs, so that
+    pipelines can tell what a command reads and writes. it is run from its argv without a shell, so paths with
+    spaces or quotes need no quoting.
+
+    on other hosts than Windows a native build of the tool is preferred, the Windows executable runs under Wine. a
+    32 bit executable with a 64 bit build next to it is run with '-cpu64'.
+    """
+
+    def __init__(self, tool, arguments=()):
+        # a bare tool name is looked up in the LAStools folder
+        if os.path.dirname(tool) == "":
+            self.tool = tool
+            tool = LastoolsCapabilities.executable(tool)
+        else:
+            self.tool = os.path.splitext(os.path.basename(tool))[0]
+        super().__init__([tool] + list(arguments))
+        self.wine = LastoolsCapabilities.wine(tool)
+        self.inputs = []
+        self.outputs = []
+
+    def copy(self):
+        command = LastoolsCommand(self[0], self[1:])
+        command.tool = self.tool
+        command.inputs = list(self.inputs)
+        command.outputs = list(self.outputs)
+        return command
+
+    def add_input(self, switch, path):
+        self.extend([switch, path])
+        self.inputs.append(path)
+
+    def add_output(self, switch, path):
+        self.extend([switch, path])
+        self.outputs.append(path)
+
+    def add_arguments(self, text):
+        """appends the arguments typed by the user, split like a command line"""
+        if isWindows():
+            self.extend(argument.strip('"') for argument in shlex.split(text, posix=False))
+        else:
+            self.extend(shlex.split(text))
+
+    def with_input(self, path):
+        """returns a copy that reads the single input file, as run once per file or tile"""
+        command = LastoolsCommand(self[0], ["-i", path] + self[1:])
+        command.tool = self.tool
+        command.inputs = [path]
+        command.outputs = list(self.outputs)
+        return command
+
+    def without_inputs(self):
+        """returns a copy that reads none of the inputs, to be given others"""
+        command = LastoolsCommand(self[0])
+        command.tool = self.tool
+        command.outputs = list(self.outputs)
+        index = 1
+        while index < len(self):
+            if self[index] in ("-i", "-lof") and index + 1 < len(self) and self[index + 1] in self.inputs:
+                index += 2
+                continue
+            command.append(self[index])
+            index += 1
+        return command
+
+    def with_option(self, switch, value):
+        """returns a copy in which the argument following the switch is replaced by the value"""
+        command = self.copy()
+        index = command.index(switch, 1) + 1
+        if command[index] in command.outputs:
+            command.outputs[command.outputs.index(command[index])] = value
+        command[index] = value
+        return command
+
+    def option(self, switch, default=None):
+        """returns the argument following the switch"""
+        if switch in self[1:-1]:
+            return self[self.index(switch, 1) + 1]
+        return default
+
+    def tool_path(self, path):
+        """returns the path as the tool sees it, under Wine as Windows path"""
+        if self.wine and path.startswith("/"):
+            return LastoolsWine.path(path)
+        return path
+
+    def host_path(self, path):
+        """returns the path as named to the tool, under Wine as Windows path, as path on this host"""
+        if self.wine:
+            return LastoolsWine.host_path(path)
+        return path
+
+    def argv(self, probe=True):
+        """returns the arguments to run the tool with. a tool that is not probed yet is probed in the background if
+        probe is set, it runs without its capabilities meanwhile"""
+        argv = list(self)
+        # the 32 bit executable hands over to its 64 bit build, which is faster and not limited to 2 GB of memory
+        if "-cpu64" not in argv and argv[0] == LastoolsCapabilities.executable(self.tool):
+            capabilities = LastoolsCapabilities.known(self.tool, probe)
+            if capabilities is not None and capabilities["cpu64"]:
+                argv.insert(1, "-cpu64")
+        if not self.wine:
+            return argv
+        return [LastoolsWine.wine(), argv[0]] + [self.tool_path(argument) for argument in argv[1:]]
+
+    def environment(self):
+        """returns the environment to run the tool in, None for that of QGIS"""
+        if not self.wine:
+            return None
+        LastoolsWine.start()
+        return LastoolsWine.environment()
+
+    def commandline(self):
+        """returns the argv as a command line to show, quoted the way the platform's shell expects"""
+        if isWindows():
+            return subprocess.list2cmdline(self.argv(probe=False))
+        return " ".join(shlex.quote(argument) for argument in self.argv(probe=False))
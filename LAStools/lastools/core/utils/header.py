@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    header.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import mmap
+import struct
+
+
+class LastoolsHeader:
+    """reads the public header block and the (extended) variable length records of LAS/LAZ files
+
+    only the few hundred bytes needed are touched through a memory map, so no LAStools process is spawned just to
+    learn the bounding box, point count, point format or CRS of a file.
+    """
+
+    # offsets and formats of the public header block, see the LAS 1.4 specification
+    HEADER = struct.Struct("<4sHH16sBB32s32sHHHIIBHI5I3d3d6d")
+    WAVEFORM = struct.Struct("<Q")
+    EXTENDED = struct.Struct("<QIQ15Q")
+    VLR = struct.Struct("<H16sHH32s")
+    EVLR = struct.Struct("<H16sHQ32s")
+    LAX_QUADTREE = struct.Struct("<4sI4sIIII4f")
+    LAX_CELL = struct.Struct("<iII")
+    # GeoTIFF keys holding the EPSG code of a projected or a geographic CRS
+    PROJECTED_CS_KEY = 3072
+    GEOGRAPHIC_CS_KEY = 2048
+
+    @staticmethod
+    def read(path):
+        """returns the header of the LAS/LAZ file as a dict or raises ValueError if it is not a LAS/LAZ file"""
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < LastoolsHeader.HEADER.size:
+                raise ValueError(f"'{path}' is too small to be a LAS/LAZ file")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return LastoolsHeader.parse(path, data)
+
+    @staticmethod
+    def parse(path, data):
+        fields = LastoolsHeader.HEADER.unpack_from(data, 0)
+        if fields[0] != b"LASF":
+            raise ValueError(f"'{path}' is not a LAS/LAZ file")
+        version_major, version_minor = fields[4], fields[5]
+        header_size, offset_to_point_data, number_of_vlrs = fields[10], fields[11], fields[12]
+        point_format, point_record_length, point_count = fields[13], fields[14], fields[15]
+        scale, offset = fields[21:24], fields[24:27]
+        max_x, min_x, max_y, min_y, max_z, min_z = fields[27:33]
+        start_of_first_evlr, number_of_evlrs = 0, 0
+        if version_minor >= 4 and header_size >= LastoolsHeader.HEADER.size + 8 + LastoolsHeader.EXTENDED.size:
+            extended = LastoolsHeader.EXTENDED.unpack_from(data, LastoolsHeader.HEADER.size + 8)
+            start_of_first_evlr, number_of_evlrs = extended[0], extended[1]
+            # the legacy point count is zero for point formats 6 and up or more than 4 billion points
+            point_count = extended[2] or point_count
+        header = {
+            "path": path,
+            "version": f"{version_major}.{version_minor}",
+            # LAZ marks compressed points by setting the upper bits of the point data format
+            "compressed": point_format & 0xC0 != 0,
+            "point_format": point_format & 0x3F,
+            "point_record_length": point_record_length,
+            "point_count": point_count,
+            "scale": list(scale),
+            "offset": list(offset),
+            "bbox": [min_x, min_y, min_z, max_x, max_y, max_z],
+            "offset_to_point_data": offset_to_point_data,
+            "epsg": None,
+            "wkt": None,
+        }
+        position = header_size
+        for _ in range(number_of_vlrs):
+            if position + LastoolsHeader.VLR.size > len(data):
+                break
+            _, user_id, record_id, length, _ = LastoolsHeader.VLR.unpack_from(data, position)
+            position += LastoolsHeader.VLR.size
+            LastoolsHeader.parse_record(header, user_id, record_id, data[position:position + length])
+            position += length
+        position = start_of_first_evlr
+        for _ in range(number_of_evlrs if start_of_first_evlr > 0 else 0):
+            if position + LastoolsHeader.EVLR.size > len(data):
+                break
+            _, user_id, record_id, length, _ = LastoolsHeader.EVLR.unpack_from(data, position)
+            position += LastoolsHeader.EVLR.size
+            LastoolsHeader.parse_record(header, user_id, record_id, data[position:position + length])
+            position += length
+        return header
+
+    @staticmethod
+    def parse_record(header, user_id, record_id, payload):
+        user_id = user_id.rstrip(b"\0")
+        if user_id == b"laszip encoded":
+            header["compressed"] = True
+        elif user_id == b"LASF_Projection" and record_id == 2112:
+            header["wkt"] = payload.rstrip(b"\0").decode("utf-8", errors="replace")
+        elif user_id == b"LASF_Projection" and record_id == 34735 and len(payload) >= 8:
+            # GeoKeyDirectoryTag: a header of four shorts followed by one entry of four shorts per key
+            number_of_keys = struct.unpack_from("<4H", payload, 0)[3]
+            for index in range(min(number_of_keys, len(payload) // 8 - 1)):
+                key_id, location, _, value = struct.unpack_from("<4H", payload, 8 + 8 * index)
+                if location == 0 and key_id in (LastoolsHeader.PROJECTED_CS_KEY, LastoolsHeader.GEOGRAPHIC_CS_KEY):
+                    if key_id == LastoolsHeader.PROJECTED_CS_KEY or header["epsg"] is None:
+                        header["epsg"] = value
+
+    @staticmethod
+    def read_lax(path):
+        """returns the bounding boxes of the occupied quadtree cells of a '.lax' spatial index, or None if unreadable
+
+        the layout is the one written by lasindex: 'LASX' and its version, the quadtree ('LASS', 'LASQ', levels and
+        extent) and the cells with their point intervals ('LASV').
+        """
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        try:
+            if data[0:4] != b"LASX":
+                return None
+            position = 8
+            signature, _, quadtree, _, levels, _, _, min_x, max_x, min_y, max_y = \
+                LastoolsHeader.LAX_QUADTREE.unpack_from(data, position)
+            position += LastoolsHeader.LAX_QUADTREE.size
+            if signature != b"LASS" or quadtree != b"LASQ" or data[position:position + 4] != b"LASV":
+                return None
+            number_of_cells = struct.unpack_from("<i", data, position + 8)[0]
+            position += 12
+            # cells are numbered level by level, level l starting after the 4^0 + ... + 4^(l-1) cells above it
+            level_offsets = [0]
+            for level in range(levels + 1):
+                level_offsets.append(level_offsets[-1] + 4 ** level)
+            cells = []
+            for _ in range(number_of_cells):
+                cell_index, number_of_intervals, _ = LastoolsHeader.LAX_CELL.unpack_from(data, position)
+                position += LastoolsHeader.LAX_CELL.size + 8 * number_of_intervals
+                level = 0
+                while level + 1 < len(level_offsets) - 1 and cell_index >= level_offsets[level + 1]:
+                    level += 1
+                level_index = cell_index - level_offsets[level]
+                cell_min_x, cell_max_x, cell_min_y, cell_max_y = min_x, max_x, min_y, max_y
+                # every level halves the cell, two bits of the level index select the quadrant
+                for shift in range(level - 1, -1, -1):
+                    quadrant = (level_index >> (2 * shift)) & 3
+                    mid_x, mid_y = (cell_min_x + cell_max_x) / 2, (cell_min_y + cell_max_y) / 2
+                    if quadrant & 1:
+                        cell_min_x = mid_x
+                    else:
+                        cell_max_x = mid_x
+                    if quadrant & 2:
+                        cell_min_y = mid_y
+                    else:
+                        cell_max_y = mid_y
+                cells.append((cell_min_x, cell_min_y, cell_max_x, cell_max_y))
+            return cells
+        except struct.error:
+            return None
+
+    @staticmethod
+    def overlaps(header, extent):
+        """tells whether points of the file may lie in the extent (min_x, min_y, max_x, max_y)
+
+        the bounding box of the header is checked first and, if there is a '.lax' file next to the LAS/LAZ file, the
+        occupied cells of its spatial index as well.
+        """
+        min_x, min_y, _, max_x, max_y, _ = header["bbox"]
+        if min_x > extent[2] or max_x < extent[0] or min_y > extent[3] or max_y < extent[1]:
+            return False
+        cells = LastoolsHeader.read_lax(os.path.splitext(header["path"])[0] + ".lax")
+        if cells is None:
+            return True
+        return any(
+            cell[0] <= extent[2] and cell[2] >= extent[0] and cell[1] <= extent[3] and cell[3] >= extent[1]
+            for cell in cells
+        )
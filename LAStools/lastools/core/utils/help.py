@@ -1,13 +1,6 @@
 """
 descriptions of all the lastools
 """
-import os
-
-# ../plugins/LAStools/lastools + /assets/img
-paths = {
-    "lastools": f"{os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]}/",
-    "img": f"{os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]}/assets/img/"
-}
 
 descript_template = {
     "info": {
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    history.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import json
+import uuid
+import tempfile
+import threading
+
+from processing.core.ProcessingConfig import ProcessingConfig
+
+
+class LastoolsHistory:
+    """throughput and peak memory of the LAStools tools in earlier runs
+
+    it is kept next to the header catalog. the throughput in points per second of a single process lets plan mode
+    estimate how long a pipeline will take. the peak resident memory is fitted per tool as a line over the points a
+    process read, so that tools holding whole tiles like lasground are told apart from streaming ones like laszip
+    and the number of processes run at once stays within the memory. earlier runs count less with every new one, so
+    the rates and models follow upgrades of the machine or of LAStools.
+    """
+
+    NAME = "lastools_history.json"
+    # weight of the earlier runs when a new run is added
+    DECAY = 0.9
+    # bytes of memory a LAStools process is taken to need per point on top of the point record until its memory
+    # was recorded, e.g. for the TIN
+    MEMORY_PER_POINT = 64
+    # the tools streaming the points through, their memory does not grow with the points, and the bytes they are
+    # taken to need until their memory was recorded
+    STREAMING = ("las2las", "las2txt", "lasindex", "lasinfo", "lasmerge", "lassplit", "lastile", "lasvalidate",
+                 "laszip", "txt2las")
+    STREAMING_MEMORY = 268435456
+    # factor on the fitted memory, runs of the same points vary by the density and the content of the points
+    MEMORY_MARGIN = 1.25
+
+    lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def default():
+        """returns the history kept in the pipeline cache folder, or in the system temporary folder if none is set"""
+        folder = ProcessingConfig.getSetting("LASTOOLS_CACHE_FOLDER")
+        if folder is None or folder == "":
+            folder = tempfile.gettempdir()
+        return LastoolsHistory(os.path.join(folder, LastoolsHistory.NAME))
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, tool, points, seconds):
+        """adds a run of the tool that processed the points in the seconds"""
+        if points <= 0 or seconds <= 0:
+            return
+        with LastoolsHistory.lock:
+            tools = self.load()
+            earlier = tools.get(tool, {})
+            tools[tool] = dict(
+                earlier,
+                points=earlier.get("points", 0.0) * LastoolsHistory.DECAY + points,
+                seconds=earlier.get("seconds", 0.0) * LastoolsHistory.DECAY + seconds,
+                runs=earlier.get("runs", 0) + 1,
+            )
+            self.save(tools)
+
+    def record_memory(self, tool, points, peak):
+        """adds a run of the tool that read the points and took the peak resident memory in bytes"""
+        if points <= 0 or peak is None or peak <= 0:
+            return
+        with LastoolsHistory.lock:
+            tools = self.load()
+            earlier = tools.get(tool, {})
+            # the sums of a least squares fit of the peak over the points, earlier runs weighted down
+            sums = {name: value * LastoolsHistory.DECAY for name, value in earlier.get("memory", {
+                "runs": 0.0, "points": 0.0, "peak": 0.0, "points2": 0.0, "points_peak": 0.0
+            }).items()}
+            sums["runs"] += 1
+            sums["points"] += points
+            sums["peak"] += peak
+            sums["points2"] += points * points
+            sums["points_peak"] += points * peak
+            tools[tool] = dict(earlier, memory=sums)
+            self.save(tools)
+
+    def save(self, tools):
+        temporary = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(tools, file, indent=1)
+            os.replace(temporary, self.path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def rate(self, tool):
+        """returns the points per second the tool processed in earlier runs, or None if it never ran"""
+        earlier = self.load().get(tool)
+        if earlier is None or earlier.get("seconds", 0.0) <= 0:
+            return None
+        return earlier["points"] / earlier["seconds"]
+
+    def memory(self, tool, points, record_length):
+        """returns the peak resident memory in bytes the tool is expected to take for the points, with a margin
+
+        a tool whose memory was never recorded is taken to hold all points, each with the record length in bytes, or
+        to take a small constant memory if it streams the points.
+        """
+        sums = self.load().get(tool, {}).get("memory")
+        if sums is None or sums["runs"] <= 0 or sums["points"] <= 0:
+            if tool in LastoolsHistory.STREAMING:
+                return LastoolsHistory.STREAMING_MEMORY
+            return points * (record_length + LastoolsHistory.MEMORY_PER_POINT)
+        variance = sums["runs"] * sums["points2"] - sums["points"] ** 2
+        slope = (sums["runs"] * sums["points_peak"] - sums["points"] * sums["peak"]) / variance if variance > 0 else 0
+        if variance > 0 and slope >= 0:
+            peak = (sums["peak"] - slope * sums["points"]) / sums["runs"] + slope * points
+        else:
+            # runs of about the same points, or a peak falling with the points, are taken as a peak per point
+            peak = sums["peak"] / sums["points"] * points
+        return max(0.0, peak) * LastoolsHistory.MEMORY_MARGIN
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    jobs.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+job queue on shared storage that runs the per-tile stages of the pipelines on other nodes. it needs nothing but
+Python, so a node without QGIS runs the worker daemon from a copy of this file:
+
+    python3 jobs.py <job queue folder> [--processes N] [--once]
+
+the worker runs up to N jobs at once, all cores by default, and with '--once' exits when the queue is empty. the
+LAStools folder, the temporary directory of the pipelines and their inputs and outputs have to be mounted at the
+same paths on all nodes.
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import socket
+import argparse
+import threading
+import subprocess
+
+
+class LastoolsJobs:
+    """a job queue in a folder on shared storage, one JSON file per job
+
+    a job is submitted into 'pending'. a worker claims it by renaming it into 'running' under a token of its own,
+    which succeeds for one worker only, even over NFS, and counts up a heartbeat next to it while the job runs. the
+    pipeline puts a job whose heartbeat stopped counting back into 'pending', judged by its own clock as the clocks of
+    the nodes differ. the worker publishes the result with the exit code and the console output by renaming its claim
+    into 'done', so a worker whose job was queued again meanwhile publishes nothing. a job to be canceled is marked
+    in 'cancel'.
+    """
+
+    FOLDERS = ("pending", "running", "done", "cancel")
+    # seconds between two looks at the queue, between two heartbeats, and without heartbeat until a job is requeued
+    POLL_INTERVAL = 0.5
+    HEARTBEAT_INTERVAL = 5.0
+    STALE_TIMEOUT = 60.0
+    # seconds a canceled tool has to exit before it is killed
+    TERMINATE_TIMEOUT = 5.0
+    # seconds after which the results no pipeline collected, e.g. after QGIS crashed, are removed by idle workers
+    ORPHAN_TIMEOUT = 86400.0
+    # jobs a pipeline keeps in the queue at once, each waited for by a thread
+    MAX_IN_FLIGHT = 256
+
+    def __init__(self, folder):
+        self.folder = folder
+        for name in LastoolsJobs.FOLDERS:
+            os.makedirs(os.path.join(folder, name), exist_ok=True)
+
+    def job_path(self, state, job_id, token=None, extension=".json"):
+        name = job_id if token is None else f"{job_id}.{token}"
+        return os.path.join(self.folder, state, name + extension)
+
+    @staticmethod
+    def write(path, data):
+        # written to a temporary file first so that no one reads a job or result half written
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def read(path):
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def remove(*paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def claims(self, state, job_id):
+        """returns the tokens under which the job is claimed in the state, 'running' or 'done'"""
+        try:
+            names = os.listdir(os.path.join(self.folder, state))
+        except OSError:
+            return []
+        return [name[len(job_id) + 1:-len(".json")] for name in names
+                if name.startswith(job_id + ".") and name.endswith(".json") and name.count(".") == 2]
+
+    def submit(self, commands, label):
+        """puts the LastoolsCommand into the queue and returns the id of the job"""
+        job_id = uuid.uuid4().hex
+        # only the variables that differ from ours, e.g. those of Wine, the rest is that of the worker
+        environment = {name: value for name, value in (commands.environment() or {}).items()
+                       if os.environ.get(name) != value}
+        LastoolsJobs.write(self.job_path("pending", job_id), {
+            "id": job_id, "tool": commands.tool, "label": label, "argv": commands.argv(), "environment": environment,
+            "submitted": time.time(),
+        })
+        return job_id
+
+    def run(self, commands, feedback, label=None):
+        """runs the LastoolsCommand on a worker, streaming its console output to the feedback once it is done, and
+        returns its exit code"""
+        feedback.pushConsoleInfo("LAStools command line queued for a worker")
+        feedback.pushConsoleInfo(commands.commandline())
+        job_id = self.submit(commands, label)
+        canceled = False
+        heartbeat = None
+        while True:
+            for token in self.claims("done", job_id):
+                try:
+                    result = LastoolsJobs.read(self.job_path("done", job_id, token, ".result"))
+                except (OSError, ValueError):
+                    continue
+                self.collect(job_id)
+                feedback.pushConsoleInfo(f"LAStools console output of {result['worker']}")
+                for line in result["output"]:
+                    feedback.pushConsoleInfo(line)
+                return result["returncode"]
+            if feedback.isCanceled() and not canceled:
+                canceled = True
+                try:
+                    # a job no worker claimed yet is simply taken back
+                    os.remove(self.job_path("pending", job_id))
+                    return -signal.SIGTERM
+                except OSError:
+                    with open(os.path.join(self.folder, "cancel", job_id), "w"):
+                        pass
+            heartbeat = self.requeue_stale(job_id, heartbeat, feedback)
+            time.sleep(LastoolsJobs.POLL_INTERVAL)
+
+    def collect(self, job_id):
+        """removes the result of the job, and any a worker left behind for it"""
+        done = os.path.join(self.folder, "done")
+        LastoolsJobs.remove(*(os.path.join(done, name) for name in os.listdir(done) if name.startswith(job_id + ".")))
+        LastoolsJobs.remove(os.path.join(self.folder, "cancel", job_id))
+
+    def requeue_stale(self, job_id, heartbeat, feedback):
+        """puts the job back into 'pending' if the heartbeat of the worker running it stopped counting, and returns
+        the heartbeat as last seen: its token, its count and when the count last changed by our monotonic clock"""
+        tokens = self.claims("running", job_id)
+        if not tokens:
+            return None
+        token = tokens[0]
+        try:
+            count = LastoolsJobs.read(self.job_path("running", job_id, token, ".heartbeat"))
+        except (OSError, ValueError):
+            count = None
+        if heartbeat is None or heartbeat[:2] != (token, count):
+            return token, count, time.monotonic()
+        if time.monotonic() - heartbeat[2] < LastoolsJobs.STALE_TIMEOUT:
+            return heartbeat
+        try:
+            # fails if the worker published the result meanwhile
+            os.rename(self.job_path("running", job_id, token), self.job_path("pending", job_id))
+        except OSError:
+            return None
+        LastoolsJobs.remove(self.job_path("running", job_id, token, ".heartbeat"))
+        feedback.pushConsoleInfo(f"the worker of job {job_id} stopped, the job is queued again")
+        return None
+
+    def claim(self):
+        """moves the oldest pending job to 'running' under a new token and returns the job and the token, or None if
+        there is none"""
+        pending = os.path.join(self.folder, "pending")
+        names = sorted((name for name in os.listdir(pending) if name.endswith(".json")),
+                       key=lambda name: LastoolsJobs.mtime(os.path.join(pending, name)))
+        for name in names:
+            job_id, token = name[:-len(".json")], uuid.uuid4().hex
+            running = self.job_path("running", job_id, token)
+            try:
+                os.rename(os.path.join(pending, name), running)
+                return LastoolsJobs.read(running), token
+            except (OSError, ValueError):
+                # claimed by another worker meanwhile
+                continue
+        return None
+
+    @staticmethod
+    def mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    def execute(self, job, token, worker):
+        """runs the claimed job, counting up its heartbeat while it runs, and publishes its result if it is still
+        claimed under the token"""
+        running = self.job_path("running", job["id"], token)
+        heartbeat = self.job_path("running", job["id"], token, ".heartbeat")
+        cancel = os.path.join(self.folder, "cancel", job["id"])
+        output = []
+        start = time.time()
+        try:
+            process = subprocess.Popen(job["argv"], stdout=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                                       stderr=subprocess.STDOUT, env=dict(os.environ, **job["environment"]),
+                                       **({"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+                                          if sys.platform == "win32" else {"start_new_session": True}))
+        except OSError as error:
+            returncode = 127
+            output.append(f"could not start {job['tool']}: {error}")
+        else:
+            reader = threading.Thread(target=lambda: output.extend(
+                line.decode("utf-8", errors="replace").rstrip() for line in process.stdout
+            ), daemon=True)
+            reader.start()
+            count, beat = 0, time.monotonic()
+            LastoolsJobs.write(heartbeat, count)
+            while process.poll() is None:
+                if os.path.exists(cancel):
+                    LastoolsJobs.kill(process)
+                    break
+                if time.monotonic() - beat >= LastoolsJobs.HEARTBEAT_INTERVAL:
+                    if not os.path.exists(running):
+                        # the job was queued again, another worker runs it now
+                        LastoolsJobs.kill(process)
+                        break
+                    count, beat = count + 1, time.monotonic()
+                    try:
+                        LastoolsJobs.write(heartbeat, count)
+                    except OSError:
+                        pass
+                time.sleep(LastoolsJobs.POLL_INTERVAL)
+            returncode = process.wait()
+            reader.join(LastoolsJobs.HEARTBEAT_INTERVAL)
+        result = self.job_path("done", job["id"], token, ".result")
+        LastoolsJobs.write(result, {
+            "id": job["id"], "returncode": returncode, "output": output, "worker": worker, "start": start,
+            "end": time.time(),
+        })
+        try:
+            # publishes the result, only while the job is still claimed under the token
+            os.rename(running, self.job_path("done", job["id"], token))
+        except OSError:
+            LastoolsJobs.remove(result)
+        LastoolsJobs.remove(heartbeat)
+
+    def remove_orphans(self):
+        """removes the results no pipeline collected within ORPHAN_TIMEOUT, by the clock of the shared storage"""
+        done = os.path.join(self.folder, "done")
+        clock = os.path.join(done, f"clock.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(clock, "w"):
+                pass
+            now = os.path.getmtime(clock)
+        except OSError:
+            return
+        finally:
+            LastoolsJobs.remove(clock)
+        for name in os.listdir(done):
+            path = os.path.join(done, name)
+            if now - LastoolsJobs.mtime(path) > LastoolsJobs.ORPHAN_TIMEOUT:
+                LastoolsJobs.remove(path)
+
+    @staticmethod
+    def kill(process):
+        """terminates the process group of the tool, escalating to killing it if it does not exit in time"""
+        if sys.platform == "win32":
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+            try:
+                process.wait(LastoolsJobs.TERMINATE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                subprocess.call(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            process.wait()
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            # the group may outlive the tool, so wait until none of its members is left
+            deadline = time.monotonic() + LastoolsJobs.TERMINATE_TIMEOUT
+            while time.monotonic() < deadline:
+                process.poll()
+                os.killpg(process.pid, 0)
+                time.sleep(LastoolsJobs.POLL_INTERVAL / 5)
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+    def work(self, processes, once=False):
+        """runs the jobs of the queue on up to 'processes' threads, until stopped or, with once, the queue is empty"""
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        slots = threading.Semaphore(processes)
+        threads = []
+        swept = None
+        while True:
+            slots.acquire()
+            claimed = self.claim()
+            if claimed is None:
+                slots.release()
+                threads = [thread for thread in threads if thread.is_alive()]
+                if once and not threads:
+                    return
+                if swept is None or time.monotonic() - swept > LastoolsJobs.STALE_TIMEOUT:
+                    swept = time.monotonic()
+                    self.remove_orphans()
+                time.sleep(LastoolsJobs.POLL_INTERVAL)
+                continue
+
+            def execute(job=claimed[0], token=claimed[1]):
+                try:
+                    self.execute(job, token, worker)
+                finally:
+                    slots.release()
+
+            threads.append(threading.Thread(target=execute, daemon=True))
+            threads[-1].start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="runs the jobs the LAStools pipelines put into a job queue")
+    parser.add_argument("folder", help="job queue folder on shared storage")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="jobs run at once")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    arguments = parser.parse_args()
+    LastoolsJobs(arguments.folder).work(max(1, arguments.processes), arguments.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
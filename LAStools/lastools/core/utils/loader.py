@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    loader.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import subprocess
+
+from qgis.core import (QgsApplication, QgsTask, QgsRasterLayer, QgsVectorLayer, QgsPointCloudLayer, QgsMessageLog,
+                       Qgis)
+
+
+class LastoolsLayerTask(QgsTask):
+    """opens a product of LAStools in the background and adds it to the project once it is ready
+
+    opening a multi-GB raster, vector or point cloud scans it, which in the UI thread freezes QGIS. the layer is
+    opened in the task and only added to the project in finished(), which runs in the UI thread. a point cloud is
+    opened from its COPC or EPT index, the COPC index is built next to it first if there is none.
+    """
+
+    def __init__(self, path, kind, project, name=None):
+        super().__init__(f"loading {os.path.basename(path)}", QgsTask.CanCancel)
+        self.path = path
+        self.kind = kind
+        self.project = project
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        self.layer = None
+        self.error = None
+
+    def run(self):
+        if self.kind == "raster":
+            self.layer = QgsRasterLayer(self.path, self.name)
+        elif self.kind == "vector":
+            self.layer = QgsVectorLayer(self.path, self.name, "ogr")
+        else:
+            index = LastoolsLoader.point_cloud_index(self.path)
+            if index == self.path:
+                index, self.error = LastoolsLoader.build_index(self.path, self)
+                if index is None:
+                    return False
+            self.layer = QgsPointCloudLayer(index, self.name, "ept" if index.endswith(".json") else "copc")
+        if self.isCanceled():
+            return False
+        if not self.layer.isValid():
+            self.error = self.layer.error().summary()
+            return False
+        # layers belong to the thread that created them, the project lives in the UI thread
+        self.layer.moveToThread(QgsApplication.instance().thread())
+        return True
+
+    def finished(self, result):
+        LastoolsLoader.tasks.discard(self)
+        if result:
+            self.project.addMapLayer(self.layer)
+        elif self.error is not None:
+            QgsMessageLog.logMessage(f"could not load {self.path}: {self.error}", "LAStools", Qgis.Warning)
+
+
+class LastoolsLoader:
+    """loads the products of the algorithms into the project with background tasks"""
+
+    # the tasks are referenced until they are finished, QGIS does not keep the Python objects alive
+    tasks = set()
+    # seconds between looks at whether the task was canceled while untwine indexes
+    POLL_INTERVAL = 0.5
+
+    @staticmethod
+    def point_cloud_index(path):
+        """returns the COPC or EPT index of the point cloud, if one was built next to it, or the point cloud"""
+        base = os.path.splitext(path)[0]
+        for index in (base + ".copc.laz", os.path.join(os.path.dirname(path), "ept_" + os.path.basename(base),
+                                                       "ept.json")):
+            if os.path.exists(index):
+                return index
+        return path
+
+    @staticmethod
+    def untwine():
+        """returns the untwine executable QGIS builds its point cloud indexes with, or None"""
+        for name in ("untwine", "untwine.exe"):
+            executable = os.path.join(QgsApplication.libexecPath(), name)
+            if os.path.isfile(executable):
+                return executable
+        return None
+
+    @staticmethod
+    def build_index(path, task):
+        """builds the COPC index '<name>.copc.laz' of the point cloud with untwine and returns it and an error message
+        or None. the index is written to a temporary file first, an index that is there is always complete"""
+        untwine = LastoolsLoader.untwine()
+        if untwine is None:
+            return None, "untwine, which builds the COPC index, is not installed with QGIS"
+        index = os.path.splitext(path)[0] + ".copc.laz"
+        temporary = os.path.splitext(path)[0] + ".tmp.copc.laz"
+        process = subprocess.Popen([untwine, f"--files={path}", f"--output_dir={temporary}", "--single_file"],
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        while True:
+            try:
+                error = process.communicate(timeout=LastoolsLoader.POLL_INTERVAL)[1]
+                break
+            except subprocess.TimeoutExpired:
+                if task.isCanceled():
+                    process.kill()
+        error = error.decode("utf-8", errors="replace").strip()
+        if process.returncode != 0 or not os.path.isfile(temporary):
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return None, None if task.isCanceled() else f"untwine failed: {error or process.returncode}"
+        os.replace(temporary, index)
+        return index, None
+
+    @staticmethod
+    def load(path, kind, project, name=None):
+        """starts a task that adds the raster, vector or point cloud file to the project"""
+        task = LastoolsLayerTask(path, kind, project, name)
+        LastoolsLoader.tasks.add(task)
+        QgsApplication.taskManager().addTask(task)
+        return task
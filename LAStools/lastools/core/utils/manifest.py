@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    manifest.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import json
+import threading
+
+
+class LastoolsManifest:
+    """checkpoint of one pipeline stage, kept as JSON in the 'manifests' folder of the temporary directory
+
+    for every task of the stage (one per tile, or a single one for stages that need all tiles) it records the
+    command line, the inputs and the outputs with their sizes and modification times. a task whose command line
+    and inputs are unchanged and whose outputs are still there is complete and does not have to run again.
+    """
+
+    def __init__(self, temporary_directory, name):
+        self.path = os.path.join(temporary_directory, "manifests", name + ".json")
+        self.lock = threading.Lock()
+        self.records = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path) as manifest:
+                    self.records = json.load(manifest)
+            except (OSError, ValueError):
+                self.records = {}
+
+    @staticmethod
+    def file_states(files):
+        """returns the [size, mtime] of every file, or None for files that do not exist"""
+        states = {}
+        for file in files:
+            try:
+                stat = os.stat(file)
+                states[file] = [stat.st_size, stat.st_mtime_ns]
+            except OSError:
+                states[file] = None
+        return states
+
+    def is_complete(self, key, commands, inputs):
+        record = self.records.get(key)
+        if record is None or record["commands"] != list(commands):
+            return False
+        if record["inputs"] != LastoolsManifest.file_states(inputs):
+            return False
+        return record["outputs"] == LastoolsManifest.file_states(record["outputs"])
+
+    def outputs(self, key):
+        return list(self.records[key]["outputs"])
+
+    def record(self, key, commands, inputs, outputs):
+        with self.lock:
+            self.records[key] = {
+                "commands": list(commands),
+                "inputs": LastoolsManifest.file_states(inputs),
+                "outputs": LastoolsManifest.file_states(outputs),
+            }
+            # written to a temporary file first so that a crash never leaves a truncated manifest behind
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w") as manifest:
+                json.dump(self.records, manifest, indent=1)
+            os.replace(self.path + ".tmp", self.path)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    mosaic.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+
+from osgeo import gdal
+
+
+class LastoolsMosaic:
+    """GDAL VRT mosaics of the rasters of the tiles, in place of merging them with 'lasgrid -merged'
+
+    the rasters of the tiles are cut to their tile with '-use_tile_bb' and do not overlap, so a VRT referencing them
+    is the merged raster and opens at once in QGIS. the rasters of several layers of the same tiles, like the partial
+    CHMs of a pit-free CHM, are combined with the highest value of the layers per cell, as 'lasgrid -highest' does.
+    """
+
+    # the no data value of the rasters of las2dem and lasgrid
+    NODATA = -9999.0
+    # extensions of the raster formats of LAStools that GDAL reads, other files of a tile are sidecars like '.hdr'
+    RASTERS = (".tif", ".bil", ".img", ".asc", ".xyz", ".png", ".jpg")
+    # version of GDAL that brought the 'max' pixel function
+    PIXEL_FUNCTION_MAX = 3080000
+
+    @staticmethod
+    def rasters(files):
+        return sorted(file for file in files if os.path.splitext(file)[1].lower() in LastoolsMosaic.RASTERS)
+
+    @staticmethod
+    def build(output_file, layers):
+        """writes the VRT combining the layers, each a list of raster files, and returns an error message or None"""
+        layers = [layer for layer in layers if layer]
+        if not layers:
+            return f"no rasters to mosaic into {output_file}"
+        options = gdal.BuildVRTOptions(srcNodata=LastoolsMosaic.NODATA, VRTNodata=LastoolsMosaic.NODATA)
+        if len(layers) == 1 or int(gdal.VersionInfo()) < LastoolsMosaic.PIXEL_FUNCTION_MAX:
+            # without the 'max' pixel function the layers are stacked in order, so the later layers win where they
+            # have a value, which for partial CHMs of increasing height levels is the highest
+            dataset = gdal.BuildVRT(output_file, [file for layer in layers for file in layer], options=options)
+            if dataset is None:
+                return gdal.GetLastErrorMsg()
+            dataset = None
+            return None
+        # one VRT per layer, all on the grid of the union of the layers so that their cells line up
+        union = gdal.BuildVRT("", [file for layer in layers for file in layer], options=options)
+        if union is None:
+            return gdal.GetLastErrorMsg()
+        geotransform, projection = union.GetGeoTransform(), union.GetProjection()
+        width, height = union.RasterXSize, union.RasterYSize
+        bounds = (geotransform[0], geotransform[3] + height * geotransform[5],
+                  geotransform[0] + width * geotransform[1], geotransform[3])
+        union = None
+        base = os.path.splitext(output_file)[0]
+        layer_files = []
+        for index, layer in enumerate(layers):
+            layer_files.append(f"{base}_layer{index}.vrt")
+            dataset = gdal.BuildVRT(layer_files[-1], layer, options=gdal.BuildVRTOptions(
+                srcNodata=LastoolsMosaic.NODATA, VRTNodata=LastoolsMosaic.NODATA, outputBounds=bounds,
+                xRes=geotransform[1], yRes=-geotransform[5]
+            ))
+            if dataset is None:
+                return gdal.GetLastErrorMsg()
+            dataset = None
+        dataset = gdal.GetDriverByName("VRT").Create(output_file, width, height, 0)
+        dataset.SetGeoTransform(geotransform)
+        dataset.SetProjection(projection)
+        dataset.AddBand(gdal.GDT_Float32, ["subClass=VRTDerivedRasterBand", "PixelFunctionType=max"])
+        band = dataset.GetRasterBand(1)
+        band.SetNoDataValue(LastoolsMosaic.NODATA)
+        for index, layer_file in enumerate(layer_files):
+            band.SetMetadataItem(
+                f"source_{index}",
+                f'<SimpleSource><SourceFilename relativeToVRT="1">{os.path.basename(layer_file)}</SourceFilename>'
+                f'<SourceBand>1</SourceBand></SimpleSource>',
+                "new_vrt_sources"
+            )
+        band = None
+        dataset = None
+        return None
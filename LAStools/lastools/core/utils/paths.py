@@ -0,0 +1,10 @@
+"""
+paths of the plugin folders
+"""
+import os
+
+# ../plugins/LAStools/lastools + /assets/img
+paths = {
+    "lastools": f"{os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]}/",
+    "img": f"{os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]}/assets/img/"
+}
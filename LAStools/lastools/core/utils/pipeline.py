@@ -0,0 +1,857 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    pipeline.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import glob
+import math
+import time
+import heapq
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from qgis.core import QgsProcessingException
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from .utils import LastoolsUtils
+from .scheduler import LastoolsScheduler, LastoolsFileFeedback
+from .manifest import LastoolsManifest
+from .cache import LastoolsCache
+from .header import LastoolsHeader
+from .catalog import LastoolsCatalog
+from .history import LastoolsHistory
+
+
+class LastoolsPipeline:
+    """runs the per-tile stages of a pipeline as a DAG of (tile, stage) tasks
+
+    a stage is started for a tile as soon as the stage it depends on has finished that very tile, so tiles flow
+    through the pipeline independently instead of waiting for the slowest tile at every stage. stages are named by
+    the appendix they add to the tile name ("_g", "_gh", ...) and depend on the stage that produced their input.
+
+    every stage keeps a manifest in the temporary directory, so a pipeline that is run again with the same temporary
+    directory skips the tiling, the tiles and the merge that are complete and whose inputs did not change. when a
+    cache folder is configured the tiling and the per-tile stages are also looked up in the shared LastoolsCache.
+
+    in a managed scratch directory, see LastoolsUtils.create_scratch_directory, the files of a tile are deleted as soon
+    as every stage reading them is done, the final products are written there too and then moved to their output
+    directory, and the directory is removed when the pipeline is done.
+
+    the tiling itself runs at the start of run(), once a preflight has checked the estimated disk usage and memory
+    of all stages against the node. in plan mode nothing runs: the stages are collected and run() shows them with
+    the estimated number of tiles, temporary disk usage and runtime, the latter from the throughput of earlier runs
+    kept in LastoolsHistory.
+    """
+
+    # cells per side of the density grid an auto tile size is computed from
+    DENSITY_GRID = 64
+    # points per tile, with its buffer, an auto tile size aims at
+    POINTS_PER_TILE = 10000000
+    # times an adaptive tiling may halve its largest tiles
+    QUADTREE_LEVELS = 6
+
+    def __init__(self, temporary_directory, base_name, cores, feedback, plan=False):
+        self.temporary_directory = temporary_directory
+        self.base_name = base_name
+        self.cores = max(1, cores)
+        self.feedback = feedback
+        self.stages = {}
+        self.manifests = {}
+        self.cache = LastoolsCache.from_settings()
+        self.keys = {}
+        self.plan = plan
+        self.history = LastoolsHistory.default()
+        self.tiling = None
+        # the stages whose products a mosaic took out of the scratch directory
+        self.mosaicked = set()
+        self.managed = temporary_directory in LastoolsUtils.scratch_directories
+        job_queue = ProcessingConfig.getSetting("LASTOOLS_JOB_QUEUE")
+        self.jobs = None
+        if job_queue:
+            from .jobs import LastoolsJobs
+            self.jobs = LastoolsJobs(job_queue)
+
+    def manifest(self, name):
+        if name not in self.manifests:
+            self.manifests[name] = LastoolsManifest(self.temporary_directory, self.base_name + name)
+        return self.manifests[name]
+
+    def cache_commands(self, commands):
+        """returns the command line without the temporary directory, which differs from run to run"""
+        return [command.replace(self.temporary_directory, "") for command in commands]
+
+    def run_barrier(self, name, commands, input_files, output_wildcard, key=None, points=None, run=None):
+        """runs a stage that needs all its inputs at once unless its manifest shows that it is complete
+
+        the outputs of the stage are the files matching the wildcard that the run created or modified. with a key
+        the outputs are fetched from, or added to, the cache. the throughput of a run over the given number of
+        points is added to the history. a stage that is not run as the commands gives the function running it.
+        """
+        manifest = self.manifest(name)
+        if manifest.is_complete("", commands, input_files):
+            self.feedback.pushConsoleInfo(f"{self.base_name}{name} is complete and its inputs did not change, skipped")
+            return 0
+        if key is not None and self.cache is not None:
+            outputs = self.cache.fetch(key, os.path.dirname(output_wildcard))
+            if outputs is not None:
+                self.feedback.pushConsoleInfo(f"{self.base_name}{name} restored from the cache")
+                manifest.record("", commands, input_files, outputs)
+                return 0
+        before = LastoolsManifest.file_states(glob.glob(output_wildcard))
+        started = time.perf_counter()
+        returncode = run() if run is not None else LastoolsUtils.run_lastools(commands, self.feedback)
+        if returncode == 0 and not self.feedback.isCanceled():
+            if points:
+                self.history.record(commands.tool, points, time.perf_counter() - started)
+            after = LastoolsManifest.file_states(glob.glob(output_wildcard))
+            outputs = [file for file in after if before.get(file) != after[file]]
+            manifest.record("", commands, input_files, outputs)
+            if key is not None and self.cache is not None:
+                self.cache.store(key, outputs)
+        return returncode
+
+    def run_tiling(self, commands, input_files, adaptive=False):
+        """sets lastile to tile the input files into '<base_name>*.laz' in the temporary directory when run() starts
+
+        an adaptive tiling uses the tiles of a quadtree, see quadtree(), with the tile size as the smallest tile. its
+        tiles are cut from those of a first tiling and cannot be reversed, a '-reversible' tiling is always uniform.
+        """
+        headers = LastoolsCatalog.default().headers([file for file in input_files if os.path.isfile(file)])
+        self.tiling = {"commands": commands, "input_files": input_files, "headers": headers, "quadtree": None}
+        if adaptive and "-reversible" in commands[1:]:
+            self.feedback.reportError("a reversible tiling cannot be adaptive, tiling uniformly")
+        elif adaptive:
+            tile_size = float(commands.option("-tile_size", 1000.0))
+            quadtree = LastoolsPipeline.quadtree(
+                LastoolsPipeline.grid_tiles(headers, max(1, round(tile_size))), tile_size,
+                float(commands.option("-buffer", 0.0)), LastoolsPipeline.points_per_tile(), self.cores
+            )
+            if quadtree:
+                self.tiling["quadtree"] = quadtree
+            else:
+                self.feedback.reportError("no point density in the headers of the input files, tiling uniformly")
+        return 0
+
+    def tile(self):
+        """runs the tiling and returns its exit code"""
+        commands, input_files, headers = self.tiling["commands"], self.tiling["input_files"], self.tiling["headers"]
+        output_wildcard = os.path.join(self.temporary_directory, self.base_name + "*.laz")
+        quadtree = self.tiling["quadtree"]
+        if quadtree is None:
+            self.keys[""] = LastoolsCache.key(self.cache_commands(commands), LastoolsCache.file_identity(input_files))
+            returncode = self.run_barrier(
+                "", commands, input_files, output_wildcard, self.keys[""],
+                sum(header["point_count"] for header in headers)
+            )
+        else:
+            # the tiles of the quadtree are part of what the tiling depends on
+            signature = commands.copy()
+            signature.extend(["-quadtree"] + [f"{x}_{y}_{size}" for x, y, size in quadtree])
+            self.keys[""] = LastoolsCache.key(self.cache_commands(signature), LastoolsCache.file_identity(input_files))
+            returncode = self.run_barrier(
+                "", signature, input_files, output_wildcard, self.keys[""],
+                run=lambda: self.run_quadtree(commands, quadtree)
+            )
+        return returncode
+
+    def run_quadtree(self, commands, quadtree):
+        """tiles the inputs into the tiles of the quadtree and returns the worst exit code
+
+        the inputs are read once, by lastile tiling them into the smallest tiles without buffer. the quadtree is then
+        built anew from the points of these grid tiles, and every tile of it is tiled by lastile from the grid tiles
+        it overlaps with its buffer, into a folder of its own as that run also creates the neighbouring tiles from
+        the points in the buffer. only the tile it was run for is moved to the output directory.
+        """
+        buffer = float(commands.option("-buffer", 0.0))
+        smallest = min(size for _, _, size in quadtree)
+        base = os.path.splitext(os.path.basename(commands.option("-o", self.base_name)))[0]
+        output_directory = self.task_output_directory(commands)
+        quadtree_directory = os.path.join(self.temporary_directory, "quadtree")
+        grid_directory = os.path.join(quadtree_directory, "grid")
+        os.makedirs(grid_directory, exist_ok=True)
+        grid_commands = commands.with_option("-tile_size", str(float(smallest))).with_option("-odir", grid_directory)
+        if "-buffer" in grid_commands[1:]:
+            grid_commands = grid_commands.with_option("-buffer", "0")
+        self.feedback.pushConsoleInfo(f"tiling into grid tiles of {smallest} to build the quadtree tiles from")
+        returncode = LastoolsUtils.run_lastools(grid_commands, self.feedback)
+        if returncode != 0 or self.feedback.isCanceled():
+            shutil.rmtree(quadtree_directory, ignore_errors=True)
+            return returncode
+        grid_files, grid_tiles = {}, {}
+        for file in glob.glob(os.path.join(grid_directory, base + "_*.laz")):
+            try:
+                header = LastoolsHeader.read(file)
+            except (OSError, ValueError):
+                continue
+            key = (math.floor(header["bbox"][0] / smallest), math.floor(header["bbox"][1] / smallest))
+            grid_files[key] = file
+            grid_tiles[key] = float(header["point_count"])
+        # from the points of the grid tiles rather than from the headers of the inputs
+        quadtree = LastoolsPipeline.quadtree(grid_tiles, smallest, buffer, LastoolsPipeline.points_per_tile(),
+                                             self.cores)
+        # the tiles of a later stage are the tiles of the flightlines, not the grid tiles
+        commands = commands.without_inputs()
+        if "-files_are_flightlines" in commands[1:]:
+            commands.remove("-files_are_flightlines")
+        lock = threading.Lock()
+        progress = [0.0] * len(quadtree)
+        self.feedback.pushConsoleInfo(
+            f"tiling {len(grid_files)} grid tiles into {len(quadtree)} quadtree tiles of {smallest} to "
+            f"{max((size for _, _, size in quadtree), default=smallest)} with up to {self.cores} LAStools processes"
+        )
+
+        def run_tile(index):
+            x, y, size = quadtree[index]
+            tile = f"{base}_{x}_{y}"
+            if self.feedback.isCanceled():
+                return 1
+            files = [grid_files[(column, row)]
+                     for column in range(math.floor((x - buffer) / smallest), math.ceil((x + size + buffer) / smallest))
+                     for row in range(math.floor((y - buffer) / smallest), math.ceil((y + size + buffer) / smallest))
+                     if (column, row) in grid_files]
+            task_feedback = LastoolsFileFeedback(self.feedback, lock, tile, progress, index)
+            if size == smallest and buffer == 0.0:
+                # the grid tile is the tile
+                os.replace(files[0], os.path.join(output_directory, tile + ".laz"))
+                task_feedback.setProgress(100.0)
+                return 0
+            directory = os.path.join(quadtree_directory, tile)
+            os.makedirs(directory, exist_ok=True)
+            list_of_files = os.path.join(directory, "grid_tiles.txt")
+            with open(list_of_files, "w") as file:
+                file.write("\n".join(commands.tool_path(grid_file) for grid_file in files) + "\n")
+            tile_commands = commands.with_option("-tile_size", str(float(size))).with_option("-odir", directory)
+            tile_commands.add_input("-lof", list_of_files)
+            tile_commands.append("-inside")
+            tile_commands.extend(str(float(value)) for value in (x - buffer, y - buffer, x + size + buffer,
+                                                                 y + size + buffer))
+            returncode = LastoolsUtils.run_lastools(tile_commands, task_feedback)
+            if returncode == 0:
+                for file in glob.glob(os.path.join(directory, tile + ".*")):
+                    os.replace(file, os.path.join(output_directory, os.path.basename(file)))
+            shutil.rmtree(directory, ignore_errors=True)
+            task_feedback.setProgress(100.0)
+            return returncode
+
+        with ThreadPoolExecutor(max_workers=self.cores) as executor:
+            returncodes = list(executor.map(run_tile, range(len(quadtree))))
+        shutil.rmtree(quadtree_directory, ignore_errors=True)
+        return max(returncodes, key=abs, default=0)
+
+    def run_merge(self, commands, input_wildcard, output_file):
+        """runs the final stage that merges the tiles matching the wildcard into the output file and returns its exit
+        code, raises QgsProcessingException if it fails"""
+        if self.plan:
+            self.feedback.pushConsoleInfo(f"finally {commands.tool} merges '{input_wildcard}' into {output_file}")
+            self.feedback.pushConsoleInfo("plan: " + commands.commandline())
+            return 0
+        input_files = sorted(glob.glob(os.path.join(self.temporary_directory, input_wildcard)))
+        if not self.managed or "-o" not in commands[1:]:
+            returncode = self.run_barrier("_merged", commands, input_files, output_file)
+            self.check(returncode, f"{commands.tool} merging the tiles into {output_file}")
+            return returncode
+        # the output is written next to the tiles and moved to its destination once it is complete
+        staging_directory = os.path.join(self.temporary_directory, "merged")
+        os.makedirs(staging_directory, exist_ok=True)
+        staged_file = os.path.join(staging_directory, os.path.basename(output_file))
+        returncode = self.run_barrier("_merged", commands.with_option("-o", staged_file), input_files, staged_file)
+        if returncode == 0 and not self.feedback.isCanceled():
+            LastoolsPipeline.move_outputs(
+                [os.path.join(staging_directory, file) for file in os.listdir(staging_directory)],
+                os.path.dirname(output_file)
+            )
+        self.remove_scratch_directory(returncode)
+        self.check(returncode, f"{commands.tool} merging the tiles into {output_file}")
+        return returncode
+
+    def run_mosaic(self, output_file, names):
+        """writes a VRT mosaicking the rasters the stages with the names wrote for all tiles, in place of a merge
+
+        the VRT is written as '<output>.vrt'. rasters in the temporary directory are moved there, or linked when the
+        directory is kept, into the folder '<output>_tiles' next to it, other rasters are referenced where they are.
+        raises QgsProcessingException if the VRT cannot be written.
+        """
+        # GDAL is only loaded by the pipelines that mosaic
+        from .mosaic import LastoolsMosaic
+        if output_file == "":
+            raise QgsProcessingException("a VRT mosaic needs an output file")
+        output_file = os.path.splitext(output_file)[0] + ".vrt"
+        if self.plan:
+            layers = ", ".join(f"'*{name}'" for name in names)
+            self.feedback.pushConsoleInfo(f"finally the rasters of {layers} are mosaicked into {output_file}")
+            return 0
+        tiles_directory = os.path.splitext(output_file)[0] + "_tiles"
+        layers = []
+        for name in names:
+            manifest = self.manifest(name)
+            files = []
+            for file in (file for tile in manifest.records for file in manifest.outputs(tile)):
+                if os.path.dirname(os.path.abspath(file)) == os.path.abspath(self.temporary_directory):
+                    os.makedirs(tiles_directory, exist_ok=True)
+                    target = os.path.join(tiles_directory, os.path.basename(file))
+                    if os.path.exists(target):
+                        os.remove(target)
+                    if self.managed:
+                        shutil.move(file, target)
+                    else:
+                        try:
+                            os.link(file, target)
+                        except OSError:
+                            shutil.copy2(file, target)
+                    file = target
+                files.append(file)
+            layers.append(LastoolsMosaic.rasters(files))
+        self.mosaicked.update(names)
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        error = LastoolsMosaic.build(output_file, layers)
+        if error is None:
+            self.feedback.pushConsoleInfo(
+                f"{output_file} mosaics {sum(len(layer) for layer in layers)} rasters of the tiles"
+            )
+            returncode = 0
+        else:
+            returncode = 1
+        if returncode != 0 or self.mosaicked.issuperset(self.scratch_leaves()):
+            # the scratch directory still holds the products of stages that a later mosaic takes out of it
+            self.remove_scratch_directory(returncode)
+        if error is not None:
+            raise QgsProcessingException(f"the VRT mosaic {output_file} failed: {error}")
+        return returncode
+
+    def add_stage(self, commands, input_appendix, output_appendix):
+        """adds a stage that runs the commands on '<tile><input_appendix>.laz' and produces '<tile><output_appendix>'"""
+        if input_appendix != "" and input_appendix not in self.stages:
+            raise ValueError(f"no stage produces the input '{self.base_name}*{input_appendix}.laz'")
+        depth = self.stages[input_appendix]["depth"] + 1 if input_appendix != "" else 0
+        final_directory = None
+        if self.managed and self.task_output_directory(commands) != self.temporary_directory:
+            # a stage writing elsewhere produces final products, which are written to the scratch directory first
+            final_directory = self.task_output_directory(commands)
+            commands = commands.with_option("-odir", self.temporary_directory)
+        self.stages[output_appendix] = {
+            "commands": commands, "input_appendix": input_appendix, "depth": depth, "children": [],
+            "final_directory": final_directory
+        }
+        if input_appendix != "":
+            self.stages[input_appendix]["children"].append(output_appendix)
+
+    def leaves(self):
+        """returns the names of the stages that no other stage reads, in the order they were added"""
+        return [name for name, stage in self.stages.items() if not stage["children"]]
+
+    def scratch_leaves(self):
+        """returns the names of the last stages whose products stay in the scratch directory"""
+        return [name for name in self.leaves() if self.stages[name]["final_directory"] is None]
+
+    def tiles(self):
+        """returns the names of the tiles created by lastile, largest first"""
+        tiling = self.manifest("")
+        if "" in tiling.records:
+            # leftovers of the per-tile stages of an earlier run match the wildcard as well
+            files = sorted(tiling.outputs(""), key=lambda file: (-os.path.getsize(file), file))
+        else:
+            files = LastoolsScheduler.expand_input_files(self.temporary_directory, [self.base_name + "*.laz"])
+        return [os.path.basename(file)[:-4] for file in files]
+
+    def task(self, tile, name):
+        """returns the input file and the command line of the stage for the tile"""
+        stage = self.stages[name]
+        input_file = os.path.join(self.temporary_directory, tile + stage["input_appendix"] + ".laz")
+        return input_file, stage["commands"].with_input(input_file)
+
+    def task_key(self, tile, name):
+        """returns the cache key of the stage for the tile, chained to the key of the stage that produced its input"""
+        if (tile, name) not in self.keys:
+            input_appendix = self.stages[name]["input_appendix"]
+            input_key = self.task_key(tile, input_appendix) if input_appendix != "" else self.keys.get("")
+            self.keys[(tile, name)] = LastoolsCache.key(input_key, tile, self.cache_commands(self.task(tile, name)[1]))
+        return self.keys[(tile, name)]
+
+    def task_output_directory(self, commands):
+        return commands.option("-odir", self.temporary_directory)
+
+    def task_outputs(self, tile, name, commands):
+        """returns the files the stage wrote for the tile, named '<tile><output_appendix>.*' in its '-odir'"""
+        return glob.glob(os.path.join(self.task_output_directory(commands), tile + name + ".*"))
+
+    def check(self, returncode, what):
+        """raises QgsProcessingException if what ran failed, so that nothing is built from what it left behind"""
+        if returncode != 0 and not self.feedback.isCanceled():
+            raise QgsProcessingException(f"{what} failed with exit code {returncode}")
+
+    def run(self, merged=False):
+        """runs all stages for all tiles and returns the exit code of every (tile, stage) task
+
+        merged tells that a merge or mosaic of the products of the last stages follows, which takes them out of a
+        managed scratch directory. without one, stages that write their products into the scratch directory are
+        refused, it is removed once the run is done. raises QgsProcessingException for them, and if the tiling or a
+        stage of a tile fails, unless the feedback was canceled, as a merge or mosaic of the tiles would then miss
+        some of them.
+        """
+        kept = self.scratch_leaves()
+        if self.managed and not merged and kept:
+            self.remove_scratch_directory(0)
+            raise QgsProcessingException(
+                f"the products '{self.base_name}*{kept[0]}' would be written to the scratch directory, which is "
+                f"removed once the run is done, set an output directory or a temporary directory"
+            )
+        if self.plan:
+            # the scratch directory is still named by the plan of the merge, the algorithm removes it once it is done
+            self.show_plan()
+            return {}
+        if self.tiling is not None:
+            self.preflight()
+            returncode = self.tile()
+            if returncode != 0 or self.feedback.isCanceled():
+                self.remove_scratch_directory(returncode)
+                self.check(returncode, "the tiling")
+                return {}
+        tiles = self.tiles()
+        roots = [name for name, stage in self.stages.items() if stage["input_appendix"] == ""]
+        results = {}
+        if not tiles:
+            self.remove_scratch_directory(0)
+            raise QgsProcessingException(f"no tiles '{self.base_name}*.laz' found in the temporary directory")
+        names = list(self.stages)
+        lock = threading.Lock()
+        progress = [0.0] * (len(tiles) * len(names))
+        # deeper stages go first so that tiles are finished early rather than all advanced in lock-step
+        ready = [(0, index, name) for index in range(len(tiles)) for name in roots]
+        heapq.heapify(ready)
+        # the number of stages that still have to read a file of a tile, "" standing for the tile itself
+        readers = {}
+        for stage in self.stages.values():
+            readers[stage["input_appendix"]] = readers.get(stage["input_appendix"], 0) + 1
+        remaining = {(index, appendix): count for index in range(len(tiles)) for appendix, count in readers.items()}
+
+        def read(index, name):
+            appendix = self.stages[name]["input_appendix"]
+            remaining[(index, appendix)] -= 1
+            if remaining[(index, appendix)] == 0 and self.managed:
+                self.remove_intermediates(tiles[index], appendix)
+
+        def run_task(index, name):
+            tile = tiles[index]
+            input_file, commands = self.task(tile, name)
+            task_feedback = LastoolsFileFeedback(
+                self.feedback, lock, f"{tile}{name}", progress, index * len(names) + names.index(name)
+            )
+            key = self.task_key(tile, name) if self.cache is not None and "" in self.keys else None
+            outputs = self.cache.fetch(key, self.task_output_directory(commands)) if key is not None else None
+            if outputs is not None:
+                task_feedback.pushConsoleInfo("restored from the cache")
+                returncode = 0
+            else:
+                if self.jobs is not None:
+                    # the worker writes the outputs to the shared temporary directory. the throughput of other
+                    # nodes, which includes the wait in the queue, is not that of this one
+                    returncode = self.jobs.run(commands, task_feedback, f"{tile}{name}")
+                else:
+                    started = time.perf_counter()
+                    returncode = LastoolsUtils.run_lastools(commands, task_feedback)
+                    if returncode == 0:
+                        self.record_throughput(commands.tool, input_file, time.perf_counter() - started)
+                outputs = self.task_outputs(tile, name, commands)
+                if returncode == 0 and key is not None and not self.feedback.isCanceled():
+                    self.cache.store(key, outputs)
+            if returncode == 0 and not self.feedback.isCanceled():
+                if self.stages[name]["final_directory"] is not None:
+                    outputs = LastoolsPipeline.move_outputs(outputs, self.stages[name]["final_directory"])
+                self.manifest(name).record(tile, commands, [input_file], outputs)
+            task_feedback.setProgress(100.0)
+            return returncode
+
+        parallel = self.cores
+        if self.jobs is not None:
+            # the workers decide how many run at once, the queue is kept filled
+            parallel = self.jobs.MAX_IN_FLIGHT
+            self.feedback.pushConsoleInfo(f"queuing {len(names)} stages for {len(tiles)} tiles in {self.jobs.folder}")
+        else:
+            self.feedback.pushConsoleInfo(
+                f"running {len(names)} stages for {len(tiles)} tiles with up to {self.cores} LAStools processes"
+            )
+        running = {}
+        skipped = 0
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            while ready or running:
+                while ready and len(running) < parallel and not self.feedback.isCanceled():
+                    _, index, name = heapq.heappop(ready)
+                    input_file, commands = self.task(tiles[index], name)
+                    if self.manifest(name).is_complete(tiles[index], commands, [input_file]):
+                        # complete in an earlier run with the very same input, so only its children are left
+                        skipped += 1
+                        results[(tiles[index], name)] = 0
+                        progress[index * len(names) + names.index(name)] = 100.0
+                        read(index, name)
+                        for child in self.stages[name]["children"]:
+                            heapq.heappush(ready, (-self.stages[child]["depth"], index, child))
+                        continue
+                    running[executor.submit(run_task, index, name)] = (index, name)
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, name = running.pop(future)
+                    returncode = future.result()
+                    results[(tiles[index], name)] = returncode
+                    if returncode != 0:
+                        if not self.feedback.isCanceled():
+                            self.feedback.reportError(f"{tiles[index]}{name} failed with exit code {returncode}")
+                        continue
+                    read(index, name)
+                    for child in self.stages[name]["children"]:
+                        heapq.heappush(ready, (-self.stages[child]["depth"], index, child))
+        if skipped:
+            self.feedback.pushConsoleInfo(f"{skipped} tasks were complete from an earlier run and skipped")
+        failed = [task for task, returncode in results.items() if returncode != 0]
+        # unless a merge still needs the final products of the tiles, the scratch directory is done with, it is kept
+        # to look into if a stage failed
+        if failed or self.feedback.isCanceled() or all(stage["final_directory"] is not None or stage["children"]
+                                                       for stage in self.stages.values()):
+            self.remove_scratch_directory(results[failed[0]] if failed else 0)
+        if failed and not self.feedback.isCanceled():
+            raise QgsProcessingException(f"{len(failed)} of {len(results)} tile stages failed, e.g. "
+                                         f"{''.join(failed[0])} with exit code {results[failed[0]]}")
+        return results
+
+    def remove_scratch_directory(self, returncode):
+        """removes a managed scratch directory unless something failed, then it is kept to look into"""
+        if not self.managed:
+            return
+        if returncode != 0 and not self.feedback.isCanceled():
+            self.feedback.pushConsoleInfo(f"the intermediates are kept in {self.temporary_directory}")
+            return
+        LastoolsUtils.remove_scratch_directory(self.temporary_directory)
+
+    def remove_intermediates(self, tile, name):
+        """deletes the files of the tile that the stage, or the tiling for "", wrote to the temporary directory"""
+        if name == "":
+            files = [os.path.join(self.temporary_directory, tile + ".laz")]
+        else:
+            files = self.task_outputs(tile, name, self.stages[name]["commands"])
+        for file in files:
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+    @staticmethod
+    def move_outputs(files, directory):
+        """moves the files into the directory and returns their new paths"""
+        os.makedirs(directory, exist_ok=True)
+        moved = []
+        for file in files:
+            moved.append(os.path.join(directory, os.path.basename(file)))
+            shutil.move(file, moved[-1])
+        return moved
+
+    def record_throughput(self, tool, input_file, seconds):
+        try:
+            points = LastoolsHeader.read(input_file)["point_count"]
+        except (OSError, ValueError):
+            return
+        self.history.record(tool, points, seconds)
+
+    @staticmethod
+    def points_per_tile():
+        """returns the points per tile an auto tile size or an adaptive tiling aims at"""
+        return float(ProcessingConfig.getSetting("LASTOOLS_POINTS_PER_TILE") or LastoolsPipeline.POINTS_PER_TILE)
+
+    @staticmethod
+    def count_tiles(bboxes, tile_size):
+        """returns the number of tiles of the grid lastile uses, at multiples of the tile size, that the bounding
+        boxes (min_x, min_y, max_x, max_y) touch"""
+        tiles = set()
+        for min_x, min_y, max_x, max_y in bboxes:
+            for x in range(math.floor(min_x / tile_size), math.floor(max_x / tile_size) + 1):
+                for y in range(math.floor(min_y / tile_size), math.floor(max_y / tile_size) + 1):
+                    tiles.add((x, y))
+        return len(tiles)
+
+    @staticmethod
+    def density_grid(headers):
+        """returns the points per square unit on a coarse grid over the inputs as (grid, min_x, min_y, cell)
+
+        every file adds its points, spread evenly over its bounding box, to the cells it covers, so that overlapping
+        flightlines add up. the grid maps the (column, row) of the cells with points to their density.
+        """
+        bboxes = [(header["bbox"][0], header["bbox"][1], header["bbox"][3], header["bbox"][4]) for header in headers]
+        if not bboxes:
+            return None
+        min_x, min_y = min(bbox[0] for bbox in bboxes), min(bbox[1] for bbox in bboxes)
+        max_x, max_y = max(bbox[2] for bbox in bboxes), max(bbox[3] for bbox in bboxes)
+        cell = max(max_x - min_x, max_y - min_y, 1.0) / LastoolsPipeline.DENSITY_GRID
+        grid = {}
+        for header, (x0, y0, x1, y1) in zip(headers, bboxes):
+            density = header["point_count"] / max(1.0, (x1 - x0) * (y1 - y0))
+            for x in range(int((x0 - min_x) / cell), int((x1 - min_x) / cell) + 1):
+                for y in range(int((y0 - min_y) / cell), int((y1 - min_y) / cell) + 1):
+                    # weighted by the share of the cell the file covers
+                    covered = (max(0.0, min(x1, min_x + (x + 1) * cell) - max(x0, min_x + x * cell)) *
+                               max(0.0, min(y1, min_y + (y + 1) * cell) - max(y0, min_y + y * cell)))
+                    if covered > 0:
+                        grid[(x, y)] = grid.get((x, y), 0.0) + density * covered / cell ** 2
+        return grid, min_x, min_y, cell
+
+    @staticmethod
+    def auto_tile_size(headers, buffer, points_per_tile, cores):
+        """returns a tile size whose densest tile, with its buffer, holds about the points per tile
+
+        the density is the densest cell of the density grid. the size shrinks further while there are fewer tiles
+        than cores, but not below twice the buffer.
+        """
+        density_grid = LastoolsPipeline.density_grid(headers)
+        density = max(density_grid[0].values(), default=0.0) if density_grid is not None else 0.0
+        if density <= 0:
+            return None
+        bboxes = [(header["bbox"][0], header["bbox"][1], header["bbox"][3], header["bbox"][4]) for header in headers]
+        tile_size = max(math.sqrt(points_per_tile / density) - 2 * buffer, 2 * buffer, 1.0)
+        while LastoolsPipeline.count_tiles(bboxes, tile_size) < cores and tile_size / 2 >= max(2 * buffer, 1.0):
+            tile_size /= 2
+        # rounded down to two significant digits, so that the tile names stay readable
+        unit = 10 ** math.floor(math.log10(tile_size)) / 10
+        return max(math.floor(tile_size / unit) * unit, unit)
+
+    @staticmethod
+    def grid_tiles(headers, tile_size):
+        """returns the points of the tiles of the grid lastile uses, at multiples of the tile size, by (column, row)
+
+        every file adds its points, spread evenly over its bounding box, to the tiles it overlaps, so that
+        overlapping flightlines add up and the space between the files stays empty.
+        """
+        def shares(low, high):
+            # the share of the extent from low to high in each tile it overlaps
+            first = math.floor(low / tile_size)
+            last = max(first, math.ceil(high / tile_size) - 1)
+            if high <= low:
+                return [(first, 1.0)]
+            return [(index, (min(high, (index + 1) * tile_size) - max(low, index * tile_size)) / (high - low))
+                    for index in range(first, last + 1)]
+
+        tiles = {}
+        for header in headers:
+            x0, y0, x1, y1 = header["bbox"][0], header["bbox"][1], header["bbox"][3], header["bbox"][4]
+            for column, share_x in shares(x0, x1):
+                for row, share_y in shares(y0, y1):
+                    tiles[(column, row)] = tiles.get((column, row), 0.0) + header["point_count"] * share_x * share_y
+        return tiles
+
+    @staticmethod
+    def square_points(grid_tiles, tile_size, x, y, size, buffer=0.0):
+        """returns the points the grid tiles put into the square (x, y, size) with the buffer around it"""
+        x0, y0, x1, y1 = x - buffer, y - buffer, x + size + buffer, y + size + buffer
+        points = 0.0
+        for column in range(math.floor(x0 / tile_size), math.ceil(x1 / tile_size)):
+            for row in range(math.floor(y0 / tile_size), math.ceil(y1 / tile_size)):
+                if (column, row) in grid_tiles:
+                    covered = (max(0.0, min(x1, (column + 1) * tile_size) - max(x0, column * tile_size)) *
+                               max(0.0, min(y1, (row + 1) * tile_size) - max(y0, row * tile_size)))
+                    points += grid_tiles[(column, row)] * covered / tile_size ** 2
+        return points
+
+    @staticmethod
+    def quadtree(grid_tiles, tile_size, buffer, points_per_tile, cores):
+        """returns the tiles (x, y, size) of a quadtree over the grid tiles, see grid_tiles(), with about the points
+        per tile
+
+        the quadtree starts from squares of the tile size times a power of two, at multiples of their size like the
+        grid of lastile, and splits every square whose points, with its buffer, exceed the points per tile until it
+        reaches the tile size. sparse areas thus stay in large tiles, dense ones get small tiles, and squares
+        without grid tiles are dropped. while there are fewer tiles than cores the fullest tile is split once more.
+        """
+        if not grid_tiles:
+            return []
+        # the tile names of lastile hold the integer lower left corner, so the sizes are integers
+        smallest = max(1, round(tile_size))
+        columns = [column for column, _ in grid_tiles]
+        rows = [row for _, row in grid_tiles]
+        span = max(max(columns) - min(columns), max(rows) - min(rows)) + 1
+        levels = max(0, min(LastoolsPipeline.QUADTREE_LEVELS, math.ceil(math.log2(span))))
+        # the squares of every level that hold grid tiles, by (column, row) in units of their size
+        occupied = [{(column >> level, row >> level) for column, row in grid_tiles} for level in range(levels + 1)]
+
+        def points(column, row, level):
+            size = smallest << level
+            return LastoolsPipeline.square_points(grid_tiles, smallest, column * size, row * size, size, buffer)
+
+        def split(column, row, level):
+            return [(2 * column + dx, 2 * row + dy, level - 1) for dx in (0, 1) for dy in (0, 1)
+                    if (2 * column + dx, 2 * row + dy) in occupied[level - 1]]
+
+        pending = [(column, row, levels) for column, row in occupied[levels]]
+        tiles = []
+        while pending:
+            column, row, level = pending.pop()
+            if level > 0 and points(column, row, level) > points_per_tile:
+                pending.extend(split(column, row, level))
+            else:
+                tiles.append((column, row, level))
+        while len(tiles) < cores:
+            splittable = [tile for tile in tiles if tile[2] > 0]
+            if not splittable:
+                break
+            fullest = max(splittable, key=lambda tile: points(*tile))
+            tiles.remove(fullest)
+            tiles.extend(split(*fullest))
+        return sorted((column * (smallest << level), row * (smallest << level), smallest << level)
+                      for column, row, level in tiles)
+
+    def estimate(self):
+        """estimates tiles, points, disk usage and runtime of the planned pipeline from the headers of its inputs"""
+        commands, headers = self.tiling["commands"], self.tiling["headers"]
+        tile_size = float(commands.option("-tile_size", 1000.0))
+        buffer = float(commands.option("-buffer", 0.0))
+        points = sum(header["point_count"] for header in headers)
+        size = sum(os.path.getsize(header["path"]) for header in headers)
+        quadtree = self.tiling["quadtree"]
+        if quadtree is None:
+            tiles = LastoolsPipeline.count_tiles(
+                [(header["bbox"][0], header["bbox"][1], header["bbox"][3], header["bbox"][4]) for header in headers],
+                tile_size
+            )
+            area = tiles * tile_size ** 2
+            # points within the buffer of a tile are stored with both tiles, assuming the points are spread evenly
+            overhead = ((tile_size + 2 * buffer) ** 2 - tile_size ** 2) / tile_size ** 2
+        else:
+            smallest = max(1, round(tile_size))
+            grid_tiles = LastoolsPipeline.grid_tiles(headers, smallest)
+            tiles = len(quadtree)
+            area = sum(size ** 2 for _, _, size in quadtree)
+            core_points = [LastoolsPipeline.square_points(grid_tiles, smallest, x, y, size) for x, y, size in quadtree]
+            quadtree_points = [LastoolsPipeline.square_points(grid_tiles, smallest, x, y, size, buffer)
+                               for x, y, size in quadtree]
+            overhead = sum(quadtree_points) / max(1.0, sum(core_points)) - 1
+        buffered_points = points * (1 + overhead)
+        tile_bytes = size * (1 + overhead)
+        disk = tile_bytes
+        seconds, unknown = 0.0, []
+        rate = self.history.rate(commands.tool)
+        if rate is None:
+            unknown.append(commands.tool)
+        else:
+            seconds += points / rate
+        parallel = max(1, min(self.cores, tiles))
+        point_stages, raster_bytes = 0, 0.0
+        for stage in self.stages.values():
+            stage_commands = stage["commands"]
+            if self.task_output_directory(stage_commands) == self.temporary_directory:
+                if "-olaz" in stage_commands or "-olas" in stage_commands:
+                    point_stages += 1
+                elif stage_commands.option("-step") is not None:
+                    raster_bytes += 4 * area / float(stage_commands.option("-step")) ** 2
+            rate = self.history.rate(stage_commands.tool)
+            if rate is None:
+                unknown.append(stage_commands.tool)
+            else:
+                seconds += buffered_points / rate / parallel
+        disk += point_stages * tile_bytes + raster_bytes
+        # in a managed scratch directory the tiles of a stage are deleted once the next stage has read them
+        peak_disk = (tile_bytes * min(2, 1 + point_stages) + raster_bytes) if self.managed else disk
+        # the largest tile is that of the densest input file, with its buffer
+        density = max((
+            header["point_count"] / max(1.0, (bbox[3] - bbox[0]) * (bbox[4] - bbox[1]))
+            for header, bbox in ((header, header["bbox"]) for header in headers)
+        ), default=0.0)
+        record_length = max((header["point_record_length"] for header in headers), default=0)
+        tile_points = min(buffered_points, density * (tile_size + 2 * buffer) ** 2)
+        if quadtree is not None:
+            tile_points = max(quadtree_points)
+        # the stage with the largest memory model for the tile is what limits the processes run at once
+        memory = max((self.history.memory(stage["commands"].tool, tile_points, record_length)
+                      for stage in self.stages.values()), default=0.0)
+        return {
+            "files": len(headers), "points": points, "tile_size": tile_size, "buffer": buffer, "tiles": tiles,
+            "overhead": overhead, "disk": disk, "peak_disk": peak_disk, "memory": memory, "seconds": seconds,
+            "unknown": sorted(set(unknown)),
+        }
+
+    def preflight(self):
+        """checks the estimated disk usage and memory of the pipeline against the node before anything runs
+
+        the number of concurrent LAStools processes is lowered until their memory fits what is available. raises
+        QgsProcessingException if the temporary directory lacks space or even a single process does not fit.
+        """
+        estimate = self.estimate()
+        free = shutil.disk_usage(self.temporary_directory).free
+        if estimate["peak_disk"] > free:
+            LastoolsUtils.remove_scratch_directory(self.temporary_directory)
+            raise QgsProcessingException(
+                f"the pipeline needs ~{estimate['peak_disk'] / 1073741824:.1f} GB in {self.temporary_directory} but "
+                f"only {free / 1073741824:.1f} GB are free, use a larger tile size, a smaller buffer or another "
+                f"temporary directory"
+            )
+        available = LastoolsUtils.available_memory()
+        if available is None or estimate["memory"] <= 0:
+            return
+        cores = int(available // estimate["memory"])
+        if cores < 1:
+            LastoolsUtils.remove_scratch_directory(self.temporary_directory)
+            raise QgsProcessingException(
+                f"a tile needs ~{estimate['memory'] / 1073741824:.1f} GB of memory but only "
+                f"{available / 1073741824:.1f} GB are available, use a smaller tile size"
+            )
+        if cores < self.cores:
+            self.feedback.pushConsoleInfo(
+                f"a tile needs ~{estimate['memory'] / 1048576:.0f} MB of memory, {available / 1048576:.0f} MB are "
+                f"available: running {cores} instead of {self.cores} LAStools processes"
+            )
+            self.cores = cores
+
+    def show_plan(self):
+        """shows the stage graph and the estimates, without running anything"""
+        if self.tiling is None:
+            self.feedback.reportError("plan mode needs the tiling of the pipeline")
+            return
+        estimate = self.estimate()
+        sizes = f"{estimate['tile_size']:g}"
+        if self.tiling["quadtree"] is not None:
+            sizes = [size for _, _, size in self.tiling["quadtree"]]
+            sizes = f"{min(sizes)} to {max(sizes)} (quadtree)"
+        self.feedback.pushConsoleInfo(
+            f"plan: {self.tiling['commands'].tool} tiles {estimate['files']} file(s) with {estimate['points']:,} "
+            f"points into ~{estimate['tiles']} tiles of {sizes} with a buffer of "
+            f"{estimate['buffer']:g}, which adds ~{100 * estimate['overhead']:.1f}% points"
+        )
+        self.feedback.pushConsoleInfo("plan: " + self.tiling["commands"].commandline())
+
+        def show(name, level):
+            stage = self.stages[name]
+            self.feedback.pushConsoleInfo(
+                f"plan: {'  ' * level}{stage['commands'].tool} '{self.base_name}*{stage['input_appendix']}.laz' -> "
+                f"'*{name}' in {self.task_output_directory(stage['commands'])} ({estimate['tiles']} tasks)"
+            )
+            for child in stage["children"]:
+                show(child, level + 1)
+
+        for name, stage in self.stages.items():
+            if stage["input_appendix"] == "":
+                show(name, 1)
+        self.feedback.pushConsoleInfo(
+            f"plan: up to ~{estimate['peak_disk'] / 1073741824:.2f} GB in the temporary directory, "
+            f"~{estimate['memory'] / 1048576:.0f} MB of memory per process"
+        )
+        self.feedback.pushConsoleInfo(
+            f"plan: ~{estimate['disk'] / 1073741824:.2f} GB written to the temporary directory, "
+            f"~{estimate['seconds'] / 60:.1f} minutes with {self.cores} LAStools processes"
+            + (f" plus {', '.join(estimate['unknown'])} that did not run before" if estimate["unknown"] else "")
+        )
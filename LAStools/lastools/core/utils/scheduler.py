@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    scheduler.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .utils import LastoolsUtils
+
+
+class LastoolsFileFeedback:
+    """forwards the output of one of several concurrent LAStools processes to the shared feedback"""
+
+    def __init__(self, feedback, lock, label, progress, index):
+        self.feedback = feedback
+        self.lock = lock
+        self.label = label
+        self.progress = progress
+        self.index = index
+
+    def pushConsoleInfo(self, info):
+        with self.lock:
+            self.feedback.pushConsoleInfo(f"[{self.label}] {info}")
+
+    def setProgress(self, progress):
+        with self.lock:
+            self.progress[self.index] = progress
+            self.feedback.setProgress(sum(self.progress) / len(self.progress))
+
+    def reportError(self, error, fatalError=False):
+        with self.lock:
+            self.feedback.reportError(f"[{self.label}] {error}", fatalError)
+
+    def isCanceled(self):
+        return self.feedback.isCanceled()
+
+
+class LastoolsScheduler:
+
+    @staticmethod
+    def expand_input_files(input_directory, wildcards):
+        """returns the files matching the wildcards, largest first so that they do not straggle at the end"""
+        files = set()
+        for wildcard in wildcards:
+            if input_directory is not None and input_directory != "":
+                wildcard = os.path.join(input_directory, wildcard)
+            files.update(file for file in glob.glob(wildcard) if os.path.isfile(file))
+        return sorted(files, key=lambda file: (-os.path.getsize(file), file))
+
+    @staticmethod
+    def run_per_file(commands, input_files, cores, feedback):
+        """runs the command once per input file on a pool of at most 'cores' processes and returns the exit codes"""
+        results = {}
+        if not input_files:
+            feedback.reportError("no input files match the wildcard(s)")
+            return results
+        lock = threading.Lock()
+        progress = [0.0] * len(input_files)
+
+        def run(index, input_file):
+            if feedback.isCanceled():
+                return None
+            file_commands = commands.with_input(input_file)
+            file_feedback = LastoolsFileFeedback(feedback, lock, os.path.basename(input_file), progress, index)
+            returncode = LastoolsUtils.run_lastools(file_commands, file_feedback)
+            file_feedback.setProgress(100.0)
+            return returncode
+
+        feedback.pushConsoleInfo(f"processing {len(input_files)} files with up to {cores} LAStools processes")
+        with ThreadPoolExecutor(max_workers=max(1, min(cores, len(input_files)))) as executor:
+            futures = {executor.submit(run, index, file): file for index, file in enumerate(input_files)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        failed = [file for file in input_files if results[file] not in (0, None)]
+        for file in failed:
+            feedback.reportError(f"{os.path.basename(file)} failed with exit code {results[file]}")
+        done = sum(1 for file in input_files if results[file] == 0)
+        feedback.pushConsoleInfo(f"{done} of {len(input_files)} files processed successfully")
+        return results
@@ -22,13 +22,51 @@ __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
 import os
+import re
+import sys
+import glob
+import ctypes
+import hashlib
+import json
+import queue
+import shutil
+import signal
 import subprocess
+import tempfile
+import threading
+import time
 
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.tools.system import isWindows
 
+from .history import LastoolsHistory
+
 
 class LastoolsUtils:
+    # progress lines as printed by LAStools, e.g. "lasground: 50%" or "processing file 3 of 12", but not the
+    # percentages within other output like the classification histogram of lasinfo
+    PROGRESS_PERCENT = re.compile(r"^\s*(?:[\w.]+:\s*)?(\d+(?:\.\d+)?)\s*%\s*(?:done)?\s*$")
+    PROGRESS_FILES = re.compile(r"\bfile\s+(\d+)\s+of\s+(\d+)\b")
+    # seconds between two checks for cancellation and before SIGTERM escalates to SIGKILL
+    CANCEL_POLL_INTERVAL = 0.2
+    TERMINATE_TIMEOUT = 5.0
+    # resource usage of the LAStools processes, collected per top-level feedback until the algorithm returns
+    statistics = {}
+    statistics_lock = threading.Lock()
+    # the managed scratch directories created by this QGIS process that still exist
+    scratch_directories = set()
+    # the CPUs of the core budget by NUMA node and those of them not granted to a running LAStools process, shared
+    # by all algorithms of the QGIS process so that batches and models do not run more processes than cores
+    cpu_nodes = None
+    free_cpus = None
+    cores_budget = None
+    cores_in_use = 0
+    cores_condition = threading.Condition()
+    # the memory the running LAStools processes are expected to take and the budget they share
+    memory_budget = None
+    memory_in_use = 0.0
+    memory_processes = 0
+    memory_condition = threading.Condition()
 
     @staticmethod
     def has_wine():
@@ -48,12 +86,419 @@ class LastoolsUtils:
             folder = wine_folder + "/wine " + lastools_folder
         return folder
 
+    @staticmethod
+    def available_memory():
+        """returns the bytes of memory available for new processes without swapping, or None if unknown"""
+        if isWindows():
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [("length", ctypes.c_ulong), ("memory_load", ctypes.c_ulong)] + [
+                    (name, ctypes.c_ulonglong) for name in ("total_physical", "available_physical", "total_page_file",
+                                                            "available_page_file", "total_virtual", "available_virtual",
+                                                            "available_extended_virtual")
+                ]
+
+            status = MemoryStatus()
+            status.length = ctypes.sizeof(MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.available_physical
+            return None
+        try:
+            # unlike the free memory, MemAvailable counts the page cache that can be dropped
+            with open("/proc/meminfo") as meminfo:
+                for line in meminfo:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        try:
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError):
+            return None
+
+    @staticmethod
+    def create_scratch_directory():
+        """creates a unique directory for the intermediates of one run under the scratch folder
+
+        the scratch folder should be on fast local storage such as tmpfs or NVMe. if none is set it is the 'scratch'
+        folder of the job queue, which the workers on other nodes see as well, or else the system temporary folder.
+        """
+        scratch_folder = ProcessingConfig.getSetting("LASTOOLS_SCRATCH_FOLDER")
+        job_queue = ProcessingConfig.getSetting("LASTOOLS_JOB_QUEUE")
+        if (scratch_folder is None or scratch_folder == "") and job_queue:
+            scratch_folder = os.path.join(job_queue, "scratch")
+        if scratch_folder is None or scratch_folder == "":
+            scratch_folder = None
+        else:
+            os.makedirs(scratch_folder, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix="lastools_", dir=scratch_folder)
+        LastoolsUtils.scratch_directories.add(directory)
+        return directory
+
+    @staticmethod
+    def remove_scratch_directory(directory):
+        if directory in LastoolsUtils.scratch_directories:
+            LastoolsUtils.scratch_directories.discard(directory)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def list_of_files(files):
+        """writes the files into a list file for '-lof' and returns it
+
+        the list is named after a hash of its contents and kept in the pipeline cache folder, or in the system
+        temporary folder if none is set. a run over the same files passes the same '-lof', so its manifests and cache
+        keys repeat.
+        """
+        contents = "\n".join(files) + "\n"
+        folder = ProcessingConfig.getSetting("LASTOOLS_CACHE_FOLDER")
+        if folder is None or folder == "":
+            folder = tempfile.gettempdir()
+        path = os.path.join(folder, f"input_files_{hashlib.sha256(contents.encode('utf-8')).hexdigest()[:16]}.txt")
+        if not os.path.isfile(path):
+            # written to a temporary file first so that a concurrent run never reads a partial list
+            os.makedirs(folder, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=folder, suffix=".tmp", delete=False) as file:
+                file.write(contents)
+            os.replace(file.name, path)
+        return path
+
+    @staticmethod
+    def numa_nodes():
+        """returns the CPUs this process may run on grouped by NUMA node, in one group where the nodes are unknown"""
+        if hasattr(os, "sched_getaffinity"):
+            allowed = set(os.sched_getaffinity(0))
+        else:
+            allowed = set(range(os.cpu_count() or 1))
+        nodes = []
+        for cpulist in sorted(glob.glob("/sys/devices/system/node/node*/cpulist")):
+            cpus = set()
+            try:
+                with open(cpulist) as file:
+                    # e.g. '0-7,16-23'
+                    for part in file.read().strip().split(","):
+                        if part:
+                            first, _, last = part.partition("-")
+                            cpus.update(range(int(first), int(last or first) + 1))
+            except (OSError, ValueError):
+                continue
+            if cpus & allowed:
+                nodes.append(sorted(cpus & allowed))
+        rest = allowed.difference(*nodes)
+        if rest:
+            nodes.append(sorted(rest))
+        return nodes
+
+    @staticmethod
+    def core_budget():
+        """returns the number of cores all LAStools processes together may use, all cores if none is set"""
+        try:
+            budget = int(ProcessingConfig.getSetting("LASTOOLS_CORE_BUDGET") or 0)
+        except (TypeError, ValueError):
+            budget = 0
+        return budget if budget > 0 else None
+
+    @staticmethod
+    def acquire_cores(wanted, feedback):
+        """waits until a core of the budget is free and returns the CPUs granted, at most 'wanted' of them, or None if
+        the feedback is canceled meanwhile
+
+        the CPUs are taken from the NUMA node that fits them most tightly, or from the node with the most free CPUs.
+        """
+        with LastoolsUtils.cores_condition:
+            budget = LastoolsUtils.core_budget()
+            if LastoolsUtils.free_cpus is None or (LastoolsUtils.cores_budget != budget and
+                                                   LastoolsUtils.cores_in_use == 0):
+                # the budget fills the nodes in order, so that a small budget stays on one node
+                nodes, left = [], budget
+                for node in LastoolsUtils.numa_nodes():
+                    node = node if left is None else node[:left]
+                    if node:
+                        nodes.append(node)
+                        left = None if left is None else left - len(node)
+                LastoolsUtils.cpu_nodes = nodes
+                LastoolsUtils.free_cpus = [set(node) for node in nodes]
+                LastoolsUtils.cores_budget = budget
+            while not any(LastoolsUtils.free_cpus):
+                if feedback.isCanceled():
+                    return None
+                LastoolsUtils.cores_condition.wait(LastoolsUtils.CANCEL_POLL_INTERVAL)
+            fitting = [free for free in LastoolsUtils.free_cpus if len(free) >= wanted]
+            if fitting:
+                free = min(fitting, key=len)
+            else:
+                free = max(LastoolsUtils.free_cpus, key=len)
+            cpus = sorted(free)[:max(1, wanted)]
+            free.difference_update(cpus)
+            LastoolsUtils.cores_in_use += len(cpus)
+            return cpus
+
+    @staticmethod
+    def release_cores(cpus):
+        with LastoolsUtils.cores_condition:
+            for free, node in zip(LastoolsUtils.free_cpus, LastoolsUtils.cpu_nodes):
+                free.update(cpu for cpu in cpus if cpu in node)
+            LastoolsUtils.cores_in_use -= len(cpus)
+            LastoolsUtils.cores_condition.notify_all()
+
+    @staticmethod
+    def input_points(commands):
+        """returns the points of the largest LAS/LAZ input the tool holds at once and their record length in bytes
+
+        a tool merging its inputs, with '-merged' or into a single '-o' output, holds the points of all of them. the
+        headers are read through the catalog, so that the preflight, the estimates and the runs read each only once.
+        """
+        files = []
+        for path in commands.inputs:
+            if path == commands.option("-lof"):
+                try:
+                    # the list names the files as the tool sees them, under Wine as Windows paths
+                    with open(path) as list_of_files:
+                        files.extend(commands.host_path(line.strip()) for line in list_of_files if line.strip())
+                except OSError:
+                    pass
+            else:
+                files.extend(glob.glob(path))
+        # imported here as the catalog needs the scheduler, which needs this module
+        from .catalog import LastoolsCatalog
+        points, record_length = [], 0
+        for header in LastoolsCatalog.default().headers([file for file in files if os.path.isfile(file)]):
+            points.append(header["point_count"])
+            record_length = max(record_length, header["point_record_length"])
+        if "-merged" in commands or (len(points) > 1 and commands.option("-o") is not None):
+            return sum(points), record_length
+        return max(points, default=0), record_length
+
+    @staticmethod
+    def acquire_memory(memory, feedback):
+        """waits until the memory fits the budget next to that of the running processes, returns False if the feedback
+        is canceled meanwhile
+
+        the budget is the memory budget setting, or the memory available while no process runs. a process
+        that does not fit even alone is run once nothing else runs.
+        """
+        with LastoolsUtils.memory_condition:
+            if LastoolsUtils.memory_processes == 0:
+                try:
+                    budget = float(ProcessingConfig.getSetting("LASTOOLS_MEMORY_BUDGET") or 0) * 1073741824
+                except (TypeError, ValueError):
+                    budget = 0
+                LastoolsUtils.memory_budget = budget if budget > 0 else LastoolsUtils.available_memory()
+            while LastoolsUtils.memory_processes > 0 and LastoolsUtils.memory_budget is not None and \
+                    LastoolsUtils.memory_in_use + memory > LastoolsUtils.memory_budget:
+                if feedback.isCanceled():
+                    return False
+                LastoolsUtils.memory_condition.wait(LastoolsUtils.CANCEL_POLL_INTERVAL)
+            LastoolsUtils.memory_in_use += memory
+            LastoolsUtils.memory_processes += 1
+            return True
+
+    @staticmethod
+    def release_memory(memory):
+        with LastoolsUtils.memory_condition:
+            LastoolsUtils.memory_processes -= 1
+            # without rounding errors adding up over the runs
+            LastoolsUtils.memory_in_use = (LastoolsUtils.memory_in_use - memory) if LastoolsUtils.memory_processes \
+                else 0.0
+            LastoolsUtils.memory_condition.notify_all()
+
+    @staticmethod
+    def pin_process(process, cpus):
+        """restricts the process to the NUMA node of its CPUs, if CPU affinity is set and the platform supports it"""
+        if not ProcessingConfig.getSetting("LASTOOLS_CPU_AFFINITY") or not hasattr(os, "sched_setaffinity"):
+            return
+        node = next((node for node in LastoolsUtils.cpu_nodes if cpus[0] in node), cpus)
+        try:
+            os.sched_setaffinity(process.pid, node)
+        except OSError:
+            pass
+
     @staticmethod
     def run_lastools(commands, feedback):
-        commandline = " ".join(commands)
+        """runs the LastoolsCommand, streaming its output to the feedback, and returns its exit code
+
+        every process is admitted to the memory budget and granted cores of the budget shared by all algorithms
+        first, and waits while they are taken. its memory is predicted from the peak memory of earlier runs of the
+        tool over their points, which its run adds to. a '-cores' option of the command is lowered to the cores
+        granted.
+        """
+        history = LastoolsHistory.default()
+        points, record_length = LastoolsUtils.input_points(commands)
+        memory = history.memory(commands.tool, points, record_length)
+        if not LastoolsUtils.acquire_memory(memory, feedback):
+            feedback.pushConsoleInfo("LAStools process canceled")
+            return -signal.SIGTERM
+        try:
+            cores = commands.option("-cores")
+            cpus = LastoolsUtils.acquire_cores(int(cores) if cores is not None else 1, feedback)
+            if cpus is None:
+                feedback.pushConsoleInfo("LAStools process canceled")
+                return -signal.SIGTERM
+            try:
+                if cores is not None and int(cores) != len(cpus):
+                    commands = commands.with_option("-cores", str(len(cpus)))
+                returncode, peak = LastoolsUtils.run_process(commands, feedback, cpus)
+            finally:
+                LastoolsUtils.release_cores(cpus)
+        finally:
+            LastoolsUtils.release_memory(memory)
+        if returncode == 0:
+            history.record_memory(commands.tool, points, peak)
+        return returncode
+
+    @staticmethod
+    def run_process(commands, feedback, cpus):
+        """runs the command on the cores and returns its exit code and its peak resident memory in bytes or None"""
         feedback.pushConsoleInfo("LAStools command line")
-        feedback.pushConsoleInfo(commandline)
+        feedback.pushConsoleInfo(commands.commandline())
         feedback.pushConsoleInfo("LAStools console output")
-        output = subprocess.Popen(commandline, shell=True, stdout=subprocess.PIPE, stdin=open(os.devnull),
-                                  stderr=subprocess.STDOUT, universal_newlines=False).communicate()[0]
-        feedback.pushConsoleInfo(output.decode("utf-8"))
+        started, clock = time.time(), time.perf_counter()
+        # the tool runs in its own process group so that cancelling also stops its children (e.g. under Wine)
+        if isWindows():
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        # the argv is run without a shell, the arguments reach the tool exactly as they are in the command
+        try:
+            process = subprocess.Popen(commands.argv(), stdout=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                                       stderr=subprocess.STDOUT, universal_newlines=False,
+                                       env=commands.environment(), **group)
+        except OSError as error:
+            feedback.reportError(f"could not start {commands.tool}: {error}")
+            return 127, None
+        LastoolsUtils.pin_process(process, cpus)
+        # the pipe is drained on a background thread so that output reaches the console while the tool runs
+        lines = queue.Queue()
+        reader = threading.Thread(target=LastoolsUtils.read_output, args=(process.stdout, lines), daemon=True)
+        reader.start()
+        # the progress bar only moves forward, even where a tool restarts its count, e.g. per pass
+        progress_shown = 0.0
+        while True:
+            if feedback.isCanceled():
+                feedback.pushConsoleInfo("LAStools process canceled")
+                LastoolsUtils.kill_process_tree(process)
+                break
+            try:
+                line = lines.get(timeout=LastoolsUtils.CANCEL_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if line is None:
+                break
+            feedback.pushConsoleInfo(line)
+            progress = LastoolsUtils.parse_progress(line)
+            if progress is not None and progress > progress_shown:
+                progress_shown = progress
+                feedback.setProgress(progress)
+        reader.join(LastoolsUtils.TERMINATE_TIMEOUT)
+        returncode, usage = LastoolsUtils.wait_process(process)
+        # the peak of the largest process of the tree, reported in kilobytes except on macOS
+        peak = (usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)) if usage is not None else None
+        LastoolsUtils.record_statistics(feedback, {
+            "tool": commands.tool,
+            "label": getattr(feedback, "label", None),
+            "returncode": returncode,
+            "start": started,
+            "wall": time.perf_counter() - clock,
+            "user": usage.ru_utime if usage is not None else None,
+            "sys": usage.ru_stime if usage is not None else None,
+            "max_rss": peak,
+            # blocks of 512 bytes the kernel accounted to the tree for writing
+            "output_bytes": usage.ru_oublock * 512 if usage is not None else None,
+        })
+        return returncode, peak
+
+    @staticmethod
+    def wait_process(process):
+        """waits for the process and returns its exit code and the resource usage of its tree or None"""
+        if not hasattr(os, "wait4") or process.returncode is not None:
+            return process.wait(), None
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            return process.wait(), None
+        if os.WIFSIGNALED(status):
+            process.returncode = -os.WTERMSIG(status)
+        else:
+            process.returncode = os.WEXITSTATUS(status)
+        return process.returncode, usage
+
+    @staticmethod
+    def record_statistics(feedback, record):
+        # proxies like LastoolsFileFeedback hand the record up to the feedback of the algorithm
+        while hasattr(feedback, "feedback"):
+            feedback = feedback.feedback
+        with LastoolsUtils.statistics_lock:
+            LastoolsUtils.statistics.setdefault(id(feedback), []).append(record)
+
+    @staticmethod
+    def pop_statistics(feedback):
+        """returns and forgets the statistics of the LAStools processes run with the feedback, oldest first"""
+        with LastoolsUtils.statistics_lock:
+            records = LastoolsUtils.statistics.pop(id(feedback), [])
+        return sorted(records, key=lambda record: record["start"])
+
+    @staticmethod
+    def summarize_statistics(records):
+        """sums the statistics per tool, the peak resident memory is the maximum of the runs"""
+        summary = {}
+        for record in records:
+            tool = summary.setdefault(record["tool"], {
+                "runs": 0, "wall": 0.0, "user": None, "sys": None, "max_rss": None, "output_bytes": None
+            })
+            tool["runs"] += 1
+            tool["wall"] += record["wall"]
+            for name in ("user", "sys", "output_bytes"):
+                if record[name] is not None:
+                    tool[name] = (tool[name] or 0) + record[name]
+            if record["max_rss"] is not None:
+                tool["max_rss"] = max(tool["max_rss"] or 0, record["max_rss"])
+        return summary
+
+    @staticmethod
+    def append_run_log(algorithm, records):
+        """appends one JSON line per LAStools process to the run log, if one is set"""
+        run_log = ProcessingConfig.getSetting("LASTOOLS_RUN_LOG")
+        if run_log is None or run_log == "" or not records:
+            return
+        with open(run_log, "a", encoding="utf-8") as log:
+            for record in records:
+                log.write(json.dumps(dict(record, algorithm=algorithm)) + "\n")
+
+    @staticmethod
+    def kill_process_tree(process):
+        """terminates the process group of a LAStools process, escalating from SIGTERM to SIGKILL"""
+        if isWindows():
+            if process.poll() is not None:
+                return
+            subprocess.call(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            process.wait()
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            # the group may outlive the tool, so wait until none of its members is left
+            deadline = time.time() + LastoolsUtils.TERMINATE_TIMEOUT
+            while time.time() < deadline:
+                process.poll()
+                os.killpg(process.pid, 0)
+                time.sleep(LastoolsUtils.CANCEL_POLL_INTERVAL)
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+    @staticmethod
+    def read_output(stream, lines):
+        for line in iter(stream.readline, b""):
+            lines.put(line.decode("utf-8", errors="replace").rstrip())
+        stream.close()
+        lines.put(None)
+
+    @staticmethod
+    def parse_progress(line):
+        """returns the progress in percent reported by a line of LAStools output or None"""
+        match = LastoolsUtils.PROGRESS_PERCENT.search(line)
+        if match:
+            return min(float(match.group(1)), 100.0)
+        match = LastoolsUtils.PROGRESS_FILES.search(line)
+        if match and int(match.group(2)) > 0:
+            return min(100.0 * int(match.group(1)) / int(match.group(2)), 100.0)
+        return None
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    wine.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import functools
+import subprocess
+import threading
+
+from processing.core.ProcessingConfig import ProcessingConfig
+
+
+class LastoolsWine:
+    """runs the Windows LAStools under Wine on other hosts
+
+    booting the Wine prefix and starting a wineserver takes longer than short tools like lasinfo or lasindex run, so
+    one persistent wineserver is kept for the QGIS session and every tool attaches to it. paths are handed to the
+    tools as Windows paths of the drive Wine maps them to, e.g. '/data/a.laz' as 'Z:\\data\\a.laz'.
+    """
+
+    # seconds to wait for the wineserver to start or stop
+    SERVER_TIMEOUT = 30
+    server = None
+    lock = threading.Lock()
+
+    @staticmethod
+    def folder():
+        return ProcessingConfig.getSetting("WINE_FOLDER") or ""
+
+    @staticmethod
+    def wine():
+        return os.path.join(LastoolsWine.folder(), "wine")
+
+    @staticmethod
+    def environment():
+        """returns the environment of the tools: Wine's debug output only slows them down"""
+        environment = dict(os.environ)
+        environment.setdefault("WINEDEBUG", "-all")
+        return environment
+
+    @staticmethod
+    def start():
+        """starts the persistent wineserver of the session, once"""
+        with LastoolsWine.lock:
+            if LastoolsWine.server is not None:
+                return
+            LastoolsWine.server = os.path.join(LastoolsWine.folder(), "wineserver")
+            # the wineserver puts itself into the background, '-p' keeps it running while no tool is attached
+            try:
+                subprocess.run([LastoolsWine.server, "-p"], env=LastoolsWine.environment(),
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               timeout=LastoolsWine.SERVER_TIMEOUT)
+            except (OSError, subprocess.SubprocessError):
+                # the tools then start a wineserver of their own, as without a persistent one
+                pass
+
+    @staticmethod
+    def stop():
+        """stops the persistent wineserver, when the provider is unloaded"""
+        with LastoolsWine.lock:
+            if LastoolsWine.server is None:
+                return
+            try:
+                subprocess.run([LastoolsWine.server, "-k"], env=LastoolsWine.environment(),
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               timeout=LastoolsWine.SERVER_TIMEOUT)
+            except (OSError, subprocess.SubprocessError):
+                pass
+            LastoolsWine.server = None
+            LastoolsWine.path.cache_clear()
+            LastoolsWine.drives.cache_clear()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def drives():
+        """returns the (folder, drive) pairs of the Wine prefix, longest folder first, 'Z:' being the root"""
+        dosdevices = os.path.join(os.environ.get("WINEPREFIX") or os.path.expanduser("~/.wine"), "dosdevices")
+        drives = [("/", "Z:")]
+        try:
+            for name in os.listdir(dosdevices):
+                if len(name) == 2 and name.endswith(":") and os.path.islink(os.path.join(dosdevices, name)):
+                    drives.append((os.path.realpath(os.path.join(dosdevices, name)), name.upper()))
+        except OSError:
+            pass
+        return sorted(drives, key=lambda drive: -len(drive[0]))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=65536)
+    def path(path):
+        """returns the absolute POSIX path as Windows path on the drive Wine maps it to"""
+        for folder, drive in LastoolsWine.drives():
+            if folder == "/" or path == folder or path.startswith(folder + "/"):
+                relative = path[len(folder):] if folder != "/" else path
+                return drive + "\\" + relative.lstrip("/").replace("/", "\\")
+        return path
+
+    @staticmethod
+    def host_path(path):
+        """returns the Windows path on a drive of Wine as the absolute POSIX path it maps to"""
+        for folder, drive in LastoolsWine.drives():
+            if path[:2].upper() == drive and path[2:3] in ("\\", "/", ""):
+                return os.path.join(folder, path[3:].replace("\\", "/"))
+        return path
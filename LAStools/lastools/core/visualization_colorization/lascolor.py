@@ -21,11 +21,7 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
-
-from PyQt5.QtGui import QIcon
-
-from ..utils import LastoolsUtils, descript_visualization_colorization as descript_info, paths
+from ..utils import LastoolsCommand, descript_visualization_colorization as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -39,18 +35,19 @@ class LasColor(LastoolsAlgorithm):
         self.add_parameters_generic_input_gui("Input ortho", "tif", False)
         self.add_parameters_point_output_gui()
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lascolor")]
+        commands = LastoolsCommand("lascolor")
         self.add_parameters_verbose_commands64(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         self.add_parameters_generic_input_commands(parameters, context, commands, "-image")
         self.add_parameters_point_output_commands(parameters, context, commands)
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasColor()
@@ -79,4 +76,4 @@ class LasColor(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
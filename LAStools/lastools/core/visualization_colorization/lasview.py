@@ -21,12 +21,10 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-import os
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingParameterNumber, QgsProcessingParameterEnum
 
-from ..utils import LastoolsUtils, descript_visualization_colorization as descript_info, paths
+from ..utils import LastoolsCommand, descript_visualization_colorization as descript_info, paths
 from ..algo import LastoolsAlgorithm
 
 
@@ -50,24 +48,27 @@ class LasView(LastoolsAlgorithm):
             LasView.SIZE, "window size (x y) in pixels", LasView.SIZES, False, 0
         ))
         self.add_parameters_additional_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasview")]
+        commands = LastoolsCommand("lasview")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_commands(parameters, context, commands)
         points = self.parameterAsInt(parameters, LasView.POINTS, context)
-        commands.append("-points " + str(points))
+        commands.append("-points")
+        commands.append(str(points))
         coloring = self.parameterAsInt(parameters, LasView.COLORING, context)
         if coloring != 0:
             commands.append("-color_by_" + LasView.COLORINGS[coloring])
         size = self.parameterAsInt(parameters, LasView.SIZE, context)
         if size != 0:
-            commands.append("-win " + LasView.SIZES[size])
+            commands.append("-win")
+            commands.extend(LasView.SIZES[size].split())
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"commands": commands}
+        return self.add_statistics_results(feedback, {"commands": commands})
 
     def createInstance(self):
         return LasView()
@@ -96,7 +97,7 @@ class LasView(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
 
 
 class LasViewPro(LastoolsAlgorithm):
@@ -120,25 +121,28 @@ class LasViewPro(LastoolsAlgorithm):
         ))
         self.add_parameters_additional_gui()
         self.add_parameters_verbose_gui()
+        self.add_parameters_plan_gui()
 
     def processAlgorithm(self, parameters, context, feedback):
-        commands = [os.path.join(LastoolsUtils.lastools_path(), "bin", "lasview")]
+        commands = LastoolsCommand("lasview")
         self.add_parameters_verbose_commands(parameters, context, commands)
         self.add_parameters_point_input_folder_commands(parameters, context, commands)
         self.add_parameters_files_are_flightlines_commands(parameters, context, commands)
         points = self.parameterAsInt(parameters, LasViewPro.POINTS, context)
-        commands.append("-points " + str(points))
+        commands.append("-points")
+        commands.append(str(points))
         coloring = self.parameterAsInt(parameters, LasViewPro.COLORING, context)
         if coloring != 0:
             commands.append("-color_by_" + LasViewPro.COLORINGS[coloring])
         size = self.parameterAsInt(parameters, LasViewPro.SIZE, context)
         if size != 0:
-            commands.append("-win " + LasViewPro.SIZES[size])
+            commands.append("-win")
+            commands.extend(LasViewPro.SIZES[size].split())
         self.add_parameters_additional_commands(parameters, context, commands)
 
-        LastoolsUtils.run_lastools(commands, feedback)
+        self.run_lastools(commands, feedback)
 
-        return {"": None}
+        return self.add_statistics_results(feedback, {"": None})
 
     def createInstance(self):
         return LasViewPro()
@@ -167,4 +171,4 @@ class LasViewPro(LastoolsAlgorithm):
     def icon(self):
         img_path = 'licenced.png' \
             if descript_info["items"][self.TOOL_INFO[0]][self.TOOL_INFO[1]]["licence"] else 'open_source.png'
-        return QIcon(f"{paths['img']}{img_path}")
+        return LastoolsAlgorithm.icon_from_path(f"{paths['img']}{img_path}")
@@ -21,71 +21,12 @@ __author__ = 'rapidlasso'
 __date__ = 'September 2023'
 __copyright__ = '(C) 2023, rapidlasso GmbH'
 
-from PyQt5.QtGui import QIcon
 from qgis.core import QgsProcessingProvider
 from processing.core.ProcessingConfig import Setting, ProcessingConfig
 
-from .lastools.core.processing import (
-    LasIndex, LasIndexPro,
-    LasMerge, LasMergePro,
-    LasOverage, LasOveragePro,
-    LasBoundary, LasBoundaryPro,
-    LasClip,
-    LasTile, LasTilePro,
-    LasSplit,
-    LasNoise, LasNoisePro,
-    LasDiff,
-    Las3dPolyHorizontalVerticalDistance, Las3dPolyRadialDistance,
-    LasIntensity, LasIntensityAttenuationFactor,
-)
-from .lastools.core.data_convert import (
-    Las2txt, Las2txtPro,
-    Txt2Las, Txt2LasPro,
-    Las2LasFilter, Las2LasProFilter,
-    Las2LasProject, Las2LasProProject,
-    Las2LasTransform, Las2LasProTransform,
-    Las2Shp,
-    Shp2Las,
-)
-from .lastools.core.classification_filtering import (
-    LasGround, LasGroundPro,
-    LasGroundNew, LasGroundProNew,
-    LasClassify, LasClassifyPro,
-    LasThin, LasThinPro,
-)
-from .lastools.core.data_compression import (
-    LasZip, LasZipPro
-)
-from .lastools.core.dsm_dtm_generation_prodctions import (
-    Las2Dem, Las2DemPro,
-    Las2Iso,
-    LasGrid, LasGridPro,
-    LasHeight, LasHeightClassify, LasHeightPro, LasHeightProClassify,
-    LasCanopy, LasCanopyPro,
-    Blast2Dem, Blast2DemPro,
-    Blast2Iso, Blast2IsoPro,
-)
-from .lastools.core.publishing import (
-    LasPublish, LasPublishPro
-)
-from .lastools.core.quality_control_information import (
-    LasInfo, LasInfoPro,
-    LasOverlap, LasOverlapPro,
-    LasControl,
-    LasValidate, LasValidatePro,
-)
-from .lastools.core.visualization_colorization import (
-    LasView, LasViewPro,
-    LasColor,
-)
-from .lastools.core.pipelines import (
-    FlightLinesToCHMFirstReturn, FlightLinesToCHMHighestReturn, FlightLinesToCHMSpikeFree,
-    FlightLinesToDTMandDSMFirstReturn, FlightLinesToDTMandDSMSpikeFree,
-    FlightLinesToMergedCHMFirstReturn, FlightLinesToMergedCHMHighestReturn, FlightLinesToMergedCHMPitFree,
-    FlightLinesToMergedCHMSpikeFree,
-    HugeFileClassify, HugeFileNormalize, HugeFileGroundClassify,
-)
-from .lastools.core.utils import paths
+from .lastools.core.algo import LastoolsAlgorithm, LastoolsAlgorithmStub
+from .lastools.core.utils import LastoolsCache, LastoolsPipeline, LastoolsWine, paths
+from .lastools.core.utils.capabilities import LastoolsCapabilities
 
 
 class LAStoolsProvider(QgsProcessingProvider):
@@ -103,7 +44,30 @@ class LAStoolsProvider(QgsProcessingProvider):
         ProcessingConfig.addSetting(
             Setting(self.name(), 'LASTOOLS_FOLDER', 'LAStools folder', "C:\LAStools", valuetype=Setting.FOLDER))
         ProcessingConfig.addSetting(Setting(self.name(), 'WINE_FOLDER', 'Wine folder', "", valuetype=Setting.FOLDER))
+        ProcessingConfig.addSetting(
+            Setting(self.name(), 'LASTOOLS_CACHE_FOLDER', 'Pipeline cache folder', "", valuetype=Setting.FOLDER))
+        ProcessingConfig.addSetting(
+            Setting(self.name(), 'LASTOOLS_CACHE_SIZE', 'Pipeline cache size (GB)', LastoolsCache.DEFAULT_SIZE))
+        ProcessingConfig.addSetting(
+            Setting(self.name(), 'LASTOOLS_RUN_LOG', 'Run log (JSON lines)', "", valuetype=Setting.FILE))
+        ProcessingConfig.addSetting(Setting(
+            self.name(), 'LASTOOLS_SCRATCH_FOLDER', 'Scratch folder for pipeline intermediates (tmpfs or local disk)', "",
+            valuetype=Setting.FOLDER))
+        ProcessingConfig.addSetting(Setting(
+            self.name(), 'LASTOOLS_POINTS_PER_TILE', 'Points per tile of an auto tile size (tile size 0)',
+            LastoolsPipeline.POINTS_PER_TILE))
+        ProcessingConfig.addSetting(Setting(
+            self.name(), 'LASTOOLS_CORE_BUDGET', 'Cores of all concurrent LAStools processes together (0 for all)', 0))
+        ProcessingConfig.addSetting(Setting(
+            self.name(), 'LASTOOLS_CPU_AFFINITY', 'Pin LAStools processes to the NUMA node of their cores', False))
+        ProcessingConfig.addSetting(Setting(
+            self.name(), 'LASTOOLS_MEMORY_BUDGET', 'Memory of all concurrent LAStools processes together (GB, 0 for '
+            'the available memory)', 0))
+        ProcessingConfig.addSetting(Setting(
+            self.name(), 'LASTOOLS_JOB_QUEUE', 'Job queue folder on shared storage to run pipeline tiles on workers',
+            "", valuetype=Setting.FOLDER))
         ProcessingConfig.readSettings()
+        LastoolsCapabilities.start()
         self.refreshAlgorithms()
         return True
 
@@ -112,9 +76,19 @@ class LAStoolsProvider(QgsProcessingProvider):
         Unloads the provider. Any tear-down steps required by the provider
         should be implemented here.
         """
+        LastoolsWine.stop()
         ProcessingConfig.removeSetting('LASTOOLS_ACTIVATED')
         ProcessingConfig.removeSetting('LASTOOLS_FOLDER')
         ProcessingConfig.removeSetting('WINE_FOLDER')
+        ProcessingConfig.removeSetting('LASTOOLS_CACHE_FOLDER')
+        ProcessingConfig.removeSetting('LASTOOLS_CACHE_SIZE')
+        ProcessingConfig.removeSetting('LASTOOLS_RUN_LOG')
+        ProcessingConfig.removeSetting('LASTOOLS_SCRATCH_FOLDER')
+        ProcessingConfig.removeSetting('LASTOOLS_POINTS_PER_TILE')
+        ProcessingConfig.removeSetting('LASTOOLS_CORE_BUDGET')
+        ProcessingConfig.removeSetting('LASTOOLS_CPU_AFFINITY')
+        ProcessingConfig.removeSetting('LASTOOLS_MEMORY_BUDGET')
+        ProcessingConfig.removeSetting('LASTOOLS_JOB_QUEUE')
         pass
 
     def isActive(self):
@@ -127,91 +101,16 @@ class LAStoolsProvider(QgsProcessingProvider):
     def loadAlgorithms(self):
         """
         Loads all algorithms belonging to this provider.
-        """
-        processing_algorithms = [
-            LasIndex(), LasIndexPro(),
-            LasMerge(), LasMergePro(),
-            LasOverage(), LasOveragePro(),
-            LasBoundary(), LasBoundaryPro(),
-            LasClip(),
-            LasTile(), LasTilePro(),
-            LasSplit(),
-            LasNoise(), LasNoisePro(),
-            LasDiff(),
-            Las3dPolyRadialDistance(), Las3dPolyHorizontalVerticalDistance(),
-            LasIntensity(), LasIntensityAttenuationFactor()
-        ]
-        self.algos = processing_algorithms
-
-        data_convert_algorithms = [
-            Las2txt(), Las2txtPro(),
-            Txt2Las(), Txt2LasPro(),
-            Las2LasFilter(), Las2LasProFilter(),
-            Las2LasProject(), Las2LasProProject(),
-            Las2LasTransform(), Las2LasProTransform(),
-            Las2Shp(),
-            Shp2Las(),
-        ]
-        self.algos.extend(data_convert_algorithms)
-
-        classification_filtering_algorithms = [
-            LasGround(), LasGroundPro(),
-            LasGroundNew(), LasGroundProNew(),
-            LasClassify(), LasClassifyPro(),
-            LasThin(), LasThinPro(),
-        ]
-        self.algos.extend(classification_filtering_algorithms)
-
-        data_compression_algorithms = [
-            LasZip(), LasZipPro(),
-        ]
-        self.algos.extend(data_compression_algorithms)
-
-        dsm_dtm_generation_productions_algorithms = [
-            Las2Dem(), Las2DemPro(),
-            Las2Iso(),
-            LasGrid(), LasGridPro(),
-            LasHeight(), LasHeightClassify(), LasHeightPro(), LasHeightProClassify(),
-            LasCanopy(), LasCanopyPro(),
-            Blast2Dem(), Blast2DemPro(),
-            Blast2Iso(), Blast2IsoPro(),
-        ]
-        self.algos.extend(dsm_dtm_generation_productions_algorithms)
-
-        publishing_algorithms = [
-            LasPublish(), LasPublishPro(),
-        ]
-        self.algos.extend(publishing_algorithms)
-
-        quality_control_information_algorithms = [
-            LasInfo(), LasInfoPro(),
-            LasOverlap(), LasOverlapPro(),
-            LasControl(),
-            LasValidate(), LasValidatePro(),
-        ]
-        self.algos.extend(quality_control_information_algorithms)
-
-        visualization_colorization_algorithms = [
-            LasView(), LasViewPro(),
-            LasColor(),
-        ]
-        self.algos.extend(visualization_colorization_algorithms)
-
-        pipelines_algorithms = [
-            FlightLinesToCHMFirstReturn(), FlightLinesToCHMHighestReturn(), FlightLinesToCHMSpikeFree(),
-            FlightLinesToDTMandDSMFirstReturn(), FlightLinesToDTMandDSMSpikeFree(),
-            FlightLinesToMergedCHMFirstReturn(), FlightLinesToMergedCHMHighestReturn(), FlightLinesToMergedCHMPitFree(),
-            FlightLinesToMergedCHMSpikeFree(),
-            HugeFileClassify(), HugeFileGroundClassify(), HugeFileNormalize(),
-
-        ]
-        self.algos.extend(pipelines_algorithms)
 
+        The algorithms are registered as lightweight stubs from the registry,
+        the module of an algorithm is only imported when it is opened or run.
+        """
+        self.algos = LastoolsAlgorithmStub.from_registry()
         for algorithm in self.algos:
             self.addAlgorithm(algorithm)
 
     def icon(self):
-        return QIcon(f'{paths["img"]}/lastools.png')
+        return LastoolsAlgorithm.icon_from_path(f'{paths["img"]}/lastools.png')
 
     def id(self):
         """
@@ -238,3 +137,24 @@ class LAStoolsProvider(QgsProcessingProvider):
         implementation returns the same string as name().
         """
         return 'LAStools LiDAR and point cloud processing'
+
+    def supportedOutputRasterLayerExtensions(self):
+        """the rasters LAStools writes"""
+        return ["tif", "bil", "img", "dtm", "asc", "xyz", "png", "jpg"]
+
+    def defaultRasterFileExtension(self):
+        return "tif"
+
+    def supportedOutputVectorLayerExtensions(self):
+        """the vectors LAStools writes"""
+        return ["shp", "wkt", "kml", "txt"]
+
+    def defaultVectorFileExtension(self, hasGeometry=True):
+        return "shp"
+
+    def supportedOutputPointCloudLayerExtensions(self):
+        """the point clouds LAStools writes"""
+        return LastoolsAlgorithm.OUTPUT_POINT_FORMATS
+
+    def defaultPointCloudFileExtension(self):
+        return "laz"
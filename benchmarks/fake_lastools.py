@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    fake_lastools.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+stand-in for the LAStools binaries, installed as '<root>/bin/<tool>' by install() and run by the plugin in place of
+the real tools. it logs its arguments, prints progress like LAStools does and writes deterministic outputs: LAS
+headers with a bounding box for point clouds, a few bytes for everything else. how long it takes is set through
+the environment:
+
+    FAKE_LASTOOLS_LOG      file every run appends one JSON line to (tool, argv, pid, start, end, inputs, outputs)
+    FAKE_LASTOOLS_PROFILE  JSON with "sleep" and "cpu" seconds per input file and "io" bytes per output file, either
+                           for all tools or per tool: {"sleep": 0.05, "lasground": {"cpu": 0.5, "io": 1000000}}
+    FAKE_LASTOOLS_TILES    number of tiles lastile creates, 4 by default
+    FAKE_LASTOOLS_FAIL     space separated tools that exit with code 1
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import sys
+import glob
+import json
+import time
+import struct
+
+TOOLS = [
+    "blast2dem", "blast2iso", "las2dem", "las2iso", "las2las", "las2shp", "las2tin", "las2txt", "las3dpoly64",
+    "lasboundary", "lascanopy", "lasclassify", "lasclip", "lascolor", "lascontrol", "lasdiff", "lasduplicate",
+    "lasgrid", "lasground", "lasground_new", "lasheight", "lasindex", "lasinfo", "lasintensity64", "lasmerge",
+    "lasnoise", "lasoverage", "lasoverlap", "lasprecision", "laspublish", "lassort", "lassplit", "lasthin", "lastile",
+    "lasvalidate", "lasview", "laszip", "shp2las", "txt2las",
+]
+# the output format options of LAStools, e.g. '-olaz' or '-obil'
+OUTPUT_FORMATS = ["laz", "las", "bin", "txt", "bil", "tif", "img", "asc", "dtm", "xyz", "png", "jpg", "shp", "kml",
+                  "wkt", "csv"]
+# the version the stand-in reports for '-version'
+VERSION = "231004"
+LAS_HEADER = struct.Struct("<4sHH16sBB32s32sHHHIIBHI5I3d3d6d")
+
+
+def install(root):
+    """installs the stand-in as every LAStools binary in '<root>/bin' and returns root"""
+    bin_folder = os.path.join(root, "bin")
+    os.makedirs(bin_folder, exist_ok=True)
+    os.chmod(os.path.abspath(__file__), 0o755)
+    for tool in TOOLS:
+        for name in (tool, tool + ".exe"):
+            link = os.path.join(bin_folder, name)
+            if os.path.lexists(link):
+                os.remove(link)
+            os.symlink(os.path.abspath(__file__), link)
+    return root
+
+
+def write_las(path, bbox, padding=0):
+    """writes a LAS 1.2 header with the bounding box (min_x, min_y, max_x, max_y) and no points"""
+    min_x, min_y, max_x, max_y = bbox
+    header = LAS_HEADER.pack(
+        b"LASF", 0, 0, b"\0" * 16, 1, 2, b"fake", b"fake", 1, 2023, LAS_HEADER.size, LAS_HEADER.size, 0,
+        1 | (0x80 if path.endswith(".laz") else 0), 28, 0, 0, 0, 0, 0, 0, 0.01, 0.01, 0.01, 0.0, 0.0, 0.0,
+        max_x, min_x, max_y, min_y, 100.0, 0.0
+    )
+    with open(path, "wb") as file:
+        file.write(header + b"\0" * padding)
+
+
+def option(arguments, name, default=None):
+    return arguments[arguments.index(name) + 1] if name in arguments else default
+
+
+def input_files(arguments):
+    files = []
+    for index, argument in enumerate(arguments[:-1]):
+        if argument == "-i":
+            files.extend(sorted(glob.glob(arguments[index + 1])) or [arguments[index + 1]])
+        elif argument == "-lof":
+            with open(arguments[index + 1]) as list_of_files:
+                files.extend(line.strip() for line in list_of_files if line.strip())
+    return files
+
+
+def output_files(tool, arguments, inputs):
+    """returns the files the tool writes, following the '-o', '-odir', '-odix', '-ocut' and '-o<format>' options"""
+    output_format = next((name for name in OUTPUT_FORMATS if "-o" + name in arguments), None)
+    if tool == "lastile" and "-reverse_tiling" not in arguments:
+        base = os.path.splitext(option(arguments, "-o", "tile.laz"))[0]
+        output_directory = option(arguments, "-odir", os.path.dirname(inputs[0]) if inputs else ".")
+        tiles = int(os.environ.get("FAKE_LASTOOLS_TILES", "4"))
+        tile_size = float(option(arguments, "-tile_size", "1000"))
+        return [
+            (os.path.join(output_directory, f"{base}_{int(index * tile_size)}_0.{output_format or 'laz'}"),
+             (index * tile_size, 0.0, (index + 1) * tile_size, tile_size))
+            for index in range(tiles)
+        ]
+    if "-o" in arguments:
+        return [(option(arguments, "-o"), (0.0, 0.0, 1000.0, 1000.0))]
+    if not any(name in arguments for name in ("-odir", "-odix", "-ocut")) and output_format is None:
+        return []
+    outputs = []
+    # wildcards that match nothing, e.g. with Windows separators, produce nothing either
+    for index, file in enumerate(file for file in inputs if os.path.isfile(file)):
+        stem, extension = os.path.splitext(os.path.basename(file))
+        cut = int(option(arguments, "-ocut", "0"))
+        stem = (stem[:-cut] if cut else stem) + option(arguments, "-odix", "")
+        output_directory = option(arguments, "-odir", os.path.dirname(file))
+        extension = "." + output_format if output_format else extension
+        bbox = (index * 1000.0, 0.0, (index + 1) * 1000.0, 1000.0)
+        outputs.append((os.path.join(output_directory, stem + extension), bbox))
+    return outputs
+
+
+def main():
+    tool = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    arguments = sys.argv[1:]
+    # what the plugin probes the tools with
+    if arguments == ["-version"]:
+        print(f"LAStools (by info@rapidlasso.de) version {VERSION} (fake)")
+        return 0
+    if arguments == ["-h"]:
+        print(f"usage:\n{tool} -i in.laz -o out.laz\n{tool} -i *.laz -odir out -cores 4\n{tool} -h")
+        return 0
+    start = time.time()
+    profile = json.loads(os.environ.get("FAKE_LASTOOLS_PROFILE", "{}"))
+    settings = {key: value for key, value in profile.items() if not isinstance(value, dict)}
+    settings.update(profile.get(tool, {}))
+    inputs = input_files(arguments)
+    outputs = output_files(tool, arguments, inputs)
+    steps = max(1, len(inputs))
+    for step in range(steps):
+        time.sleep(float(settings.get("sleep", 0.0)))
+        deadline = time.process_time() + float(settings.get("cpu", 0.0))
+        while time.process_time() < deadline:
+            pass
+        print(f"{tool}: {100 * (step + 1) // steps}%", flush=True)
+    for path, bbox in outputs:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if path.endswith((".las", ".laz")):
+            write_las(path, bbox, int(settings.get("io", 0)))
+        else:
+            with open(path, "wb") as file:
+                file.write(f"{tool} {os.path.basename(path)}\n".encode("utf-8") + b"\0" * int(settings.get("io", 0)))
+    returncode = 1 if tool in os.environ.get("FAKE_LASTOOLS_FAIL", "").split() else 0
+    if os.environ.get("FAKE_LASTOOLS_LOG"):
+        record = {
+            "tool": tool, "argv": arguments, "pid": os.getpid(), "start": start, "end": time.time(),
+            "inputs": inputs, "outputs": [path for path, _ in outputs], "returncode": returncode,
+        }
+        with open(os.environ["FAKE_LASTOOLS_LOG"], "a") as log:
+            log.write(json.dumps(record) + "\n")
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
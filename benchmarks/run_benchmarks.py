@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    run_benchmarks.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+runs every algorithm of the LAStools provider headless through processAlgorithm against the stand-in binaries of
+fake_lastools.py and reports per algorithm
+
+    build     seconds from calling processAlgorithm until the first LAStools process started
+    overhead  seconds of the wall clock in which no LAStools process was running (building commands, scheduling,
+              process start-up)
+    parallel  average number of LAStools processes running while any was running
+    overlap   share of that time in which processes of two or more different tools (stages) ran at once
+    wall      seconds processAlgorithm took
+
+it needs the QGIS Python bindings but no LAStools, e.g.
+
+    python3 benchmarks/run_benchmarks.py --files 8 --cores 4 --profile '{"sleep": 0.05}' HugeFileNormalize
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import fake_lastools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def union_length(intervals):
+    """returns the length of the union of the (start, end) intervals"""
+    length, end = 0.0, None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            length += stop - start
+            end = stop
+        elif stop > end:
+            length += stop - end
+            end = stop
+    return length
+
+
+def measure(records, started, finished):
+    """computes the metrics of one processAlgorithm call from the log records of the stand-in processes"""
+    wall = finished - started
+    if not records:
+        return {"processes": 0, "build": wall, "overhead": wall, "parallel": 0.0, "overlap": 0.0, "wall": wall}
+    intervals = [(record["start"], record["end"]) for record in records]
+    busy = union_length(intervals)
+    # sweep over the start and end events, counting the processes of every tool that are running
+    events = sorted([(record["start"], 1, record["tool"]) for record in records] +
+                    [(record["end"], -1, record["tool"]) for record in records])
+    running, overlapping, last = {}, 0.0, None
+    for moment, change, tool in events:
+        if last is not None and sum(1 for count in running.values() if count > 0) > 1:
+            overlapping += moment - last
+        running[tool] = running.get(tool, 0) + change
+        last = moment
+    return {
+        "processes": len(records),
+        "build": min(record["start"] for record in records) - started,
+        "overhead": wall - busy,
+        "parallel": sum(end - start for start, end in intervals) / busy if busy > 0 else 0.0,
+        "overlap": overlapping / busy if busy > 0 else 0.0,
+        "wall": wall,
+    }
+
+
+def prepare_inputs(work, files):
+    """writes 'files' LAS headers side by side, plus the generic inputs some tools need"""
+    input_folder = os.path.join(work, "input")
+    os.makedirs(input_folder, exist_ok=True)
+    for index in range(files):
+        fake_lastools.write_las(
+            os.path.join(input_folder, f"flightline_{index:03d}.laz"),
+            (index * 1000.0, 0.0, index * 1000.0 + 1500.0, 1000.0)
+        )
+    generic_folder = os.path.join(work, "generic")
+    os.makedirs(generic_folder, exist_ok=True)
+    for index in range(files):
+        with open(os.path.join(generic_folder, f"points_{index:03d}.txt"), "w") as file:
+            file.write(f"{index * 1000} 0 0\n")
+    return input_folder, generic_folder
+
+
+def parameters_for(algorithm, work, input_folder, generic_folder, cores):
+    """returns parameters for the algorithm: its defaults plus the inputs and fresh output locations"""
+    from qgis.core import QgsProcessingParameterFile
+
+    output_folder = os.path.join(work, "output", algorithm.name())
+    os.makedirs(output_folder, exist_ok=True)
+    parameters = {}
+    for definition in algorithm.parameterDefinitions():
+        name, kind = definition.name(), definition.type()
+        if name == "TEMPORARY_DIRECTORY":
+            parameters[name] = os.path.join(output_folder, "temporary")
+            os.makedirs(parameters[name], exist_ok=True)
+        elif name == "CORES":
+            parameters[name] = cores
+        elif kind == "file" and definition.behavior() == QgsProcessingParameterFile.Folder:
+            parameters[name] = generic_folder if "GENERIC" in name else input_folder
+        elif kind == "file" and name == "INPUT_LASLAZ":
+            parameters[name] = os.path.join(input_folder, "flightline_000.laz")
+        elif kind == "file":
+            parameters[name] = os.path.join(generic_folder, "points_000.txt")
+        elif kind == "folderDestination":
+            parameters[name] = output_folder
+        elif definition.isDestination():
+            parameters[name] = os.path.join(output_folder, f"{name.lower()}.{definition.defaultFileExtension()}")
+        elif "WILDCARDS" in name:
+            parameters[name] = "*.txt" if "GENERIC" in name else "*.laz"
+        else:
+            parameters[name] = definition.defaultValue()
+    return parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmarks the LAStools plugin against stand-in binaries")
+    parser.add_argument("algorithms", nargs="*", help="names of the algorithms to run, all if none are given")
+    parser.add_argument("--files", type=int, default=4, help="number of input files")
+    parser.add_argument("--tiles", type=int, default=4, help="number of tiles lastile creates")
+    parser.add_argument("--cores", type=int, default=4, help="value of the 'number of cores' parameters")
+    parser.add_argument("--profile", default="{}", help="FAKE_LASTOOLS_PROFILE of the stand-in binaries")
+    parser.add_argument("--work", default=None, help="folder for the binaries, inputs and outputs")
+    parser.add_argument("--json", default=None, help="file the results are written to as JSON")
+    arguments = parser.parse_args()
+
+    from qgis.core import QgsApplication, QgsProcessingContext, QgsProcessingFeedback
+    application = QgsApplication([], False)
+    application.initQgis()
+    from processing.core.Processing import Processing
+    from processing.core.ProcessingConfig import ProcessingConfig
+    Processing.initialize()
+    from LAStools.lastools_provider import LAStoolsProvider
+
+    work = arguments.work or tempfile.mkdtemp(prefix="lastools_benchmark_")
+    root = fake_lastools.install(os.path.join(work, "lastools"))
+    input_folder, generic_folder = prepare_inputs(work, arguments.files)
+    provider = LAStoolsProvider()
+    QgsApplication.processingRegistry().addProvider(provider)
+    ProcessingConfig.setSettingValue("LASTOOLS_FOLDER", root)
+    ProcessingConfig.setSettingValue("WINE_FOLDER", "")
+    os.environ["FAKE_LASTOOLS_PROFILE"] = arguments.profile
+    os.environ["FAKE_LASTOOLS_TILES"] = str(arguments.tiles)
+
+    results = []
+    for registered in provider.algorithms():
+        if arguments.algorithms and registered.name() not in arguments.algorithms:
+            continue
+        algorithm = registered.create()
+        log = os.path.join(work, "logs", algorithm.name() + ".jsonl")
+        os.makedirs(os.path.dirname(log), exist_ok=True)
+        if os.path.exists(log):
+            os.remove(log)
+        os.environ["FAKE_LASTOOLS_LOG"] = log
+        parameters = parameters_for(algorithm, work, input_folder, generic_folder, arguments.cores)
+        error = None
+        started = time.time()
+        try:
+            algorithm.processAlgorithm(parameters, QgsProcessingContext(), QgsProcessingFeedback())
+        except Exception as exception:
+            error = repr(exception)
+        finished = time.time()
+        records = []
+        if os.path.exists(log):
+            with open(log) as file:
+                records = [json.loads(line) for line in file if line.strip()]
+        result = {"algorithm": algorithm.name(), "error": error}
+        result.update(measure(records, started, finished))
+        results.append(result)
+
+    print(f"{'algorithm':40} {'procs':>5} {'build':>8} {'overhead':>8} {'parallel':>8} {'overlap':>8} {'wall':>8}")
+    for result in results:
+        print(f"{result['algorithm']:40} {result['processes']:5d} {result['build']:8.3f} {result['overhead']:8.3f} "
+              f"{result['parallel']:8.2f} {result['overlap']:8.2f} {result['wall']:8.3f}"
+              + (f"  {result['error']}" if result["error"] else ""))
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(results, file, indent=1)
+    application.exitQgis()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_jobs.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+runs the job queue of the pipelines with worker daemons started from jobs.py on this host and the stand-in binaries
+of fake_lastools.py, like the benchmarks it needs no LAStools and, as jobs.py, not even QGIS
+
+    python3 -m unittest discover -s benchmarks -p "test_*.py"
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import signal
+import tempfile
+import threading
+import subprocess
+import unittest
+import importlib.util
+
+import fake_lastools
+
+JOBS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "LAStools", "lastools", "core", "utils", "jobs.py")
+# jobs.py is loaded on its own, the package it is part of needs QGIS
+specification = importlib.util.spec_from_file_location("jobs", JOBS)
+jobs = importlib.util.module_from_spec(specification)
+specification.loader.exec_module(jobs)
+
+
+class Command(list):
+    """the part of LastoolsCommand the job queue uses"""
+
+    def __init__(self, tool, arguments, environment=None):
+        super().__init__([tool] + arguments)
+        self.tool = os.path.basename(tool)
+        self.variables = environment or {}
+
+    def argv(self):
+        return list(self)
+
+    def environment(self):
+        return dict(os.environ, **self.variables)
+
+    def commandline(self):
+        return " ".join(shlex.quote(argument) for argument in self)
+
+
+class Feedback:
+
+    def __init__(self):
+        self.lines = []
+        self.canceled = False
+
+    def pushConsoleInfo(self, line):
+        self.lines.append(line)
+
+    def isCanceled(self):
+        return self.canceled
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.work = tempfile.mkdtemp(prefix="lastools_jobs_")
+        self.root = fake_lastools.install(os.path.join(self.work, "lastools"))
+        self.queue = jobs.LastoolsJobs(os.path.join(self.work, "queue"))
+        self.log = os.path.join(self.work, "log.jsonl")
+        self.workers = []
+
+    def tearDown(self):
+        for worker in self.workers:
+            if worker.poll() is None:
+                worker.send_signal(signal.SIGCONT)
+                worker.kill()
+            worker.wait()
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def start_worker(self, processes=2):
+        worker = subprocess.Popen([sys.executable, JOBS, self.queue.folder, "--processes", str(processes)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.workers.append(worker)
+        return worker
+
+    def command(self, tool, tile, sleep):
+        tile_path = os.path.join(self.work, f"{tile}.laz")
+        fake_lastools.write_las(tile_path, (0.0, 0.0, 1000.0, 1000.0))
+        return Command(os.path.join(self.root, "bin", tool),
+                       ["-i", tile_path, "-o", os.path.join(self.work, f"{tile}_{tool}.laz")],
+                       {"FAKE_LASTOOLS_LOG": self.log, "FAKE_LASTOOLS_PROFILE": json.dumps({"sleep": sleep})})
+
+    def wait_for(self, condition, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.1)
+
+    def running(self):
+        return [name for name in os.listdir(os.path.join(self.queue.folder, "running")) if name.endswith(".json")]
+
+    def assert_queue_empty(self):
+        for state in jobs.LastoolsJobs.FOLDERS:
+            self.assertEqual(os.listdir(os.path.join(self.queue.folder, state)), [], state)
+
+    def test_tile_batch(self):
+        for _ in range(3):
+            self.start_worker()
+        results = {}
+
+        def run(tile):
+            feedback = Feedback()
+            results[tile] = (self.queue.run(self.command("lasground", tile, 0.5), feedback, tile), feedback.lines)
+
+        threads = [threading.Thread(target=run, args=(f"tile_{index}",)) for index in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+        self.assertEqual(sorted(results), sorted(f"tile_{index}" for index in range(12)))
+        for tile, (returncode, lines) in results.items():
+            self.assertEqual(returncode, 0, tile)
+            self.assertIn("lasground: 100%", lines)
+            self.assertTrue(os.path.isfile(os.path.join(self.work, f"{tile}_lasground.laz")))
+        with open(self.log) as log:
+            records = [json.loads(line) for line in log]
+        self.assertEqual(len(records), 12)
+        # spread over the workers, each running two at once
+        self.assertGreater(len({record["pid"] for record in records}), 3)
+        self.assert_queue_empty()
+
+    def test_cancel(self):
+        self.start_worker()
+        feedback = Feedback()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(
+            self.queue.run(self.command("lasground", "tile_0", 60.0), feedback, "tile_0")
+        ))
+        start = time.monotonic()
+        thread.start()
+        self.wait_for(lambda: self.running())
+        feedback.canceled = True
+        thread.join(30)
+        self.assertNotEqual(result, [0])
+        self.assertEqual(len(result), 1)
+        self.assertLess(time.monotonic() - start, 30)
+        self.assertFalse(os.path.exists(os.path.join(self.work, "tile_0_lasground.laz")))
+        self.assert_queue_empty()
+
+    def test_stale_worker(self):
+        stale_timeout = jobs.LastoolsJobs.STALE_TIMEOUT
+        jobs.LastoolsJobs.STALE_TIMEOUT = 2 * jobs.LastoolsJobs.HEARTBEAT_INTERVAL
+        try:
+            stopped = self.start_worker(1)
+            feedback = Feedback()
+            result = []
+            thread = threading.Thread(target=lambda: result.append(
+                self.queue.run(self.command("lasground", "tile_0", 2.0), feedback, "tile_0")
+            ))
+            thread.start()
+            self.wait_for(lambda: self.running())
+            # the worker stops counting its heartbeat, its tool runs on in a session of its own
+            stopped.send_signal(signal.SIGSTOP)
+            worker = self.start_worker(1)
+            thread.join(60)
+            self.assertEqual(result, [0])
+            self.assertTrue(any("queued again" in line for line in feedback.lines))
+            self.assertTrue(any(line.endswith(f":{worker.pid}") for line in feedback.lines))
+            # the stopped worker finds its claim gone and publishes nothing
+            stopped.send_signal(signal.SIGCONT)
+            time.sleep(4 * jobs.LastoolsJobs.POLL_INTERVAL)
+            self.assertIsNone(stopped.poll())
+            self.assert_queue_empty()
+        finally:
+            jobs.LastoolsJobs.STALE_TIMEOUT = stale_timeout
+
+
+if __name__ == "__main__":
+    unittest.main()
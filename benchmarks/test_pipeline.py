@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    test_pipeline.py
+    ---------------------
+    Date                 : November 2023
+    Copyright            : (C) 2023 by rapidlasso GmbH
+    Email                : info near rapidlasso point de
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+runs the pipelines headless against the stand-in binaries of fake_lastools.py, like the benchmarks it needs the
+QGIS Python bindings but no LAStools, and is skipped without them
+
+    python3 -m unittest discover -s benchmarks -p "test_*.py"
+"""
+
+__author__ = 'rapidlasso'
+__date__ = 'September 2023'
+__copyright__ = '(C) 2023, rapidlasso GmbH'
+
+import os
+import shutil
+import tempfile
+import unittest
+import importlib.util
+
+import fake_lastools
+import run_benchmarks
+
+
+@unittest.skipUnless(importlib.util.find_spec("qgis"), "needs the QGIS Python bindings")
+class TestPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from qgis.core import QgsApplication
+        cls.application = QgsApplication([], False)
+        cls.application.initQgis()
+        from processing.core.Processing import Processing
+        Processing.initialize()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.application.exitQgis()
+
+    def setUp(self):
+        from processing.core.ProcessingConfig import ProcessingConfig
+        self.work = tempfile.mkdtemp(prefix="lastools_pipeline_")
+        self.root = fake_lastools.install(os.path.join(self.work, "lastools"))
+        self.input_folder, self.generic_folder = run_benchmarks.prepare_inputs(self.work, 2)
+        self.scratch_folder = os.path.join(self.work, "scratch")
+        ProcessingConfig.setSettingValue("LASTOOLS_FOLDER", self.root)
+        ProcessingConfig.setSettingValue("WINE_FOLDER", "")
+        ProcessingConfig.setSettingValue("LASTOOLS_SCRATCH_FOLDER", self.scratch_folder)
+        os.environ["FAKE_LASTOOLS_LOG"] = os.path.join(self.work, "log.jsonl")
+        os.environ["FAKE_LASTOOLS_PROFILE"] = "{}"
+
+    def tearDown(self):
+        from processing.core.ProcessingConfig import ProcessingConfig
+        ProcessingConfig.setSettingValue("LASTOOLS_SCRATCH_FOLDER", "")
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def process(self, algorithm, **values):
+        from qgis.core import QgsProcessingContext, QgsProcessingFeedback
+        parameters = run_benchmarks.parameters_for(algorithm, self.work, self.input_folder, self.generic_folder, 2)
+        parameters.update(values)
+        algorithm.processAlgorithm(parameters, QgsProcessingContext(), QgsProcessingFeedback())
+        return parameters
+
+    def scratch_directories(self):
+        return os.listdir(self.scratch_folder) if os.path.isdir(self.scratch_folder) else []
+
+    def test_scratch_leaves_refused(self):
+        # without an output directory the CHMs would be written to the scratch directory, which is removed again
+        from qgis.core import QgsProcessingException
+        from LAStools.lastools.core.pipelines import FlightLinesToCHMFirstReturn
+        with self.assertRaises(QgsProcessingException):
+            self.process(FlightLinesToCHMFirstReturn(), TEMPORARY_DIRECTORY="", OUTPUT_DIRECTORY="")
+        self.assertEqual(self.scratch_directories(), [])
+        self.assertFalse(os.path.exists(os.environ["FAKE_LASTOOLS_LOG"]), "nothing should have run")
+
+    def test_scratch_leaves_kept(self):
+        from LAStools.lastools.core.pipelines import FlightLinesToCHMFirstReturn
+        parameters = self.process(FlightLinesToCHMFirstReturn(), TEMPORARY_DIRECTORY="")
+        self.assertTrue([name for name in os.listdir(parameters["OUTPUT_DIRECTORY"]) if "_chm_fr" in name])
+        self.assertEqual(self.scratch_directories(), [])
+
+    def test_scratch_leaves_mosaicked(self):
+        # the mosaics take the DTMs and DSMs out of the scratch directory, the first must not remove it
+        from LAStools.lastools.core.pipelines import FlightLinesToDTMandDSMFirstReturn
+        self.process(FlightLinesToDTMandDSMFirstReturn(), TEMPORARY_DIRECTORY="", OUTPUT_DIRECTORY="", MOSAIC=True)
+        for name in ("_dtm", "_dsm"):
+            self.assertTrue(os.listdir(os.path.join(self.input_folder, f"tile{name}_tiles")), name)
+        self.assertEqual(self.scratch_directories(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()